@@ -0,0 +1,34 @@
+"""
+Local benchmarks for the SevenAwesome services.
+
+Run them from the project root, e.g. `python -m benchmarks.tables_export`,
+against the database configured in `.env` (SQLite or MySQL).
+"""
+
+import os
+import statistics
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sevenawesome_app_services.settings")
+
+    import django
+
+    django.setup()
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[max(0, int(round(fraction * len(ordered))) - 1)]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Return latency statistics in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 2),
+        "median_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
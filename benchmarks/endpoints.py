@@ -0,0 +1,272 @@
+"""
+Benchmark the people API endpoints and the `Person` helpers on generated datasets.
+
+    python -m benchmarks.endpoints --sizes 250,1000 --runs 5
+    python -m benchmarks.endpoints --update-baseline
+
+For each size a fresh test database is created (in memory for SQLite, or
+`test_<NAME>_bench_<size>` on MySQL) and filled by the `generate_people`
+command. Each case records wall time, query count, tracemalloc peak and
+response size. Results are written to `--output` and compared with the stored
+baseline. A case regresses when it runs more queries than the baseline, or when
+its median time or peak memory grows by more than `--threshold`.
+Exits with status 1 when something regressed.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from . import setup_django, summarize
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baselines" / "endpoints.json"
+DEFAULT_OUTPUT = BENCHMARKS_DIR / "results" / "endpoints.json"
+
+PERSON_HELPERS = ("parents", "children", "current_spouse", "get_attribute_assignments")
+
+
+def _endpoint_case(path: str, user):
+    from asgiref.sync import async_to_sync, iscoroutinefunction
+    from django.urls import resolve
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    factory = APIRequestFactory()
+    match = resolve(path)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+
+    def run() -> int:
+        request = factory.get(path)
+        force_authenticate(request, user=user)
+        response = view(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            # Shared full-tree bodies come back as an already rendered HttpResponse.
+            response.render()
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+        return len(response.content)
+
+    return run
+
+
+def _helper_case(person, name: str):
+    from django.db.models import QuerySet
+
+    def run() -> None:
+        result = getattr(person, name)()
+        if isinstance(result, QuerySet):
+            list(result)
+
+    return run
+
+
+def _sample_person():
+    """A married father who also has parents and current attributes, so every helper has work."""
+    from people.models import Person
+
+    return (
+        Person.objects.filter(
+            family_memberships__role__code="father",
+            marriages_as_husband__ended_on__isnull=True,
+        )
+        .filter(family_memberships__role__code="child")
+        .filter(attribute_assignments__ended_on__isnull=True)
+        .order_by("pk")
+        .first()
+    ) or Person.objects.order_by("pk").first()
+
+
+def _cases(user) -> dict:
+    from people.models import Family
+
+    person = _sample_person()
+    family = (
+        Family.objects.filter(memberships__person=person, memberships__role__code="father").first()
+        or Family.objects.order_by("pk").first()
+    )
+    cases = {
+        "families": _endpoint_case("/api/families/", user),
+        "family_tree": _endpoint_case(f"/api/families/{family.pk}/tree/", user),
+        "full_attributes": _endpoint_case("/api/people/full/attributes/", user),
+    }
+    for name in PERSON_HELPERS:
+        cases[f"person.{name}"] = _helper_case(person, name)
+    return cases
+
+
+def _measure(run, runs: int) -> dict:
+    from django.db import connection
+
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    # The first call also serves as warm-up.
+    with connection.execute_wrapper(count_query):
+        response_bytes = run()
+
+    # tracemalloc slows everything down, so memory gets its own run.
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+
+    return {
+        **summarize(samples),
+        "queries": queries,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "response_bytes": response_bytes,
+    }
+
+
+def _create_database(size: int, seed: int, keepdb: bool) -> str:
+    """Create (or reuse, with --keepdb) the test database for `size` and seed it. Returns the old NAME."""
+    from django.core.management import call_command
+    from django.db import connection
+
+    from people.models import Person
+
+    old_name = connection.settings_dict["NAME"]
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    if connection.vendor != "sqlite":
+        test_settings["NAME"] = f"test_{old_name}_bench_{size}"
+    elif keepdb:
+        test_settings["NAME"] = f"{old_name}_bench_{size}"
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+
+    if not Person.objects.exists():
+        started = time.perf_counter()
+        call_command("generate_people", persons=size, seed=seed, verbosity=0)
+        print(f"seeded {size} persons in {time.perf_counter() - started:.1f}s")
+    return old_name
+
+
+def _compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    regressions = []
+    for key, current in results["cases"].items():
+        previous = baseline["cases"].get(key)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{key}: queries {previous['queries']} -> {current['queries']}")
+        delta = current["median_ms"] - previous["median_ms"]
+        if delta > max(previous["median_ms"] * threshold, min_delta_ms):
+            regressions.append(
+                f"{key}: median {previous['median_ms']}ms -> {current['median_ms']}ms"
+            )
+        if current["peak_memory_kb"] > previous["peak_memory_kb"] * (1 + threshold):
+            regressions.append(
+                f"{key}: peak memory {previous['peak_memory_kb']}KB -> {current['peak_memory_kb']}KB"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="250,1000", help="Comma-separated dataset sizes (persons).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keepdb", action="store_true", help="Keep and reuse the seeded databases.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative growth (0.2 = 20%%).")
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="Ignore median time changes smaller than this, whatever the threshold.",
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    import django
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    user = get_user_model()(username="benchmark")
+    results = {
+        "environment": {
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        },
+        "seed": args.seed,
+        "runs": args.runs,
+        "cases": {},
+    }
+
+    # Reads must stay on the seeded database, not on a configured replica, and
+    # DEBUG's query log would skew both time and memory. Repeated runs would
+    # exhaust the throttle budgets, and would only measure the payload cache
+    # and the results single-flight shares between back-to-back requests.
+    throttling = {**settings.THROTTLING, "ENABLED": False}
+    people_cache = {**settings.PEOPLE_CACHE, "ENABLED": False}
+    single_flight = {**settings.SINGLE_FLIGHT, "ENABLED": False}
+    with override_settings(
+        REPLICA_DATABASES=[],
+        DEBUG=False,
+        THROTTLING=throttling,
+        PEOPLE_CACHE=people_cache,
+        SINGLE_FLIGHT=single_flight,
+    ):
+        for size in sizes:
+            old_name = _create_database(size, args.seed, args.keepdb)
+            try:
+                for name, run in _cases(user).items():
+                    stats = _measure(run, args.runs)
+                    results["cases"][f"{size}/{name}"] = stats
+                    print(
+                        f"{size:>7} {name:<32} median={stats['median_ms']}ms p95={stats['p95_ms']}ms "
+                        f"queries={stats['queries']} peak={stats['peak_memory_kb']}KB "
+                        f"bytes={stats['response_bytes']}"
+                    )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"results written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"baseline updated: {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("no baseline to compare with; run with --update-baseline to create one")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["environment"]["database"] != connection.vendor:
+        print(f"baseline was recorded on {baseline['environment']['database']}; not comparing")
+        return
+    regressions = _compare(results, baseline, args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
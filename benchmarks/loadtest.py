@@ -0,0 +1,298 @@
+"""
+Drive a running server with a mix of authenticated API requests.
+
+    python manage.py runserver --noreload   # or gunicorn / uvicorn with N workers
+    python -m benchmarks.loadtest --username bench --password secret \\
+        --concurrency 16 --rate 40 --duration 60 --mix family_tree=3,families=1,full_attributes=1
+
+Each worker logs in through /api/auth/jwt/create/ and then sends requests
+chosen from `--mix`. `login` can be part of the mix too. With `--rate`, sends
+are scheduled at that total rate (open loop), and latency is measured from the
+scheduled time, so a saturated server shows up as queueing instead of being
+hidden. Without `--rate`, every worker sends back to back (closed loop).
+Reports p50/p95/p99 latency and throughput per request kind. Only the
+standard library is used, so it can run from any machine. All workers log in
+as the same user, so start the server with THROTTLING_ENABLED=False unless
+the throttles are what is being measured, and with PEOPLE_CACHE_ENABLED=False
+to measure the uncached build path.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from . import percentile
+
+LOGIN_PATH = "/api/auth/jwt/create/"
+PATHS = {
+    "families": lambda family_ids, rng: "/api/families/",
+    "family_tree": lambda family_ids, rng: f"/api/families/{rng.choice(family_ids)}/tree/",
+    "full_attributes": lambda family_ids, rng: "/api/people/full/attributes/",
+}
+REQUEST_KINDS = (*PATHS, "login")
+
+
+class Sample:
+    __slots__ = ("kind", "status", "latency", "service_time", "finished_at")
+
+    def __init__(self, kind, status, latency, service_time, finished_at):
+        self.kind = kind
+        self.status = status
+        self.latency = latency
+        self.service_time = service_time
+        self.finished_at = finished_at
+
+
+class Schedule:
+    """Hands out send times to the workers until the run is over."""
+
+    def __init__(self, rate: float, duration: float, max_requests: int | None):
+        self.rate = rate
+        self.max_requests = max_requests
+        self.started_at = time.perf_counter()
+        self.deadline = self.started_at + duration
+        self._issued = 0
+        self._lock = threading.Lock()
+
+    def next_slot(self) -> float | None:
+        with self._lock:
+            if self.max_requests is not None and self._issued >= self.max_requests:
+                return None
+            if self.rate:
+                slot = self.started_at + self._issued / self.rate
+            else:
+                slot = time.perf_counter()
+            if slot >= self.deadline:
+                return None
+            self._issued += 1
+            return slot
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, args, schedule, kinds, weights, family_ids):
+        super().__init__(name=f"loadtest-{index}", daemon=True)
+        self.args = args
+        self.schedule = schedule
+        self.kinds = kinds
+        self.weights = weights
+        self.family_ids = family_ids
+        self.rng = random.Random(args.seed + index)
+        self.samples: list[Sample] = []
+        self.token = None
+        self._connection = None
+
+    def run(self):
+        try:
+            self.token = self._login()[1]
+        except (OSError, http.client.HTTPException, ValueError) as exc:
+            print(f"{self.name}: login failed: {exc}")
+            return
+
+        while True:
+            slot = self.schedule.next_slot()
+            if slot is None:
+                return
+            delay = slot - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = self.rng.choices(self.kinds, weights=self.weights)[0]
+            sent_at = time.perf_counter()
+            status = self._send(kind)
+            finished_at = time.perf_counter()
+            self.samples.append(
+                Sample(kind, status, finished_at - slot, finished_at - sent_at, finished_at)
+            )
+
+    def _send(self, kind: str) -> int:
+        try:
+            if kind == "login":
+                status, token = self._login()
+                self.token = token or self.token
+                return status
+            path = PATHS[kind](self.family_ids, self.rng)
+            status, _ = self._request("GET", path, headers={"Authorization": f"Bearer {self.token}"})
+            if status == 401:
+                # The access token expired during a long run; log in again for the next request.
+                self.token = self._login()[1] or self.token
+            return status
+        except (OSError, http.client.HTTPException):
+            self._reset_connection()
+            return 0
+
+    def _login(self) -> tuple[int, str | None]:
+        body = json.dumps({"username": self.args.username, "password": self.args.password})
+        status, payload = self._request(
+            "POST", LOGIN_PATH, body=body, headers={"Content-Type": "application/json"}
+        )
+        if status != 200:
+            return status, None
+        return status, json.loads(payload)["access_token"]
+
+    def _request(self, method, path, body=None, headers=None) -> tuple[int, bytes]:
+        connection = self._get_connection()
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self._reset_connection()
+            raise
+        if response.will_close:
+            self._reset_connection()
+        return response.status, payload
+
+    def _get_connection(self):
+        if self._connection is None:
+            url = urlsplit(self.args.base_url)
+            connection_class = (
+                http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+            )
+            self._connection = connection_class(url.hostname, url.port, timeout=self.args.timeout)
+        return self._connection
+
+    def _reset_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def _parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise argparse.ArgumentTypeError(
+                f"unknown request kind {kind!r}; choose from {', '.join(REQUEST_KINDS)}"
+            )
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def _parse_ids(value: str) -> list[int]:
+    ids = []
+    for part in value.split(","):
+        start, _, end = part.partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+
+def _discover_family_ids(args) -> list[int]:
+    """Ask the API for the family ids (one, possibly slow, /api/families/ call)."""
+    worker = Worker(-1, args, None, (), (), ())
+    _, token = worker._login()
+    if token is None:
+        raise SystemExit("login failed; check --username/--password and --base-url")
+    status, payload = worker._request(
+        "GET", "/api/families/", headers={"Authorization": f"Bearer {token}"}
+    )
+    worker._reset_connection()
+    if status != 200:
+        raise SystemExit(f"could not list families (HTTP {status}); pass --family-ids")
+    ids = [family["id"] for family in json.loads(payload)]
+    if not ids:
+        raise SystemExit("no families found; seed data with `manage.py generate_people`")
+    return ids
+
+
+def _report(samples: list[Sample], elapsed: float) -> dict:
+    by_kind = defaultdict(list)
+    for sample in samples:
+        by_kind[sample.kind].append(sample)
+    by_kind["all"] = samples
+
+    report = {}
+    for kind, group in by_kind.items():
+        if not group:
+            continue
+        latencies = sorted(sample.latency for sample in group)
+        service_times = sorted(sample.service_time for sample in group)
+        statuses = Counter(sample.status for sample in group)
+        errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+        report[kind] = {
+            "requests": len(group),
+            "errors": errors,
+            "throughput_rps": round(len(group) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+            "service_p50_ms": round(percentile(service_times, 0.50) * 1000, 1),
+            "service_p99_ms": round(percentile(service_times, 0.99) * 1000, 1),
+            # Status 0 means the connection failed or timed out.
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent clients.")
+    parser.add_argument("--rate", type=float, default=0, help="Total requests per second; 0 sends as fast as possible.")
+    parser.add_argument("--duration", type=float, default=30, help="Length of the run in seconds.")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests.")
+    parser.add_argument("--warmup", type=float, default=0, help="Seconds at the start left out of the report.")
+    parser.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default="family_tree=3,families=1,full_attributes=1",
+        help=f"Weighted request kinds, e.g. family_tree=3,login=1. Kinds: {', '.join(REQUEST_KINDS)}.",
+    )
+    parser.add_argument("--family-ids", type=_parse_ids, default=None, help="e.g. 1-200 or 3,8,21; default: all families.")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Also write the report as JSON to this file.")
+    args = parser.parse_args()
+
+    family_ids = args.family_ids
+    if "family_tree" in args.mix and not family_ids:
+        family_ids = _discover_family_ids(args)
+
+    schedule = Schedule(args.rate, args.warmup + args.duration, args.requests)
+    kinds, weights = list(args.mix), list(args.mix.values())
+    workers = [
+        Worker(index, args, schedule, kinds, weights, family_ids)
+        for index in range(args.concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    finished_at = time.perf_counter()
+
+    measured_from = schedule.started_at + args.warmup
+    samples = [
+        sample
+        for worker in workers
+        for sample in worker.samples
+        if sample.finished_at >= measured_from
+    ]
+    if not samples:
+        raise SystemExit("no requests completed")
+    report = _report(samples, finished_at - measured_from)
+
+    print(
+        f"{args.concurrency} clients, target rate {args.rate or 'unbounded'} rps, "
+        f"{finished_at - measured_from:.1f}s measured"
+    )
+    for kind, stats in report.items():
+        print(
+            f"{kind:>16}: {stats['requests']} req  {stats['throughput_rps']} rps  "
+            f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms "
+            f"max={stats['max_ms']}ms  errors={stats['errors']}"
+        )
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"arguments": {**vars(args), "family_ids": None}, "report": report}, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure per-request connection overhead with and without the pooled MySQL backend.
+
+    python -m benchmarks.mysql_pool --requests 200
+
+Each simulated request connects, runs one small query and closes the Django
+connection, which is what happens with CONN_MAX_AGE=0. Requires the MySQL
+database configured in `.env`.
+"""
+
+import argparse
+import time
+
+from . import setup_django, summarize
+
+
+def _measure(wrapper, requests: int) -> list[float]:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        wrapper.close()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.db.utils import load_backend
+
+    from sevenawesome_app_services.db_backends.mysql_pool.pool import pool_stats
+
+    results = {}
+    for label, engine in (
+        ("mysql", "django.db.backends.mysql"),
+        ("mysql_pool", settings.MYSQL_POOL_ENGINE),
+    ):
+        settings_dict = dict(settings.DATABASES["default"], ENGINE=engine, CONN_MAX_AGE=0)
+        settings_dict.setdefault("POOL", {})
+        wrapper = load_backend(engine).DatabaseWrapper(settings_dict, alias=f"benchmark_{label}")
+        _measure(wrapper, 5)
+        results[label] = summarize(_measure(wrapper, args.requests))
+
+    for label, stats in results.items():
+        print(f"{label:>10}: " + "  ".join(f"{key}={value}" for key, value in stats.items()))
+    saved = results["mysql"]["median_ms"] - results["mysql_pool"]["median_ms"]
+    print(f"median saving per request: {saved:.2f} ms")
+    for stats in pool_stats():
+        print(
+            f"pool {stats['name']}: created={stats['created']} checkouts={stats['checkouts']} "
+            f"waits={stats['waits']} checkout_max={stats['checkout_max_seconds'] * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
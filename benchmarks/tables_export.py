@@ -0,0 +1,66 @@
+"""
+Compare the sequential and parallel paths of `PeopleTablesDataAPIView`.
+
+    python -m benchmarks.tables_export --runs 50 --workers 4
+
+The view is called in-process with a forced authentication, so the numbers only
+cover the table exports and response rendering.
+"""
+
+import argparse
+import time
+
+from . import setup_django, summarize
+
+
+def _measure(view, factory, user, runs: int) -> list[float]:
+    from rest_framework.test import force_authenticate
+
+    samples = []
+    for _ in range(runs):
+        request = factory.get("/api/people/full/attributes/")
+        force_authenticate(request, user=user)
+        started = time.perf_counter()
+        response = view(request)
+        response.render()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory
+
+    from people.api import PeopleTablesDataAPIView
+
+    view = PeopleTablesDataAPIView.as_view()
+    factory = APIRequestFactory()
+    user = get_user_model()(username="benchmark")
+
+    results = {}
+    for label, parallel in (("sequential", False), ("parallel", True)):
+        config = dict(settings.PEOPLE_TABLES_EXPORT, PARALLEL=parallel, MAX_WORKERS=args.workers)
+        # Measure the exports themselves, not the payload cache.
+        people_cache = dict(settings.PEOPLE_CACHE, ENABLED=False)
+        with override_settings(PEOPLE_TABLES_EXPORT=config, PEOPLE_CACHE=people_cache):
+            _measure(view, factory, user, args.warmup)
+            results[label] = summarize(_measure(view, factory, user, args.runs))
+
+    for label, stats in results.items():
+        print(f"{label:>10}: " + "  ".join(f"{key}={value}" for key, value in stats.items()))
+    speedup = results["sequential"]["median_ms"] / max(results["parallel"]["median_ms"], 0.001)
+    print(f"median speedup with {args.workers} workers: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,112 @@
 from django.contrib import admin
+from django.db.models import Q
+from django.utils.text import smart_split, unescape_string_literal
 
+from sevenawesome_app_services.pagination import EstimatedCountPaginator
 
-from .models import Family, FamilyMember, FamilyRole
+from .models import Family, FamilyMember, FamilyRole, LastName, Nickname, Person, PersonName
+
+FAMILY_LAST_NAME_FIELDS = (
+    "first_last_name",
+    "second_last_name",
+    "third_last_name",
+    "fourth_last_name",
+)
+
+
+def _search_terms(search_term):
+    """The words of an admin search, normalized like the name catalogs; quotes keep phrases together."""
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        term = bit.strip().lower()
+        if term:
+            yield term
+
+
+def _prefix_matches(catalog, term):
+    # A range scan on the unique index of normalized_value, unlike a leading-wildcard LIKE.
+    return catalog.objects.filter(normalized_value__startswith=term).values("pk")
+
+
+def _families_matching(term):
+    last_names = _prefix_matches(LastName, term)
+    condition = Q()
+    for field in FAMILY_LAST_NAME_FIELDS:
+        condition |= Q(**{f"{field}__in": last_names})
+    return Family.objects.filter(condition).values("pk")
+
+
+def _persons_matching(term):
+    return Person.objects.filter(
+        Q(first_name__in=_prefix_matches(PersonName, term))
+        | Q(last_name__in=_prefix_matches(LastName, term))
+    ).values("pk")
+
+
+class NameCatalogAdmin(admin.ModelAdmin):
+    """Admin for a name catalog; also answers the autocomplete widgets of the fields pointing to it."""
+
+    list_display = ("value", "normalized_value", "updated_at")
+    search_fields = ("normalized_value",)
+    search_help_text = "Matches the start of the name."
+    ordering = ("normalized_value",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        for term in _search_terms(search_term):
+            queryset = queryset.filter(normalized_value__startswith=term)
+        return queryset, False
+
+
+admin.site.register((PersonName, LastName, Nickname), NameCatalogAdmin)
+
+
+@admin.register(Person)
+class PersonAdmin(admin.ModelAdmin):
+    list_display = ("id", "__str__", "gender", "date_of_birth", "is_deceased", "is_active")
+    list_filter = ("is_active", "is_deceased", "gender")
+    list_select_related = ("first_name", "last_name", "gender")
+    search_fields = ("first_name__normalized_value", "last_name__normalized_value")
+    search_help_text = "Matches the start of the first or last name."
+    autocomplete_fields = ("first_name", "second_name", "last_name", "second_last_name", "nickname")
+    # Too many rows for a <select>, and no admin of their own to search.
+    raw_id_fields = ("birth_city", "current_address", "user")
+    ordering = ("id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Autocomplete ignores list_select_related, yet labels every result with __str__.
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+    def get_search_results(self, request, queryset, search_term):
+        for term in _search_terms(search_term):
+            queryset = queryset.filter(pk__in=_persons_matching(term))
+        return queryset, False
 
 
 @admin.register(Family)
 class FamilyAdmin(admin.ModelAdmin):
     list_display = ("id", "display_last_name", "is_active", "created_at")
-    search_fields = (
-        "first_last_name__value",
-        "second_last_name__value",
-        "third_last_name__value",
-        "fourth_last_name__value",
-    )
+    list_select_related = FAMILY_LAST_NAME_FIELDS
+    search_fields = tuple(f"{field}__normalized_value" for field in FAMILY_LAST_NAME_FIELDS)
+    search_help_text = "Matches families by the start of any of their last names."
     list_filter = ("is_active",)
+    autocomplete_fields = FAMILY_LAST_NAME_FIELDS
+    ordering = ("id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Autocomplete ignores list_select_related, yet labels every result with __str__.
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+    def get_search_results(self, request, queryset, search_term):
+        for term in _search_terms(search_term):
+            queryset = queryset.filter(pk__in=_families_matching(term))
+        return queryset, False
 
     def display_last_name(self, obj):
         return obj.full_last_name or f"Family #{obj.pk}"
@@ -25,14 +118,28 @@ class FamilyAdmin(admin.ModelAdmin):
 class FamilyMemberAdmin(admin.ModelAdmin):
     list_display = ("person", "family", "role", "is_primary", "joined_date", "left_date")
     list_filter = ("role", "is_primary")
+    list_select_related = (
+        "person__first_name",
+        "person__last_name",
+        *(f"family__{field}" for field in FAMILY_LAST_NAME_FIELDS),
+        "role",
+    )
     search_fields = (
-        "person__first_name__value",
-        "person__last_name__value",
-        "family__first_last_name__value",
-        "family__second_last_name__value",
-        "family__third_last_name__value",
-        "family__fourth_last_name__value",
+        "person__first_name__normalized_value",
+        "person__last_name__normalized_value",
+        *(f"family__{field}__normalized_value" for field in FAMILY_LAST_NAME_FIELDS),
     )
+    search_help_text = "Matches the start of the person's first or last name, or of a family last name."
+    autocomplete_fields = ("person", "family")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        for term in _search_terms(search_term):
+            queryset = queryset.filter(
+                Q(person__in=_persons_matching(term)) | Q(family__in=_families_matching(term))
+            )
+        return queryset, False
 
 
 @admin.register(FamilyRole)
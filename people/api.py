@@ -1,43 +1,99 @@
-from django.db.models import Prefetch
-from django.http import Http404
+from datetime import date, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.http import Http404, HttpResponse
+from django.utils import timezone
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from sevenawesome_app_services.authentication import CachedJWTAuthentication
+from sevenawesome_app_services.db_routers import ReplicaReadsMixin, current_read_alias
+from sevenawesome_app_services.instrumentation import ServerTimingMixin, timed
+from sevenawesome_app_services.singleflight import coalesce
+from sevenawesome_app_services.throttling import ConcurrencyLimitMixin, concurrency_slot
+
+from .concurrency import run_in_parallel
+from .demographics import AGE_BUCKETS, DIMENSIONS, FIELD_DIMENSIONS, OVERALL
+from .events import month_day_filter, occurrence
+from .geo import coordinate_string, covering_cells, haversine_km
+from .identifiers import normalize_email, normalize_identity, normalize_phone
 from .models import (
     City,
     Country,
+    DemographicCount,
     EducationalLevel,
     Family,
+    FamilyGroup,
     FamilyMember,
     FamilyRole,
     Gender,
+    Institution,
     Language,
     LastName,
     Location,
     MaritalStatus,
+    Marriage,
     Nationality,
     Nickname,
     Occupation,
+    Person,
     PersonIdentityType,
     PersonName,
     PersonRelationship,
     State,
 )
-from .serializers import FamilyTreeSerializer
+from .payload_cache import data_version, get_payload, payload_key, record_request, store_payload
+from .search import search_people
+from .serializers import FamilyTreeSerializer, _code_label, _person_reference
+
+# Everything the family member serializers read, joined in the membership queries of both
+# the sync and the async tree views (lazy loads are not even allowed in the async ones).
+MEMBERSHIP_RELATED_FIELDS = (
+    "role",
+    "person__first_name",
+    "person__second_name",
+    "person__last_name",
+    "person__second_last_name",
+    "person__nickname",
+    "person__gender",
+    "person__identity_type",
+    "person__education",
+    "person__occupation",
+    "person__marital_status",
+    "person__cause_of_death",
+    "person__birth_country",
+    "person__birth_state__country",
+    "person__birth_city__state",
+    "person__birth_city__country",
+    "person__current_address__country",
+    "person__current_address__state",
+    "person__current_address__city",
+)
 
 
-class FamilyTreeAPIView(generics.ListAPIView):
+class FamilyTreeAPIView(
+    ServerTimingMixin, ReplicaReadsMixin, ConcurrencyLimitMixin, generics.ListAPIView
+):
     """
     Return the list of families with their members (family tree) and
     the full profile of each person including relationships.
     """
 
     serializer_class = FamilyTreeSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
+    throttle_scope = "tree"
+    concurrency_limit = "tree"
+
+    def list(self, request, *args, **kwargs):
+        with timed("serialize"):
+            return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
         queryset = Family.objects.all()
@@ -87,27 +143,7 @@ class FamilyTreeAPIView(generics.ListAPIView):
     def _membership_queryset(self):
         relationship_qs = self._relationship_queryset()
         return (
-            FamilyMember.objects.select_related(
-                "role",
-                "person__first_name",
-                "person__second_name",
-                "person__last_name",
-                "person__second_last_name",
-                "person__nickname",
-                "person__gender",
-                "person__identity_type",
-                "person__education",
-                "person__occupation",
-                "person__marital_status",
-                "person__cause_of_death",
-                "person__birth_country",
-                "person__birth_state",
-                "person__birth_city",
-                "person__current_address",
-                "person__current_address__country",
-                "person__current_address__state",
-                "person__current_address__city",
-            )
+            FamilyMember.objects.select_related(*MEMBERSHIP_RELATED_FIELDS)
             .prefetch_related(
                 Prefetch(
                     "person__relationships_as_person",
@@ -131,35 +167,84 @@ class FamilyTreeAPIView(generics.ListAPIView):
         return flag.lower() in {"true", "1", "yes"}
 
 
-class PeopleTablesDataAPIView(APIView):
+class RenderedPayloadMixin:
+    """
+    Helpers for views that answer with bytes rendered once and reused: from
+    the payload cache (see `payload_cache`) or from a shared build.
+    """
+
+    def _serves_plain_json(self) -> bool:
+        renderer = self.request.accepted_renderer
+        # Media type parameters such as `indent` change the bytes; only cache the plain form.
+        return renderer.format == "json" and self.request.accepted_media_type == renderer.media_type
+
+    def _render(self, payload: dict) -> bytes:
+        renderer_context = self.get_renderer_context()
+        return self.request.accepted_renderer.render(
+            payload, self.request.accepted_media_type, renderer_context
+        )
+
+    def _shared_response(self, body: bytes) -> HttpResponse:
+        renderer = self.request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        return HttpResponse(body, content_type=content_type)
+
+
+class PeopleTablesDataAPIView(ServerTimingMixin, ReplicaReadsMixin, RenderedPayloadMixin, APIView):
     """
     Return flat exports for the requested people-related tables.
     Defaults to active records when models expose an `is_active` flag.
+    Plain JSON responses are cached until a people row changes.
     """
 
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, *args, **kwargs):
         include_inactive = self._should_include_inactive()
-        active_only = not include_inactive
-        return Response(
-            {
-                "person_names": self._values_for(PersonName, active_only),
-                "last_names": self._values_for(LastName, active_only),
-                "families": self._families_payload(active_only),
-                "family_roles": self._values_for(FamilyRole, active_only),
-                "nicknames": self._values_for(Nickname, active_only),
-                "person_identity_types": self._values_for(PersonIdentityType, active_only),
-                "countries": self._countries_with_states_and_cities(active_only),
-                "nationalities": self._values_for(Nationality, active_only),
-                "languages": self._values_for(Language, active_only),
-                "educational_levels": self._values_for(EducationalLevel, active_only),
-                "genders": self._values_for(Gender, active_only),
-                "marital_statuses": self._values_for(MaritalStatus, active_only),
-                "occupations": self._values_for(Occupation, active_only),
-                "locations": self._locations_payload(),
-            }
+        params = (include_inactive,)
+        record_request("tables", params)
+        key = payload_key("tables", params) if self._serves_plain_json() else None
+        body = get_payload(key)
+        if body is None:
+            payload = self._export_tables(not include_inactive)
+            if key is None:
+                return Response(payload)
+            body = self._render(payload)
+            store_payload(key, body)
+        return self._shared_response(body)
+
+    def _export_tables(self, active_only: bool) -> dict:
+        exports = self._table_exports(active_only)
+        with timed("serialize"):
+            if settings.PEOPLE_TABLES_EXPORT["PARALLEL"]:
+                results = run_in_parallel(export for _, export in exports)
+            else:
+                results = [export() for _, export in exports]
+        return {key: result for (key, _), result in zip(exports, results)}
+
+    def _table_exports(self, active_only: bool):
+        """
+        Return (response key, callable) pairs for every exported table.
+        The exports are independent of each other, so callers may run them in any order.
+        """
+        return (
+            ("person_names", partial(self._values_for, PersonName, active_only)),
+            ("last_names", partial(self._values_for, LastName, active_only)),
+            ("families", partial(self._families_payload, active_only)),
+            ("family_roles", partial(self._values_for, FamilyRole, active_only)),
+            ("nicknames", partial(self._values_for, Nickname, active_only)),
+            ("person_identity_types", partial(self._values_for, PersonIdentityType, active_only)),
+            ("countries", partial(self._countries_with_states_and_cities, active_only)),
+            ("nationalities", partial(self._values_for, Nationality, active_only)),
+            ("languages", partial(self._values_for, Language, active_only)),
+            ("educational_levels", partial(self._values_for, EducationalLevel, active_only)),
+            ("genders", partial(self._values_for, Gender, active_only)),
+            ("marital_statuses", partial(self._values_for, MaritalStatus, active_only)),
+            ("occupations", partial(self._values_for, Occupation, active_only)),
+            ("locations", self._locations_payload),
         )
 
     def _values_for(self, model, active_only: bool):
@@ -237,8 +322,8 @@ class PeopleTablesDataAPIView(APIView):
                     "state_name": location.state.name if location.state_id else None,
                     "city_id": location.city_id,
                     "city_name": location.city.name if location.city_id else None,
-                    "latitude": location.latitude,
-                    "longitude": location.longitude,
+                    "latitude": coordinate_string(location.latitude),
+                    "longitude": coordinate_string(location.longitude),
                     "google_maps_url": location.google_maps_url,
                     "waze_url": location.waze_url,
                     "notes": location.notes,
@@ -317,20 +402,60 @@ class PeopleTablesDataAPIView(APIView):
         return flag.lower() in {"true", "1", "yes"}
 
 
-class FamilyFullTreeAPIView(APIView):
+class FamilyFullTreeAPIView(ServerTimingMixin, ReplicaReadsMixin, RenderedPayloadMixin, APIView):
     """
     Return the full family tree graph starting from a given family id.
     It walks across all families that any member belongs to (paternal, maternal,
     married/partner families, etc.) until no new families are found.
+
+    Identical requests arriving together share one build and its rendered
+    bytes (see `singleflight.coalesce`); only that build takes a "tree"
+    concurrency slot. Plain JSON trees are cached until a people row changes,
+    and the most requested ones are rebuilt ahead of traffic (see `warmer`).
     """
 
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
     serializer_class = FamilyTreeSerializer
+    throttle_scope = "tree"
 
     def get(self, request, *args, **kwargs):
         include_inactive = self._should_include_inactive()
         starting_pk = kwargs.get("pk")
+        renderer = request.accepted_renderer
+        if renderer.format != "json":
+            # The browsable API renders per request; nothing to share.
+            with concurrency_slot("tree"):
+                return Response(self._build_tree(starting_pk, include_inactive))
+
+        params = (starting_pk, include_inactive)
+        key = payload_key("family-tree", params) if self._serves_plain_json() else None
+
+        def build():
+            with concurrency_slot("tree"):
+                body = self._render(self._build_tree(starting_pk, include_inactive))
+            store_payload(key, body)
+            return body
+
+        body = get_payload(key)
+        if body is None:
+            flight_key = self._flight_key(starting_pk, include_inactive, data_version())
+            body = coalesce(flight_key, build)
+        # Counted once found, so the warmer never retries missing families.
+        record_request("family-tree", params)
+        return self._shared_response(body)
+
+    def _flight_key(self, starting_pk, include_inactive: bool, version: int) -> str:
+        # Builds are only shared between requests reading the same data version from the
+        # same database: a request pinned to the primary after a write, or made after a
+        # write committed, never joins a build that may predate it.
+        media_type = self.request.accepted_media_type.replace(" ", "")
+        return (
+            f"family-full-tree:{starting_pk}:{int(include_inactive)}:{media_type}"
+            f":{version}:{current_read_alias()}"
+        )
+
+    def _build_tree(self, starting_pk, include_inactive: bool) -> dict:
         root_family = self._family_queryset(include_inactive).filter(pk=starting_pk).first()
         if not root_family:
             raise Http404("Family not found.")
@@ -348,49 +473,62 @@ class FamilyFullTreeAPIView(APIView):
                 continue
             visited.add(family.pk)
 
-            families_payload.append(self.serializer_class(family).data)
-
-            for membership in family.memberships.all():
-                person = membership.person
-                for other_membership in person.family_memberships.all():
-                    other_family = other_membership.family
-                    if not include_inactive and not other_family.is_active:
-                        continue
-                    if other_family.pk == family.pk:
+            with timed("serialize"):
+                families_payload.append(self.serializer_class(family).data)
+
+            for other_family_pk in self._linked_family_ids(
+                family, include_inactive, seen_connections, connections
+            ):
+                if other_family_pk not in enqueued:
+                    enqueued.add(other_family_pk)
+                    try:
+                        next_family = self._family_queryset(include_inactive).get(pk=other_family_pk)
+                    except Family.DoesNotExist:
                         continue
+                    queue.append(next_family)
+
+        return self._tree_payload(root_family, include_inactive, families_payload, connections)
+
+    def _linked_family_ids(self, family, include_inactive, seen_connections, connections):
+        """
+        Yield the ids of the other families the members of `family` belong to,
+        recording each new person/family connection along the way.
+        Only prefetched data is touched, so this is safe to drive from async code.
+        """
+        for membership in family.memberships.all():
+            person = membership.person
+            for other_membership in person.family_memberships.all():
+                other_family = other_membership.family
+                if not include_inactive and not other_family.is_active:
+                    continue
+                if other_family.pk == family.pk:
+                    continue
+
+                connection_key = (person.pk, family.pk, other_family.pk)
+                if connection_key not in seen_connections:
+                    seen_connections.add(connection_key)
+                    connections.append(
+                        {
+                            "person_id": person.pk,
+                            "person_full_name": str(person),
+                            "from_family_id": family.pk,
+                            "to_family_id": other_family.pk,
+                            "role_in_to_family": other_membership.role.code,
+                            "role_in_to_family_name": other_membership.role.name,
+                            "is_primary_in_to_family": other_membership.is_primary,
+                        }
+                    )
 
-                    connection_key = (person.pk, family.pk, other_family.pk)
-                    if connection_key not in seen_connections:
-                        seen_connections.add(connection_key)
-                        connections.append(
-                            {
-                                "person_id": person.pk,
-                                "person_full_name": str(person),
-                                "from_family_id": family.pk,
-                                "to_family_id": other_family.pk,
-                                "role_in_to_family": other_membership.role.code,
-                                "role_in_to_family_name": other_membership.role.name,
-                                "is_primary_in_to_family": other_membership.is_primary,
-                            }
-                        )
-
-                    if other_family.pk not in enqueued:
-                        enqueued.add(other_family.pk)
-                        try:
-                            next_family = self._family_queryset(include_inactive).get(pk=other_family.pk)
-                        except Family.DoesNotExist:
-                            continue
-                        queue.append(next_family)
+                yield other_family.pk
 
-        return Response(
-            {
-                "root_family_id": root_family.pk,
-                "family_count": len(families_payload),
-                "include_inactive": include_inactive,
-                "families": families_payload,
-                "connections": connections,
-            }
-        )
+    def _tree_payload(self, root_family, include_inactive, families_payload, connections):
+        return {
+            "root_family_id": root_family.pk,
+            "family_count": len(families_payload),
+            "include_inactive": include_inactive,
+            "families": families_payload,
+            "connections": connections,
+        }
 
     def _family_queryset(self, include_inactive: bool):
         queryset = Family.objects.all()
@@ -450,27 +588,7 @@ class FamilyFullTreeAPIView(APIView):
         relationship_qs = self._relationship_queryset()
         person_family_memberships_qs = self._person_family_memberships_queryset(include_inactive)
         return (
-            FamilyMember.objects.select_related(
-                "role",
-                "person__first_name",
-                "person__second_name",
-                "person__last_name",
-                "person__second_last_name",
-                "person__nickname",
-                "person__gender",
-                "person__identity_type",
-                "person__education",
-                "person__occupation",
-                "person__marital_status",
-                "person__cause_of_death",
-                "person__birth_country",
-                "person__birth_state",
-                "person__birth_city",
-                "person__current_address",
-                "person__current_address__country",
-                "person__current_address__state",
-                "person__current_address__city",
-            )
+            FamilyMember.objects.select_related(*MEMBERSHIP_RELATED_FIELDS)
             .prefetch_related(
                 Prefetch(
                     "person__relationships_as_person",
@@ -496,3 +614,407 @@ class FamilyFullTreeAPIView(APIView):
     def _should_include_inactive(self) -> bool:
         flag = self.request.query_params.get("include_inactive", "")
         return flag.lower() in {"true", "1", "yes"}
+
+
+class LocationNearbyAPIView(ServerTimingMixin, ReplicaReadsMixin, APIView):
+    """
+    Return the locations within `radius` km of `lat`/`lng`, nearest first,
+    with the active people living at each one and the institutions there.
+    Candidates are read through prefix lookups on the indexed geohash of the
+    cells covering the circle; their exact distances are computed in Python.
+    """
+
+    authentication_classes = (CachedJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    default_radius_km = 10.0
+    max_radius_km = 500.0
+    default_limit = 50
+    max_limit = 200
+
+    def get(self, request, *args, **kwargs):
+        latitude = self._number_param("lat", -90, 90)
+        longitude = self._number_param("lng", -180, 180)
+        radius = self._number_param("radius", 0.01, self.max_radius_km, default=self.default_radius_km)
+        limit = int(self._number_param("limit", 1, self.max_limit, default=self.default_limit))
+
+        cells = Q()
+        for cell in covering_cells(latitude, longitude, radius):
+            cells |= Q(geohash__startswith=cell)
+        candidates = list(Location.objects.filter(cells).values_list("id", "latitude", "longitude"))
+        with timed("distance"):
+            distances = haversine_km(
+                latitude, longitude, ((float(lat), float(lng)) for _, lat, lng in candidates)
+            )
+            nearest = sorted(
+                (distance, location_id)
+                for (location_id, _, _), distance in zip(candidates, distances)
+                if distance <= radius
+            )[:limit]
+
+        ids = [location_id for _, location_id in nearest]
+        locations = Location.objects.select_related("country", "state", "city").in_bulk(ids)
+        residents: dict[int, list[int]] = {}
+        for location_id, person_id in (
+            Person.objects.filter(current_address__in=ids, is_active=True)
+            .order_by("id")
+            .values_list("current_address", "id")
+        ):
+            residents.setdefault(location_id, []).append(person_id)
+        institutions: dict[int, list[dict]] = {}
+        for location_id, institution_id, name in (
+            Institution.objects.filter(location__in=ids, is_active=True)
+            .order_by("name")
+            .values_list("location", "id", "name")
+        ):
+            institutions.setdefault(location_id, []).append({"id": institution_id, "name": name})
+
+        results = []
+        for distance, location_id in nearest:
+            location = locations[location_id]
+            results.append(
+                {
+                    "id": location.id,
+                    "name": location.name,
+                    "address_line1": location.address_line1,
+                    "city": location.city.name if location.city_id else None,
+                    "state": location.state.name if location.state_id else None,
+                    "country": location.country.name if location.country_id else None,
+                    "latitude": float(location.latitude),
+                    "longitude": float(location.longitude),
+                    "distance_km": round(distance, 3),
+                    "person_ids": residents.get(location_id, []),
+                    "institutions": institutions.get(location_id, []),
+                }
+            )
+        return Response(
+            {
+                "lat": latitude,
+                "lng": longitude,
+                "radius_km": radius,
+                "count": len(results),
+                "results": results,
+            }
+        )
+
+    def _number_param(self, name: str, low: float, high: float, default=None) -> float:
+        raw = self.request.query_params.get(name)
+        if raw in (None, ""):
+            if default is None:
+                raise ValidationError({name: "This parameter is required."})
+            return default
+        try:
+            value = float(raw)
+        except ValueError:
+            raise ValidationError({name: "A number is required."}) from None
+        if not low <= value <= high:
+            raise ValidationError({name: f"Must be between {low} and {high}."})
+        return value
+
+
+class PersonSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class PersonSearchAPIView(ServerTimingMixin, ReplicaReadsMixin, generics.GenericAPIView):
+    """
+    Search active people by the start of any word of their names, nickname,
+    email, phones or identity number, accents and case ignored. Every word of
+    `q` must match; results are ranked by match weight (see `search`) and
+    paginated.
+    """
+
+    authentication_classes = (CachedJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    pagination_class = PersonSearchPagination
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": "This parameter is required."})
+        page = self.paginate_queryset(search_people(query))
+        people = Person.objects.select_related("first_name", "last_name", "gender").in_bulk(
+            [row["person"] for row in page]
+        )
+        with timed("serialize"):
+            results = [
+                {**_person_reference(people[row["person"]]), "score": row["score"]} for row in page
+            ]
+        return self.get_paginated_response(results)
+
+
+class PersonLookupAPIView(ServerTimingMixin, ReplicaReadsMixin, APIView):
+    """
+    Resolve identifiers to the ids of the people having them, by exact match
+    on the normalized columns: `email`, `phone` (cell or house phone) or
+    `identity` (optionally with `identity_type`). GET resolves the one given
+    in the query string; POST resolves a batch, `{"identifiers": [{"phone":
+    ...}, {"email": ...}, ...]}`, in a single query. Inactive people are left
+    out unless `include_inactive` is set.
+    """
+
+    authentication_classes = (CachedJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    max_identifiers = 100
+    normalizers = {
+        "email": normalize_email,
+        "phone": normalize_phone,
+        "identity": normalize_identity,
+    }
+
+    def get(self, request, *args, **kwargs):
+        identifier = self._parse_identifier(request.query_params.dict())
+        return Response(self._resolve([identifier])[0])
+
+    def post(self, request, *args, **kwargs):
+        items = request.data.get("identifiers") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"identifiers": "A non-empty list is required."})
+        if len(items) > self.max_identifiers:
+            raise ValidationError({"identifiers": f"At most {self.max_identifiers} identifiers per request."})
+        identifiers = []
+        for index, item in enumerate(items):
+            try:
+                identifiers.append(self._parse_identifier(item))
+            except ValidationError as error:
+                raise ValidationError({"identifiers": {index: error.detail}}) from None
+        return Response({"results": self._resolve(identifiers)})
+
+    def _parse_identifier(self, item) -> dict:
+        kinds = [kind for kind in self.normalizers if isinstance(item, dict) and item.get(kind)]
+        if len(kinds) != 1:
+            raise ValidationError("Give exactly one of: " + ", ".join(self.normalizers) + ".")
+        kind = kinds[0]
+        value = str(item[kind])
+        identifier = {"kind": kind, "value": value, "normalized": self.normalizers[kind](value)}
+        if kind == "identity" and item.get("identity_type") not in (None, ""):
+            try:
+                identifier["identity_type"] = int(item["identity_type"])
+            except (TypeError, ValueError):
+                raise ValidationError({"identity_type": "An integer id is required."}) from None
+        return identifier
+
+    def _resolve(self, identifiers: list[dict]) -> list[dict]:
+        wanted = {kind: set() for kind in self.normalizers}
+        for identifier in identifiers:
+            if identifier["normalized"]:
+                wanted[identifier["kind"]].add(identifier["normalized"])
+        condition = Q()
+        if wanted["email"]:
+            condition |= Q(email_normalized__in=wanted["email"])
+        if wanted["phone"]:
+            condition |= Q(cellphone_normalized__in=wanted["phone"]) | Q(
+                housephone_normalized__in=wanted["phone"]
+            )
+        if wanted["identity"]:
+            condition |= Q(identity_normalized__in=wanted["identity"])
+
+        matches = {kind: {} for kind in self.normalizers}
+        if condition:
+            people = Person.objects.filter(condition)
+            if not self._should_include_inactive():
+                people = people.filter(is_active=True)
+            for pk, email, cellphone, housephone, identity, identity_type_id in people.values_list(
+                "pk",
+                "email_normalized",
+                "cellphone_normalized",
+                "housephone_normalized",
+                "identity_normalized",
+                "identity_type",
+            ):
+                # A row fetched for one identifier has empty columns for the others.
+                if email:
+                    matches["email"].setdefault(email, []).append((pk, None))
+                for phone in {cellphone, housephone} - {None, ""}:
+                    matches["phone"].setdefault(phone, []).append((pk, None))
+                if identity:
+                    matches["identity"].setdefault(identity, []).append((pk, identity_type_id))
+
+        results = []
+        for identifier in identifiers:
+            identity_type = identifier.get("identity_type")
+            normalized = identifier["normalized"]
+            candidates = matches[identifier["kind"]].get(normalized, ()) if normalized else ()
+            person_ids = sorted(
+                pk for pk, type_id in candidates if identity_type is None or type_id == identity_type
+            )
+            results.append({**identifier, "person_ids": person_ids})
+        return results
+
+    def _should_include_inactive(self) -> bool:
+        flag = self.request.query_params.get("include_inactive", "")
+        return flag.lower() in {"true", "1", "yes"}
+
+
+class UpcomingEventsAPIView(ServerTimingMixin, ReplicaReadsMixin, APIView):
+    """
+    Return the birthdays of living active people and the anniversaries of
+    current marriages falling within `days` days from `start` (today by
+    default), in date order. `type` limits them to `birthday` or
+    `anniversary`. Both come from range queries on the indexed month-day
+    columns; windows crossing New Year's Eve read the two ends of the year.
+    """
+
+    authentication_classes = (CachedJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    default_days = 7
+    max_days = 92
+    event_types = ("birthday", "anniversary")
+    person_related = ("first_name", "last_name", "gender")
+
+    def get(self, request, *args, **kwargs):
+        start = self._start_param()
+        days = self._days_param()
+        end = start + timedelta(days=days - 1)
+        event_type = request.query_params.get("type")
+        if event_type not in (None, "", *self.event_types):
+            raise ValidationError({"type": "Must be one of: " + ", ".join(self.event_types) + "."})
+
+        events = []
+        if event_type in (None, "", "birthday"):
+            events += self._birthdays(start, end)
+        if event_type in (None, "", "anniversary"):
+            events += self._anniversaries(start, end)
+        events.sort(key=lambda event: (event["date"], event["type"]))
+        return Response({"start": start, "end": end, "count": len(events), "results": events})
+
+    def _birthdays(self, start, end) -> list[dict]:
+        people = Person.objects.filter(
+            month_day_filter("birth_month_day", start, end), is_deceased=False, is_active=True
+        ).select_related(*self.person_related)
+        events = []
+        for person in people:
+            day = occurrence(person.birth_month_day, start, end)
+            years = day.year - person.date_of_birth.year
+            if years > 0:
+                events.append(
+                    {"type": "birthday", "date": day, "years": years, "person": _person_reference(person)}
+                )
+        return events
+
+    def _anniversaries(self, start, end) -> list[dict]:
+        marriages = Marriage.objects.filter(
+            month_day_filter("married_month_day", start, end),
+            ended_on__isnull=True,
+            husband__is_deceased=False,
+            wife__is_deceased=False,
+        ).select_related(
+            *(f"husband__{field}" for field in self.person_related),
+            *(f"wife__{field}" for field in self.person_related),
+        )
+        events = []
+        for marriage in marriages:
+            day = occurrence(marriage.married_month_day, start, end)
+            years = day.year - marriage.married_on.year
+            if years > 0:
+                events.append(
+                    {
+                        "type": "anniversary",
+                        "date": day,
+                        "years": years,
+                        "marriage_id": marriage.id,
+                        "husband": _person_reference(marriage.husband),
+                        "wife": _person_reference(marriage.wife),
+                    }
+                )
+        return events
+
+    def _start_param(self) -> date:
+        raw = self.request.query_params.get("start")
+        if raw in (None, ""):
+            return timezone.localdate()
+        try:
+            return date.fromisoformat(raw)
+        except ValueError:
+            raise ValidationError({"start": "A date in YYYY-MM-DD format is required."}) from None
+
+    def _days_param(self) -> int:
+        raw = self.request.query_params.get("days")
+        if raw in (None, ""):
+            return self.default_days
+        try:
+            days = int(raw)
+        except ValueError:
+            raise ValidationError({"days": "An integer is required."}) from None
+        if not 1 <= days <= self.max_days:
+            raise ValidationError({"days": f"Must be between 1 and {self.max_days}."})
+        return days
+
+
+class DemographicStatsAPIView(ServerTimingMixin, ReplicaReadsMixin, APIView):
+    """
+    Return the precomputed counts of active people by age bucket and by each
+    of `FIELD_DIMENSIONS` (see `demographics`), over everyone or over one
+    family connectivity group: `group`, or the group of `family`. Catalog
+    values come with their code and label; an empty value counts the people
+    without one.
+    """
+
+    authentication_classes = (CachedJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        family_id = self._id_param("family")
+        group = self._group(family_id)
+        counts = {dimension: {} for dimension in DIMENSIONS}
+        as_of = None
+        for dimension, value, count, row_as_of in DemographicCount.objects.filter(
+            scope=group or OVERALL, count__gt=0
+        ).values_list("dimension", "value", "count", "as_of"):
+            counts.setdefault(dimension, {})[value] = count
+            as_of = max(as_of, row_as_of) if as_of else row_as_of
+
+        dimensions = {
+            "age_bucket": [
+                {"value": label, "count": counts["age_bucket"][label]}
+                for _, label in AGE_BUCKETS
+                if label in counts["age_bucket"]
+            ]
+        }
+        for field in FIELD_DIMENSIONS:
+            dimensions[field] = self._field_counts(field, counts[field])
+        return Response(
+            {
+                "as_of": as_of,
+                "family": family_id,
+                "group": group,
+                "total": counts["total"].get("", 0),
+                "dimensions": dimensions,
+            }
+        )
+
+    def _field_counts(self, field: str, counts: dict[str, int]) -> list[dict]:
+        related_model = Person._meta.get_field(field).related_model
+        if related_model is None:
+            values = {value: value == "true" for value in counts}
+        else:
+            catalog = related_model.objects.in_bulk([int(value) for value in counts if value])
+            values = {value: _code_label(catalog.get(int(value))) if value else None for value in counts}
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{"value": values[value], "count": count} for value, count in ranked]
+
+    def _id_param(self, name: str) -> int | None:
+        raw = self.request.query_params.get(name)
+        if raw in (None, ""):
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValidationError({name: "An integer id is required."}) from None
+
+    def _group(self, family_id: int | None) -> int | None:
+        group = self._id_param("group")
+        if family_id is None:
+            if group is not None and not FamilyGroup.objects.filter(group=group).exists():
+                raise Http404("Family group not found.")
+            return group
+        if group is not None:
+            raise ValidationError({"group": "Pass either `group` or `family`, not both."})
+        if not Family.objects.filter(pk=family_id, is_active=True).exists():
+            raise Http404("Family not found.")
+        found = FamilyGroup.objects.filter(family=family_id).values_list("group", flat=True).first()
+        if found is None:
+            # Not grouped until the counts are recomputed, or the change committed.
+            raise Http404("Family has no counts yet.")
+        return found
@@ -1,11 +1,32 @@
+from django.conf import settings
 from django.urls import path
 
-from .api import FamilyFullTreeAPIView, FamilyTreeAPIView, PeopleTablesDataAPIView
+if settings.PEOPLE_API_ASYNC_VIEWS:
+    from .async_api import (
+        AsyncFamilyFullTreeAPIView as FamilyFullTreeAPIView,
+        AsyncFamilyTreeAPIView as FamilyTreeAPIView,
+        AsyncPeopleTablesDataAPIView as PeopleTablesDataAPIView,
+    )
+else:
+    from .api import FamilyFullTreeAPIView, FamilyTreeAPIView, PeopleTablesDataAPIView
+
+from .api import (
+    DemographicStatsAPIView,
+    LocationNearbyAPIView,
+    PersonLookupAPIView,
+    PersonSearchAPIView,
+    UpcomingEventsAPIView,
+)
 
 app_name = "people_api"
 
 urlpatterns = [
     path("people/full/attributes/", PeopleTablesDataAPIView.as_view(), name="people-full-attributes"),
+    path("people/search/", PersonSearchAPIView.as_view(), name="person-search"),
+    path("people/lookup/", PersonLookupAPIView.as_view(), name="person-lookup"),
+    path("people/events/upcoming/", UpcomingEventsAPIView.as_view(), name="upcoming-events"),
+    path("people/stats/", DemographicStatsAPIView.as_view(), name="people-stats"),
     path("families/", FamilyTreeAPIView.as_view(), name="family-tree"),
     path("families/<int:pk>/tree/", FamilyFullTreeAPIView.as_view(), name="family-full-tree"),
+    path("locations/nearby/", LocationNearbyAPIView.as_view(), name="location-nearby"),
 ]
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class PeopleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'people'
+
+    def ready(self):
+        # Connect the slow-query log before the first database connection is opened,
+        # so management commands are covered as well as requests.
+        from sevenawesome_app_services import slow_queries  # noqa: F401
+        from sevenawesome_app_services.authentication import connect_user_cache_signals
+
+        from .demographics import connect_demographics_signals
+        from .payload_cache import connect_invalidation_signals
+        from .search import connect_search_index_signals
+
+        connect_user_cache_signals()
+        connect_invalidation_signals()
+        connect_search_index_signals()
+        connect_demographics_signals()
@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from rest_framework import exceptions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from sevenawesome_app_services.authentication import CachedJWTAuthentication
+from sevenawesome_app_services.instrumentation import timed
+from sevenawesome_app_services.singleflight import acoalesce
+from sevenawesome_app_services.throttling import concurrency_slot
+
+from .api import FamilyFullTreeAPIView, FamilyTreeAPIView, PeopleTablesDataAPIView
+from .concurrency import get_export_executor, run_with_own_connection
+from .models import Family
+from .payload_cache import adata_version, aget_payload, apayload_key, astore_payload, record_request
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose dispatch runs natively on the event loop.
+    Handlers are `async def` methods; authentication goes through `aauthenticate`
+    when the authenticator offers it. The sync `initial` and `finalize_response`
+    still run, so mixin hooks (replica reads, concurrency limits) apply unchanged.
+    """
+
+    authentication_classes = (CachedJWTAuthentication,)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        # Resolve the user without blocking the loop; the sync `initial` then finds it
+        # already set, and still runs negotiation, permissions, throttles and any
+        # `initial` hooks from mixins.
+        with timed("auth"):
+            await self.aperform_authentication(request)
+        self.initial(request, *args, **kwargs)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+
+class AsyncFamilyTreeAPIView(AsyncAPIView, FamilyTreeAPIView):
+    """Async variant of `FamilyTreeAPIView`."""
+
+    async def get(self, request, *args, **kwargs):
+        families = [family async for family in self.filter_queryset(self.get_queryset())]
+        with timed("serialize"):
+            serializer = self.get_serializer(families, many=True)
+            data = serializer.data
+        return Response(data)
+
+
+class AsyncPeopleTablesDataAPIView(AsyncAPIView, PeopleTablesDataAPIView):
+    """
+    Async variant of `PeopleTablesDataAPIView`.
+    Each table export runs concurrently on the bounded export pool, with its own
+    database connection.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        include_inactive = self._should_include_inactive()
+        params = (include_inactive,)
+        record_request("tables", params)
+        key = await apayload_key("tables", params) if self._serves_plain_json() else None
+        body = await aget_payload(key)
+        if body is None:
+            payload = await self._aexport_tables(not include_inactive)
+            if key is None:
+                return Response(payload)
+            body = self._render(payload)
+            await astore_payload(key, body)
+        return self._shared_response(body)
+
+    async def _aexport_tables(self, active_only: bool) -> dict:
+        exports = self._table_exports(active_only)
+        loop = asyncio.get_running_loop()
+        executor = get_export_executor()
+        with timed("serialize"):
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor,
+                        partial(contextvars.copy_context().run, run_with_own_connection, export),
+                    )
+                    for _, export in exports
+                )
+            )
+        return {key: result for (key, _), result in zip(exports, results)}
+
+
+class AsyncFamilyFullTreeAPIView(AsyncAPIView, FamilyFullTreeAPIView):
+    """Async variant of `FamilyFullTreeAPIView`."""
+
+    async def get(self, request, *args, **kwargs):
+        include_inactive = self._should_include_inactive()
+        starting_pk = kwargs.get("pk")
+        if request.accepted_renderer.format != "json":
+            with concurrency_slot("tree"):
+                return Response(await self._abuild_tree(starting_pk, include_inactive))
+
+        params = (starting_pk, include_inactive)
+        key = await apayload_key("family-tree", params) if self._serves_plain_json() else None
+
+        async def build():
+            with concurrency_slot("tree"):
+                body = self._render(await self._abuild_tree(starting_pk, include_inactive))
+            await astore_payload(key, body)
+            return body
+
+        body = await aget_payload(key)
+        if body is None:
+            flight_key = self._flight_key(starting_pk, include_inactive, await adata_version())
+            body = await acoalesce(flight_key, build)
+        record_request("family-tree", params)
+        return self._shared_response(body)
+
+    async def _abuild_tree(self, starting_pk, include_inactive: bool) -> dict:
+        root_family = await self._family_queryset(include_inactive).filter(pk=starting_pk).afirst()
+        if not root_family:
+            raise Http404("Family not found.")
+
+        visited: set[int] = set()
+        enqueued: set[int] = {root_family.pk}
+        queue: list[Family] = [root_family]
+        families_payload: list[dict] = []
+        connections: list[dict] = []
+        seen_connections: set[tuple[int, int, int]] = set()
+
+        while queue:
+            family = queue.pop(0)
+            if family.pk in visited:
+                continue
+            visited.add(family.pk)
+
+            with timed("serialize"):
+                families_payload.append(self.serializer_class(family).data)
+
+            for other_family_pk in self._linked_family_ids(
+                family, include_inactive, seen_connections, connections
+            ):
+                if other_family_pk not in enqueued:
+                    enqueued.add(other_family_pk)
+                    next_family = await self._family_queryset(include_inactive).filter(
+                        pk=other_family_pk
+                    ).afirst()
+                    if next_family is not None:
+                        queue.append(next_family)
+
+        return self._tree_payload(root_family, include_inactive, families_payload, connections)
@@ -0,0 +1,52 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+_export_executor = None
+_export_executor_lock = threading.Lock()
+
+
+def run_with_own_connection(func, *args, **kwargs):
+    """
+    Run `func` in the current worker thread and close the database connections
+    it opened, so pooled threads never keep idle connections around.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connections.close_all()
+
+
+def get_export_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide pool used for table exports.
+    Its size caps how many extra database connections the exports can hold at once.
+    """
+    global _export_executor
+    with _export_executor_lock:
+        if _export_executor is None:
+            _export_executor = ThreadPoolExecutor(
+                max_workers=settings.PEOPLE_TABLES_EXPORT["MAX_WORKERS"],
+                thread_name_prefix="people-export",
+            )
+    return _export_executor
+
+
+def run_in_parallel(calls) -> list:
+    """
+    Run each callable on the export pool with its own database connection and
+    return the results in the same order. Exceptions from a worker are re-raised.
+
+    Workers do not share the caller's transaction, so they only see committed rows.
+    """
+    executor = get_export_executor()
+    # Each worker gets a copy of the caller's context so request-scoped state
+    # (e.g. the replica chosen for this request) follows the export.
+    futures = [
+        executor.submit(contextvars.copy_context().run, run_with_own_connection, func)
+        for func in calls
+    ]
+    return [future.result() for future in futures]
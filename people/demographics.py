@@ -0,0 +1,329 @@
+from datetime import date
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, F, Value, When
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import DemographicCount, Family, FamilyGroup, FamilyMember, Person
+
+# DemographicCount.scope of the counts over everyone.
+OVERALL = 0
+# Person fields counted as stored: the id of a catalog entry, or a boolean.
+FIELD_DIMENSIONS = ("gender", "marital_status", "education", "occupation", "birth_country", "is_deceased")
+# Youngest age (completed years) and label of each age bucket. Only living people are bucketed.
+AGE_BUCKETS = ((0, "0-12"), (13, "13-17"), (18, "18-29"), (30, "30-44"), (45, "45-64"), (65, "65+"))
+DIMENSIONS = ("total", "age_bucket", *FIELD_DIMENSIONS)
+# Person fields the counts depend on; saving none of them changes no count.
+TRACKED_FIELDS = ("is_active", "date_of_birth", *FIELD_DIMENSIONS)
+# The scope of a membership's counts: the connectivity group of its family.
+GROUP_FIELD = "family__connectivity_group__group"
+
+
+def _years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # February 29 in a common year.
+        return day.replace(year=day.year - years, day=28)
+
+
+def _cutoffs(as_of: date) -> list[tuple[date, str]]:
+    """(latest date of birth, label) of each age bucket on `as_of`, oldest bucket first."""
+    return [(_years_before(as_of, youngest), label) for youngest, label in reversed(AGE_BUCKETS)]
+
+
+def age_bucket(date_of_birth: date, as_of: date) -> str | None:
+    for cutoff, label in _cutoffs(as_of):
+        if date_of_birth <= cutoff:
+            return label
+    return None
+
+
+def _value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else str(value)
+
+
+def _state(person: Person) -> dict:
+    return {field: getattr(person, Person._meta.get_field(field).attname) for field in TRACKED_FIELDS}
+
+
+def _stored_state(person_id) -> dict | None:
+    return Person.objects.filter(pk=person_id).values(*TRACKED_FIELDS).first()
+
+
+def family_groups() -> dict[int, int]:
+    """
+    Map every active family to its connectivity group (see `FamilyGroup`),
+    joining the families of each person with a union-find.
+    """
+    parent = {pk: pk for pk in Family.objects.filter(is_active=True).values_list("pk", flat=True)}
+
+    def root(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    first_family = {}
+    memberships = FamilyMember.objects.filter(family__is_active=True).values_list("person", "family")
+    for person_id, family_id in memberships.iterator(chunk_size=5000):
+        first, other = root(first_family.setdefault(person_id, family_id)), root(family_id)
+        # The smaller root wins, so every root is the smallest family id of its group.
+        if first != other:
+            parent[max(first, other)] = min(first, other)
+    return {pk: root(pk) for pk in parent}
+
+
+def _families_by_group(groups: dict[int, int]) -> dict[int, set[int]]:
+    families = {}
+    for family_id, group in groups.items():
+        families.setdefault(group, set()).add(family_id)
+    return families
+
+
+def _group_memberships():
+    return FamilyMember.objects.filter(
+        person__is_active=True, family__is_active=True, family__connectivity_group__isnull=False
+    )
+
+
+def _person_scopes(person_id) -> list[int]:
+    """The scopes counting a person: everyone, and each group they are in, once."""
+    groups = FamilyGroup.objects.filter(family__memberships__person=person_id, family__is_active=True)
+    return [OVERALL, *set(groups.values_list("group", flat=True))]
+
+
+def contributions(state: dict | None, as_of: date) -> set[tuple[str, str]]:
+    """The (dimension, value) counts a person in `state` adds one to; none when inactive."""
+    if not state or not state["is_active"]:
+        return set()
+    counted = {("total", "")}
+    counted.update((field, _value(state[field])) for field in FIELD_DIMENSIONS)
+    if not state["is_deceased"] and state["date_of_birth"]:
+        bucket = age_bucket(state["date_of_birth"], as_of)
+        if bucket:
+            counted.add(("age_bucket", bucket))
+    return counted
+
+
+def current_as_of() -> date | None:
+    """The date the counts were last recomputed for, or None when they never were."""
+    return (
+        DemographicCount.objects.filter(scope=OVERALL, dimension="total")
+        .values_list("as_of", flat=True)
+        .first()
+    )
+
+
+def apply_change(scopes, before: set, after: set, as_of: date):
+    """Move one person's counts in `scopes` from the `before` contributions to `after`."""
+    scopes = set(scopes)
+    deltas = [(key, -1) for key in before - after] + [(key, 1) for key in after - before]
+    for (dimension, value), delta in deltas:
+        rows = DemographicCount.objects.filter(scope__in=scopes, dimension=dimension, value=value)
+        updated = rows.update(count=F("count") + delta)
+        if updated < len(scopes) and delta > 0:
+            missing = scopes - set(rows.values_list("scope", flat=True))
+            DemographicCount.objects.bulk_create(
+                [
+                    DemographicCount(scope=scope, dimension=dimension, value=value, count=0, as_of=as_of)
+                    for scope in missing
+                ],
+                ignore_conflicts=True,
+            )
+            rows.filter(scope__in=missing).update(count=F("count") + delta)
+
+
+def _grouped_counts(queryset, scope_field: str | None, prefix: str, as_of: date):
+    """Yield (scope, dimension, value, count) for every dimension, one GROUP BY query each."""
+    group_by = (scope_field,) if scope_field else ()
+    counted = Count(f"{prefix}pk", distinct=bool(prefix))
+
+    if scope_field:
+        for row in queryset.values(scope_field).annotate(count=counted).order_by():
+            yield row[scope_field], "total", "", row["count"]
+    else:
+        yield OVERALL, "total", "", queryset.count()
+
+    # Age buckets for every row at once, as a CASE over the bucket cutoffs of `as_of`.
+    bucket = Case(
+        *(
+            When(**{f"{prefix}date_of_birth__lte": cutoff}, then=Value(label))
+            for cutoff, label in _cutoffs(as_of)
+        ),
+        output_field=CharField(),
+    )
+    living = queryset.filter(**{f"{prefix}is_deceased": False, f"{prefix}date_of_birth__lte": as_of})
+    for row in living.values(*group_by, value=bucket).annotate(count=counted).order_by():
+        yield row.get(scope_field, OVERALL), "age_bucket", row["value"], row["count"]
+
+    for field in FIELD_DIMENSIONS:
+        rows = queryset.values(*group_by, value=F(f"{prefix}{field}")).annotate(count=counted).order_by()
+        for row in rows:
+            yield row.get(scope_field, OVERALL), field, _value(row["value"]), row["count"]
+
+
+def _count_rows(sources, as_of: date, counts: dict | None = None) -> list[DemographicCount]:
+    counts = counts or {}
+    for queryset, scope_field, prefix in sources:
+        for scope, dimension, value, count in _grouped_counts(queryset, scope_field, prefix, as_of):
+            counts[(scope, dimension, value)] = count
+    return [
+        DemographicCount(scope=scope, dimension=dimension, value=value, count=count, as_of=as_of)
+        for (scope, dimension, value), count in counts.items()
+    ]
+
+
+def recompute(as_of: date | None = None) -> int:
+    """
+    Rebuild the family groups, then every count from `Person` and
+    `FamilyMember` with set-based GROUP BY queries, ages as of `as_of`
+    (today by default). Returns the number of counts written.
+    """
+    as_of = as_of or timezone.localdate()
+    groups = family_groups()
+    with transaction.atomic():
+        FamilyGroup.objects.all().delete()
+        FamilyGroup.objects.bulk_create(
+            [FamilyGroup(family_id=family_id, group=group) for family_id, group in groups.items()],
+            batch_size=1000,
+        )
+        sources = (
+            (Person.objects.filter(is_active=True), None, ""),
+            (_group_memberships(), GROUP_FIELD, "person__"),
+        )
+        rows = _count_rows(sources, as_of, {(OVERALL, "total", ""): 0})
+        DemographicCount.objects.all().delete()
+        DemographicCount.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def refresh_groups(family_ids=()):
+    """
+    Bring the family groups up to date after memberships or families changed,
+    and recount the groups that gained or lost families, plus the groups of
+    `family_ids` (whose members changed). Nothing happens before the first
+    `recompute`.
+    """
+    as_of = current_as_of()
+    if as_of is None:
+        return
+    groups = family_groups()
+    stored = dict(FamilyGroup.objects.values_list("family", "group"))
+    if groups == stored and not family_ids:
+        return
+    old, new = _families_by_group(stored), _families_by_group(groups)
+    recount = {group for group, families in new.items() if old.get(group) != families}
+    recount.update(groups[family_id] for family_id in family_ids if family_id in groups)
+    dropped = {group for group, families in old.items() if new.get(group) != families}
+    moved = {
+        family_id
+        for family_id in stored.keys() | groups.keys()
+        if stored.get(family_id) != groups.get(family_id)
+    }
+    with transaction.atomic():
+        FamilyGroup.objects.filter(pk__in=moved).delete()
+        FamilyGroup.objects.bulk_create(
+            [
+                FamilyGroup(family_id=family_id, group=groups[family_id])
+                for family_id in moved
+                if family_id in groups
+            ],
+            batch_size=1000,
+        )
+        DemographicCount.objects.filter(scope__in=dropped | recount).delete()
+        memberships = _group_memberships().filter(**{f"{GROUP_FIELD}__in": recount})
+        DemographicCount.objects.bulk_create(
+            _count_rows([(memberships, GROUP_FIELD, "person__")], as_of), batch_size=1000
+        )
+
+
+def _refresh_on_commit(*family_ids):
+    # After the commit, so the groups are read with every change of the transaction in place.
+    transaction.on_commit(partial(refresh_groups, {pk for pk in family_ids if pk is not None}))
+
+
+def _note_person_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._demographic_state = None
+    if raw or instance._state.adding:
+        return
+    saved = {field.removesuffix("_id") for field in update_fields or ()}
+    if update_fields is not None and not saved & set(TRACKED_FIELDS):
+        # False, unlike None, tells post_save there is nothing to count.
+        instance._demographic_state = False
+        return
+    instance._demographic_state = _stored_state(instance.pk)
+
+
+def _count_person(sender, instance, raw=False, **kwargs):
+    before = getattr(instance, "_demographic_state", None)
+    if raw or before is False:
+        return
+    as_of = current_as_of()
+    if as_of is None:
+        return
+    before, after = contributions(before, as_of), contributions(_state(instance), as_of)
+    if before != after:
+        apply_change(_person_scopes(instance.pk), before, after, as_of)
+
+
+def _uncount_person(sender, instance, **kwargs):
+    # Deleting a person deletes its memberships first, and they recount its groups.
+    as_of = current_as_of()
+    if as_of is not None:
+        apply_change([OVERALL], contributions(_state(instance), as_of), set(), as_of)
+
+
+def _note_membership(sender, instance, raw=False, **kwargs):
+    instance._demographic_membership = None
+    if not raw and not instance._state.adding:
+        instance._demographic_membership = (
+            FamilyMember.objects.filter(pk=instance.pk).values_list("family", "person").first()
+        )
+
+
+def _regroup_membership(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, "_demographic_membership", None)
+    if raw or previous == (instance.family_id, instance.person_id):
+        return
+    _refresh_on_commit(instance.family_id, previous and previous[0])
+
+
+def _membership_deleted(sender, instance, **kwargs):
+    _refresh_on_commit(instance.family_id)
+
+
+def _note_family(sender, instance, raw=False, **kwargs):
+    instance._demographic_active = None
+    if not raw and not instance._state.adding:
+        instance._demographic_active = (
+            Family.objects.filter(pk=instance.pk).values_list("is_active", flat=True).first()
+        )
+
+
+def _regroup_family(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and (created or getattr(instance, "_demographic_active", None) != instance.is_active):
+        _refresh_on_commit(instance.pk)
+
+
+def _family_deleted(sender, instance, **kwargs):
+    _refresh_on_commit()
+
+
+def connect_demographics_signals():
+    """
+    Keep the demographic counts in step with saved and deleted people, and
+    the family groups with saved and deleted memberships and families.
+    """
+    pre_save.connect(_note_person_state, sender=Person, dispatch_uid="people-demographics:person")
+    post_save.connect(_count_person, sender=Person, dispatch_uid="people-demographics:person")
+    post_delete.connect(_uncount_person, sender=Person, dispatch_uid="people-demographics:person")
+    pre_save.connect(_note_membership, sender=FamilyMember, dispatch_uid="people-demographics:member")
+    post_save.connect(_regroup_membership, sender=FamilyMember, dispatch_uid="people-demographics:member")
+    post_delete.connect(_membership_deleted, sender=FamilyMember, dispatch_uid="people-demographics:member")
+    pre_save.connect(_note_family, sender=Family, dispatch_uid="people-demographics:family")
+    post_save.connect(_regroup_family, sender=Family, dispatch_uid="people-demographics:family")
+    post_delete.connect(_family_deleted, sender=Family, dispatch_uid="people-demographics:family")
@@ -0,0 +1,40 @@
+import calendar
+from datetime import date
+
+from django.db.models import Q
+
+LEAP_DAY = 229
+
+
+def month_day(value: date | None) -> int | None:
+    """A date's month and day as one sortable number: March 15 is 315."""
+    return None if value is None else value.month * 100 + value.day
+
+
+def month_day_filter(field: str, start: date, end: date) -> Q:
+    """
+    Match the rows whose `field` month-day falls between `start` and `end`,
+    both included and less than a year apart, as one range (or two when the
+    window wraps into the next year) over the indexed column.
+    """
+    first, last = month_day(start), month_day(end)
+    if start.year == end.year:
+        condition = Q(**{f"{field}__range": (first, last)})
+    else:
+        condition = Q(**{f"{field}__gte": first}) | Q(**{f"{field}__lte": last})
+    # In common years, February 29 is celebrated on the 28th.
+    for year in {start.year, end.year}:
+        if not calendar.isleap(year) and start <= date(year, 2, 28) <= end:
+            condition |= Q(**{field: LEAP_DAY})
+    return condition
+
+
+def occurrence(value: int, start: date, end: date) -> date | None:
+    """The date within `start`..`end` on which the `value` month-day falls, if any."""
+    month, day = divmod(value, 100)
+    for year in range(start.year, end.year + 1):
+        leap_day_moved = value == LEAP_DAY and not calendar.isleap(year)
+        candidate = date(year, month, 28 if leap_day_moved else day)
+        if start <= candidate <= end:
+            return candidate
+    return None
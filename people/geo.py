@@ -0,0 +1,100 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+# Characters stored in Location.geohash; 9 characters is a cell of about 5 by 5 meters.
+GEOHASH_PRECISION = 9
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """The geohash of a point: a prefix names the cell containing it, so nearby points share prefixes."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def coordinate_string(value) -> str | None:
+    """A stored coordinate as the string the existing payloads have always carried."""
+    # normalize() drops the padding zeros of the six stored decimals; "f" avoids exponents.
+    return None if value is None else format(value.normalize(), "f")
+
+
+def _cell_size(precision: int) -> tuple[float, float]:
+    """(height, width) in degrees of the cells of a geohash precision."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _bounding_box(latitude: float, longitude: float, radius_km: float):
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    widest = max(abs(south), abs(north))
+    if widest >= 90.0:
+        return south, north, -180.0, 180.0
+    lng_delta = min(lat_delta / math.cos(math.radians(widest)), 180.0)
+    return south, north, longitude - lng_delta, longitude + lng_delta
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float, max_cells: int = 16) -> set[str]:
+    """
+    Geohash prefixes whose cells together cover the circle, using the finest
+    precision that needs at most `max_cells` of them. Points within the
+    circle have a geohash starting with one of the prefixes; points outside
+    it may too, so callers still check the distance.
+    """
+    south, north, west, east = _bounding_box(latitude, longitude, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = math.floor((north + 90.0) / height) - math.floor((south + 90.0) / height) + 1
+        columns = min(
+            math.floor((east + 180.0) / width) - math.floor((west + 180.0) / width) + 1,
+            round(360.0 / width),
+        )
+        if rows * columns <= max_cells or precision == 1:
+            break
+    cells = set()
+    first_row = math.floor((south + 90.0) / height)
+    first_column = math.floor((west + 180.0) / width)
+    for row in range(rows):
+        cell_latitude = min(-90.0 + (first_row + row + 0.5) * height, 90.0)
+        for column in range(columns):
+            # Wrap around the antimeridian.
+            cell_longitude = (first_column + column + 0.5) * width % 360.0 - 180.0
+            cells.add(geohash_encode(cell_latitude, cell_longitude, precision))
+    return cells
+
+
+def haversine_km(latitude: float, longitude: float, points):
+    """
+    Great-circle distances in km from one point to each (latitude, longitude)
+    in `points`, with the origin's trigonometry computed once for all of them.
+    """
+    lat1 = math.radians(latitude)
+    lng1 = math.radians(longitude)
+    cos_lat1 = math.cos(lat1)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    diameter = 2 * EARTH_RADIUS_KM
+    distances = []
+    for point_latitude, point_longitude in points:
+        lat2 = radians(point_latitude)
+        half_dlat = (lat2 - lat1) / 2
+        half_dlng = (radians(point_longitude) - lng1) / 2
+        a = sin(half_dlat) ** 2 + cos_lat1 * cos(lat2) * sin(half_dlng) ** 2
+        distances.append(diameter * asin(sqrt(min(a, 1.0))))
+    return distances
@@ -0,0 +1,46 @@
+import re
+
+from django.conf import settings
+
+_NON_DIGITS = re.compile(r"\D")
+_NON_ALNUM = re.compile(r"[\W_]")
+
+# Fewer digits than this cannot be a phone number; the value is not indexed.
+MIN_PHONE_DIGITS = 7
+
+
+def normalize_phone(value: str | None) -> str | None:
+    """
+    E.164-style form of a phone number: "+", country code and number, digits
+    only. Numbers typed without "+" or "00" get `PHONE_DEFAULT_COUNTRY_CODE`.
+    With the default "1" (the North American plan, which the Dominican
+    Republic is part of) only 10-digit numbers get it: 11 digits starting
+    with 1 already carry it, and other lengths are kept as typed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    digits = _NON_DIGITS.sub("", value)
+    if len(digits) < MIN_PHONE_DIGITS:
+        return None
+    if value.startswith("+"):
+        return f"+{digits}"
+    if digits.startswith("00"):
+        return f"+{digits[2:]}"
+    country_code = settings.PHONE_DEFAULT_COUNTRY_CODE
+    if country_code == "1" and len(digits) == 11 and digits.startswith("1"):
+        return f"+{digits}"
+    if country_code != "1" or len(digits) == 10:
+        return f"+{country_code}{digits}"
+    return f"+{digits}"
+
+
+def normalize_email(value: str | None) -> str | None:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+def normalize_identity(value: str | None) -> str | None:
+    """The identity number without separators, uppercased: "001-1234567-8" is "00112345678"."""
+    value = _NON_ALNUM.sub("", value or "").upper()
+    return value or None
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from people.models import Person
+
+NORMALIZED_FIELDS = ("email_normalized", "cellphone_normalized", "housephone_normalized", "identity_normalized")
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the normalized email, phone and identity columns of people saved before they "
+        "existed (or after a change of PHONE_DEFAULT_COUNTRY_CODE), in batches of primary keys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="People read per batch.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the people that would change.")
+
+    def handle(self, *args, **options):
+        people = Person.objects.order_by("pk").only(
+            "email", "cellphone", "housephone", "identity", *NORMALIZED_FIELDS
+        )
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(people.filter(pk__gt=last_pk)[: options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            changed = [person for person in batch if person.normalize_identifiers()]
+            if changed and not options["dry_run"]:
+                # bulk_update skips save() and its signals; only the lookup columns change.
+                Person.objects.bulk_update(changed, NORMALIZED_FIELDS)
+            updated += len(changed)
+        verb = "would be updated" if options["dry_run"] else "updated"
+        self.stdout.write(self.style.SUCCESS(f"{updated} people {verb}."))
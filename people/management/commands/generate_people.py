@@ -0,0 +1,728 @@
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from people.models import (
+    DATING_RELATIONSHIP_CODE,
+    City,
+    Country,
+    Family,
+    FamilyMember,
+    FamilyRole,
+    Gender,
+    LastName,
+    Location,
+    MaritalStatus,
+    Marriage,
+    MarriageEndReason,
+    Nickname,
+    Person,
+    PersonAttribute,
+    PersonAttributeAssignment,
+    PersonAttributeType,
+    PersonIdentityType,
+    PersonName,
+    PersonRelationship,
+    RelationshipType,
+    State,
+)
+from people.demographics import recompute as recompute_demographics
+from people.events import month_day
+from people.geo import geohash_encode
+from people.payload_cache import bump_data_version
+from people.search import insert_postings, person_postings
+
+# Fixed "today" of the generated world, so a seed always yields the same dates.
+REFERENCE_DATE = date(2025, 1, 1)
+
+SYLLABLES = (
+    "ma", "ri", "an", "to", "ni", "el", "sa", "ra", "lo", "pe", "ca", "mi", "ga", "la", "be",
+    "do", "na", "te", "vi", "ro", "se", "ju", "li", "fe", "di", "go", "me", "za", "ta", "ve",
+)
+MALE_ENDINGS = ("o", "el", "an", "es", "io", "ar")
+FEMALE_ENDINGS = ("a", "ia", "ela", "ina", "is", "ey")
+LAST_NAME_ENDINGS = ("ez", "es", "az", "ado", "ero", "ona", "illo", "ar")
+PLACE_ENDINGS = ("al", "ana", "ito", "ero", "ia", "on")
+
+# (code, name, (min latitude, max latitude), (min longitude, max longitude))
+COUNTRIES = (
+    ("DO", "República Dominicana", (17.6, 19.9), (-72.0, -68.4)),
+    ("US", "United States", (25.0, 48.0), (-122.0, -70.0)),
+    ("PR", "Puerto Rico", (17.9, 18.5), (-67.2, -65.6)),
+    ("ES", "España", (36.2, 43.5), (-8.9, 3.1)),
+    ("HT", "Haïti", (18.1, 19.9), (-74.4, -71.7)),
+    ("VE", "Venezuela", (1.0, 11.8), (-72.9, -60.0)),
+    ("CO", "Colombia", (-4.0, 11.0), (-77.0, -67.5)),
+)
+STATES_PER_COUNTRY = 12
+CITIES_PER_STATE = 6
+
+PHONE_AREA_CODES = ("809", "829", "849")
+PHONE_FORMATS = ("{a}-{b}-{c}", "({a}) {b}-{c}", "+1 {a} {b} {c}", "{a}{b}{c}")
+EMAIL_DOMAINS = ("gmail.com", "hotmail.com", "yahoo.com", "outlook.com", "example.com")
+
+MARRIAGE_RATE = 0.8
+IN_GENERATION_SPOUSE_RATE = 0.5
+DIVORCE_RATE = 0.15
+DATING_RATE = 0.25
+ATTRIBUTES_PER_TYPE = 12
+# (code, name) of the attribute types; each person gets a few attributes, Zipf-popular.
+ATTRIBUTE_TYPES = (("skill", "Skill"), ("hobby", "Hobby"), ("ministry", "Ministry"))
+ATTRIBUTE_WEIGHTS = {0: 25, 1: 30, 2: 25, 3: 12, 4: 8}
+CHILDREN_WEIGHTS = {0: 8, 1: 15, 2: 30, 3: 25, 4: 12, 5: 6, 6: 4}
+
+
+class ZipfChoice:
+    """Pick items with probability proportional to 1 / rank ** exponent."""
+
+    def __init__(self, rng: random.Random, items, exponent: float):
+        self.rng = rng
+        self.items = list(items)
+        self.cum_weights = list(
+            accumulate(1 / rank**exponent for rank in range(1, len(self.items) + 1))
+        )
+
+    def __call__(self):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights)[0]
+
+
+class PersonSeed:
+    """What the generator needs to know about a person before the row is built."""
+
+    __slots__ = (
+        "id",
+        "male",
+        "last_name_id",
+        "second_last_name_id",
+        "birth",
+        "death",
+        "birth_family_id",
+        "birth_city",
+        "city",
+        "household_id",
+        "marital_status",
+    )
+
+    def __init__(self, id, male, last_name_id, second_last_name_id, birth, death, city):
+        self.id = id
+        self.male = male
+        self.last_name_id = last_name_id
+        self.second_last_name_id = second_last_name_id
+        self.birth = birth
+        self.death = death
+        self.birth_family_id = None
+        self.birth_city = city
+        self.city = city
+        self.household_id = None
+        self.marital_status = "single"
+
+    def age_on(self, day: date) -> int:
+        return (min(day, self.death or day) - self.birth).days // 365
+
+
+class DatasetGenerator:
+    """
+    Build a multi-generation population: founder cohorts marry (within their
+    generation or to newcomers), each couple becomes a `Family` with a household
+    `Location`, and their children form the next generation. Rows get explicit
+    primary keys and are written with `bulk_create` in dependency order.
+    """
+
+    FLUSH_ORDER = (
+        Location,
+        Person,
+        PersonAttributeAssignment,
+        Family,
+        FamilyMember,
+        Marriage,
+        PersonRelationship,
+    )
+
+    def __init__(self, seed, first_names, last_names, zipf_exponent, batch_size, log=None):
+        self.rng = random.Random(seed)
+        self.first_name_count = first_names
+        self.last_name_count = last_names
+        self.zipf_exponent = zipf_exponent
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.created = Counter()
+        self._pending = {model: [] for model in self.FLUSH_ORDER}
+        self._pending_count = 0
+        self._next_ids = {}
+
+    def generate(self, persons: int) -> Counter:
+        self._create_catalogs()
+        self._create_geography()
+        self._create_names()
+
+        self.remaining = persons
+        wave = 0
+        while self.remaining > 0:
+            cohort_size = max(2, self.remaining // 8)
+            first_year = min(1900 + 20 * wave, 1990)
+            generation = [
+                self._new_seed(
+                    self._random_birth(first_year, first_year + 30),
+                    self._random_last_name_pair(),
+                    self.pick_city(),
+                )
+                for _ in range(min(cohort_size, self.remaining))
+            ]
+            depth = 0
+            while generation:
+                self.log(f"Wave {wave}, generation {depth}: {len(generation)} persons.")
+                generation = self._process_generation(generation)
+                depth += 1
+            wave += 1
+
+        self._flush()
+        recompute_demographics()
+        return self.created
+
+    # -- catalogs -----------------------------------------------------------------
+
+    def _create_catalogs(self):
+        self.gender_ids = {
+            True: Gender.objects.get_or_create(code="M", defaults={"label": "Male", "order": 1})[0].pk,
+            False: Gender.objects.get_or_create(code="F", defaults={"label": "Female", "order": 2})[0].pk,
+        }
+        self.role_ids = {
+            code: FamilyRole.objects.get_or_create(
+                code=code, defaults={"name": name, "display_order": order}
+            )[0].pk
+            for order, (code, name) in enumerate(
+                (("father", "Father"), ("mother", "Mother"), ("child", "Child")), start=1
+            )
+        }
+        self.marital_status_ids = {
+            code: MaritalStatus.objects.get_or_create(
+                code=code, defaults={"label": code.title(), "order": order}
+            )[0].pk
+            for order, code in enumerate(("single", "married", "divorced", "widowed"), start=1)
+        }
+        self.end_reason_ids = {
+            code: MarriageEndReason.objects.get_or_create(
+                code=code, defaults={"label": code.title(), "order": order}
+            )[0].pk
+            for order, code in enumerate(("divorced", "widowed"), start=1)
+        }
+        self.dating_type_id = RelationshipType.objects.get_or_create(
+            code=DATING_RELATIONSHIP_CODE, defaults={"label": "Dating"}
+        )[0].pk
+        self.identity_type_id = PersonIdentityType.objects.get_or_create(
+            code="C", defaults={"label": "Cédula"}
+        )[0].pk
+
+        attribute_ids = []
+        for order, (code, name) in enumerate(ATTRIBUTE_TYPES, start=1):
+            attribute_type = PersonAttributeType.objects.get_or_create(
+                code=code, defaults={"name": name, "order": order}
+            )[0]
+            for index in range(1, ATTRIBUTES_PER_TYPE + 1):
+                attribute_ids.append(
+                    PersonAttribute.objects.get_or_create(
+                        code=f"{code}-{index}",
+                        defaults={
+                            "attribute_type": attribute_type,
+                            "name": f"{name} {index}",
+                            "order": index,
+                        },
+                    )[0].pk
+                )
+        self.pick_attribute = ZipfChoice(self.rng, attribute_ids, self.zipf_exponent)
+
+    def _create_geography(self):
+        cities = []
+        for order, (code, name, latitudes, longitudes) in enumerate(COUNTRIES, start=1):
+            country = Country.objects.get_or_create(
+                code=code, defaults={"name": name, "order": order}
+            )[0]
+            state_names = self._words(STATES_PER_COUNTRY, PLACE_ENDINGS)
+            for state_name in state_names:
+                state = State.objects.get_or_create(country=country, name=state_name)[0]
+                for city_name in self._words(CITIES_PER_STATE, PLACE_ENDINGS, exclude=state_names):
+                    city = City.objects.get_or_create(
+                        country=country, state=state, name=city_name
+                    )[0]
+                    center = (self.rng.uniform(*latitudes), self.rng.uniform(*longitudes))
+                    cities.append((country.pk, state.pk, city.pk, center))
+        self.rng.shuffle(cities)
+        self.pick_city = ZipfChoice(self.rng, cities, self.zipf_exponent)
+
+    def _create_names(self):
+        half = self.first_name_count // 2
+        male_names = self._words(half, MALE_ENDINGS)
+        female_names = self._words(self.first_name_count - half, FEMALE_ENDINGS, exclude=male_names)
+        last_names = self._words(self.last_name_count, LAST_NAME_ENDINGS)
+        nicknames = self._words(max(10, self.first_name_count // 10), ("i", "y", "ito", "ita"))
+
+        first_name_ids = self._catalog_ids(PersonName, male_names + female_names)
+        self.pick_first_name = {
+            True: ZipfChoice(
+                self.rng, [(first_name_ids[v], v) for v in male_names], self.zipf_exponent
+            ),
+            False: ZipfChoice(
+                self.rng, [(first_name_ids[v], v) for v in female_names], self.zipf_exponent
+            ),
+        }
+        last_name_ids = self._catalog_ids(LastName, last_names)
+        self.last_name_values = {last_name_ids[v]: v for v in last_names}
+        self.street_names = last_names
+        self.pick_last_name = ZipfChoice(
+            self.rng, [last_name_ids[v] for v in last_names], self.zipf_exponent
+        )
+        nickname_ids = self._catalog_ids(Nickname, nicknames)
+        # Rows cached on each new person, so its search postings need no catalog reads.
+        self.name_rows = {
+            model: {pk: model(id=pk, value=value) for value, pk in ids.items()}
+            for model, ids in (
+                (PersonName, first_name_ids),
+                (LastName, last_name_ids),
+                (Nickname, nickname_ids),
+            )
+        }
+        self.pick_nickname = ZipfChoice(
+            self.rng, [nickname_ids[v] for v in nicknames], self.zipf_exponent
+        )
+
+    def _words(self, count, endings, exclude=()) -> list[str]:
+        """`count` distinct capitalized pseudo-words, in generation order."""
+        excluded = set(exclude)
+        words = {}
+        attempts = 0
+        while len(words) < count:
+            attempts += 1
+            if attempts > count * 50:
+                raise CommandError(f"Cannot build {count} distinct names; use a smaller catalog.")
+            stem = "".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(1, 3)))
+            word = (stem + self.rng.choice(endings)).capitalize()
+            if word not in excluded:
+                words.setdefault(word, None)
+        return list(words)
+
+    def _catalog_ids(self, model, values) -> dict[str, int]:
+        """
+        Map each value to its row id, reusing rows that already exist (matched on
+        `normalized_value`) and bulk-creating the rest.
+        """
+        ids = {}
+        normalized = {value.strip().lower(): value for value in values}
+        keys = list(normalized)
+        for start in range(0, len(keys), 500):
+            for normalized_value, pk in model.objects.filter(
+                normalized_value__in=keys[start:start + 500]
+            ).values_list("normalized_value", "id"):
+                ids[normalized[normalized_value]] = pk
+
+        missing = [
+            # bulk_create skips save(), which is what normally fills normalized_value.
+            model(id=self._allocate_id(model), value=value, normalized_value=value.strip().lower())
+            for value in values
+            if value not in ids
+        ]
+        model.objects.bulk_create(missing, batch_size=self.batch_size)
+        self.created[model.__name__] += len(missing)
+        ids.update((obj.value, obj.pk) for obj in missing)
+        return ids
+
+    # -- population ---------------------------------------------------------------
+
+    def _process_generation(self, generation: list[PersonSeed]) -> list[PersonSeed]:
+        # Marriages are planned first so every person row is built with its final
+        # marital status; rows are then added parents-before-children for the FKs.
+        couples = []
+        for husband, wife in self._pair(generation):
+            household_city = husband.city if self.rng.random() < 0.7 else self.pick_city()
+            household_id = self._add_location(household_city)
+            for spouse in (husband, wife):
+                spouse.city = household_city
+                spouse.household_id = household_id
+            couples.append((husband, wife, self._plan_marriage(husband, wife)))
+
+        for seed in generation:
+            self._add(self._build_person(seed))
+            self._add_attribute_assignments(seed)
+            if seed.birth_family_id is not None:
+                self._add(
+                    FamilyMember(
+                        id=self._allocate_id(FamilyMember),
+                        family_id=seed.birth_family_id,
+                        person_id=seed.id,
+                        role_id=self.role_ids["child"],
+                        joined_date=seed.birth,
+                    )
+                )
+
+        self._add_dating_relationships(generation)
+
+        children = []
+        for husband, wife, marriage in couples:
+            children += self._add_family(husband, wife, marriage)
+        return children
+
+    def _pair(self, generation: list[PersonSeed]) -> list[tuple[PersonSeed, PersonSeed]]:
+        """
+        Marry off part of `generation`, to someone of the same generation from
+        another family or to a newcomer (who is appended to `generation`).
+        """
+        rng = self.rng
+        candidates = [seed for seed in generation if seed.age_on(REFERENCE_DATE) >= 20]
+        rng.shuffle(candidates)
+        waiting = {True: [], False: []}
+        couples = []
+
+        def marry(first, second):
+            couples.append((first, second) if first.male else (second, first))
+
+        for seed in candidates:
+            if rng.random() >= MARRIAGE_RATE:
+                continue
+            if rng.random() < IN_GENERATION_SPOUSE_RATE:
+                partners = waiting[not seed.male]
+                if partners and partners[-1].birth_family_id != seed.birth_family_id:
+                    marry(seed, partners.pop())
+                else:
+                    waiting[seed.male].append(seed)
+            elif self.remaining > 0:
+                marry(seed, self._newcomer_for(seed, generation))
+
+        for seed in waiting[True] + waiting[False]:
+            if self.remaining <= 0:
+                break
+            marry(seed, self._newcomer_for(seed, generation))
+        return couples
+
+    def _newcomer_for(self, seed: PersonSeed, generation: list[PersonSeed]) -> PersonSeed:
+        birth = seed.birth + timedelta(days=self.rng.randint(-4 * 365, 4 * 365))
+        newcomer = self._new_seed(
+            min(birth, REFERENCE_DATE - timedelta(days=20 * 365)),
+            self._random_last_name_pair(),
+            self.pick_city(),
+            male=not seed.male,
+        )
+        # Spouses marry as adults, so a newcomer lives at least as long as the wedding needs.
+        if newcomer.death is not None and newcomer.age_on(REFERENCE_DATE) < 25:
+            newcomer.death = None
+        generation.append(newcomer)
+        return newcomer
+
+    def _add_family(self, husband: PersonSeed, wife: PersonSeed, marriage: Marriage) -> list[PersonSeed]:
+        rng = self.rng
+        family_id = self._allocate_id(Family)
+        self._add(
+            Family(
+                id=family_id,
+                first_last_name_id=husband.last_name_id,
+                second_last_name_id=wife.last_name_id,
+                is_active=rng.random() >= 0.02,
+            )
+        )
+        married_on = marriage.married_on
+        for seed, role in ((husband, "father"), (wife, "mother")):
+            self._add(
+                FamilyMember(
+                    id=self._allocate_id(FamilyMember),
+                    family_id=family_id,
+                    person_id=seed.id,
+                    role_id=self.role_ids[role],
+                    is_primary=True,
+                    joined_date=married_on,
+                )
+            )
+        self._add(marriage)
+
+        children = []
+        birth = married_on
+        for _ in range(rng.choices(list(CHILDREN_WEIGHTS), weights=CHILDREN_WEIGHTS.values())[0]):
+            birth += timedelta(days=rng.randint(300, 4 * 365))
+            if self.remaining <= 0 or birth >= REFERENCE_DATE:
+                break
+            child = self._new_seed(
+                birth, (husband.last_name_id, wife.last_name_id), husband.city
+            )
+            child.birth_family_id = family_id
+            child.household_id = husband.household_id
+            children.append(child)
+        return children
+
+    def _plan_marriage(self, husband: PersonSeed, wife: PersonSeed) -> Marriage:
+        """Decide how the marriage went and set both spouses' marital status."""
+        rng = self.rng
+        married_on = self._wedding_date(husband, wife)
+        ended_on = end_reason = None
+        divorce_on = married_on + timedelta(days=rng.randint(365, 20 * 365))
+        deaths = [seed.death for seed in (husband, wife) if seed.death and seed.death > married_on]
+        if rng.random() < DIVORCE_RATE and divorce_on < min(deaths + [REFERENCE_DATE]):
+            ended_on, end_reason = divorce_on, "divorced"
+        elif deaths:
+            ended_on, end_reason = min(deaths), "widowed"
+
+        for seed in (husband, wife):
+            if end_reason is None:
+                seed.marital_status = "married"
+            elif end_reason == "divorced":
+                seed.marital_status = "divorced"
+            else:
+                seed.marital_status = "widowed" if seed.death != ended_on else "married"
+        return Marriage(
+            id=self._allocate_id(Marriage),
+            husband_id=husband.id,
+            wife_id=wife.id,
+            married_on=married_on,
+            married_month_day=month_day(married_on),
+            ended_on=ended_on,
+            end_reason_id=self.end_reason_ids[end_reason] if end_reason else None,
+        )
+
+    def _add_dating_relationships(self, generation: list[PersonSeed]):
+        rng = self.rng
+        singles = [
+            seed
+            for seed in generation
+            if seed.marital_status == "single"
+            and seed.death is None
+            and seed.age_on(REFERENCE_DATE) >= 16
+        ]
+        rng.shuffle(singles)
+        for first, second in zip(singles[::2], singles[1::2]):
+            if rng.random() >= DATING_RATE:
+                continue
+            started_on = REFERENCE_DATE - timedelta(days=rng.randint(30, 3000))
+            ended_on = None
+            if rng.random() < 0.3:
+                ended_on = min(started_on + timedelta(days=rng.randint(30, 1000)), REFERENCE_DATE)
+            person_id, partner_id = sorted((first.id, second.id))
+            self._add(
+                PersonRelationship(
+                    id=self._allocate_id(PersonRelationship),
+                    # PersonRelationship.save() orders the pair; bulk_create does not call it.
+                    person_id=person_id,
+                    partner_id=partner_id,
+                    relationship_type_id=self.dating_type_id,
+                    started_on=started_on,
+                    ended_on=ended_on,
+                )
+            )
+
+    def _add_attribute_assignments(self, seed: PersonSeed):
+        rng = self.rng
+        count = rng.choices(list(ATTRIBUTE_WEIGHTS), weights=ATTRIBUTE_WEIGHTS.values())[0]
+        for attribute_id in {self.pick_attribute() for _ in range(count)}:
+            started_on = seed.birth + timedelta(days=rng.randint(5 * 365, 30 * 365))
+            ended = rng.random() < 0.2 and started_on < REFERENCE_DATE
+            self._add(
+                PersonAttributeAssignment(
+                    id=self._allocate_id(PersonAttributeAssignment),
+                    person_id=seed.id,
+                    attribute_id=attribute_id,
+                    started_on=min(started_on, REFERENCE_DATE),
+                    ended_on=min(started_on + timedelta(days=rng.randint(30, 3650)), REFERENCE_DATE)
+                    if ended
+                    else None,
+                )
+            )
+
+    def _build_person(self, seed: PersonSeed) -> Person:
+        rng = self.rng
+        first_name_id, first_name = self.pick_first_name[seed.male]()
+        age = seed.age_on(REFERENCE_DATE)
+        adult = age >= 18
+        alive = seed.death is None
+        country_id, state_id, city_id, _ = seed.birth_city
+        person = Person(
+            id=seed.id,
+            first_name_id=first_name_id,
+            second_name_id=self.pick_first_name[seed.male]()[0] if rng.random() < 0.4 else None,
+            last_name_id=seed.last_name_id,
+            second_last_name_id=seed.second_last_name_id,
+            nickname_id=self.pick_nickname() if rng.random() < 0.15 else None,
+            identity_type_id=self.identity_type_id if adult and rng.random() < 0.7 else None,
+            identity=self._identity() if adult and rng.random() < 0.7 else None,
+            gender_id=self.gender_ids[seed.male],
+            email=self._email(first_name, seed.last_name_id) if alive and age >= 15 and rng.random() < 0.6 else None,
+            cellphone=self._phone() if alive and age >= 13 and rng.random() < 0.8 else None,
+            housephone=self._phone() if alive and rng.random() < 0.2 else None,
+            date_of_birth=seed.birth,
+            birth_month_day=month_day(seed.birth),
+            is_deceased=not alive,
+            date_of_death=seed.death,
+            birth_country_id=country_id,
+            birth_state_id=state_id,
+            birth_city_id=city_id,
+            current_address_id=seed.household_id if alive else None,
+            is_studing=5 <= age <= 24 and rng.random() < 0.8,
+            is_employed=adult and alive and age < 65 and rng.random() < 0.65,
+            marital_status_id=self.marital_status_ids[seed.marital_status] if adult else None,
+            is_active=rng.random() >= 0.01,
+        )
+        # bulk_create skips save(), which is what normally fills the normalized identifiers
+        # and the month-days.
+        person.normalize_identifiers()
+        for field in ("first_name", "second_name", "last_name", "second_last_name", "nickname"):
+            name_id = getattr(person, f"{field}_id")
+            if name_id is not None:
+                rows = self.name_rows[Person._meta.get_field(field).related_model]
+                setattr(person, field, rows[name_id])
+        return person
+
+    # -- helpers ------------------------------------------------------------------
+
+    def _new_seed(self, birth, last_names, city, male=None) -> PersonSeed:
+        rng = self.rng
+        lifespan_days = int(max(1.0, min(105.0, rng.gauss(78, 12))) * 365)
+        death = birth + timedelta(days=lifespan_days)
+        self.remaining -= 1
+        return PersonSeed(
+            id=self._allocate_id(Person),
+            male=rng.random() < 0.5 if male is None else male,
+            last_name_id=last_names[0],
+            second_last_name_id=last_names[1],
+            birth=min(birth, REFERENCE_DATE),
+            death=death if death < REFERENCE_DATE else None,
+            city=city,
+        )
+
+    def _random_birth(self, first_year: int, last_year: int) -> date:
+        start = date(first_year, 1, 1)
+        return start + timedelta(days=self.rng.randint(0, (last_year - first_year) * 365))
+
+    def _random_last_name_pair(self) -> tuple[int, int | None]:
+        second = self.pick_last_name() if self.rng.random() < 0.85 else None
+        return self.pick_last_name(), second
+
+    def _wedding_date(self, husband: PersonSeed, wife: PersonSeed) -> date:
+        youngest_birth = max(husband.birth, wife.birth)
+        married_on = youngest_birth + timedelta(days=self.rng.randint(18 * 365, 32 * 365))
+        latest = min(
+            [seed.death for seed in (husband, wife) if seed.death] + [REFERENCE_DATE]
+        ) - timedelta(days=1)
+        return max(min(married_on, latest), youngest_birth + timedelta(days=18 * 365))
+
+    def _add_location(self, city) -> int:
+        rng = self.rng
+        country_id, state_id, city_id, (latitude, longitude) = city
+        location_id = self._allocate_id(Location)
+        # Draw in the same order as always, so a seed keeps giving the same dataset.
+        address_line1 = f"Calle {rng.choice(self.street_names)} #{rng.randint(1, 300)}"
+        latitude = Decimal(f"{latitude + rng.gauss(0, 0.05):.6f}")
+        longitude = Decimal(f"{longitude + rng.gauss(0, 0.05):.6f}")
+        self._add(
+            Location(
+                id=location_id,
+                name="Home",
+                address_line1=address_line1,
+                country_id=country_id,
+                state_id=state_id,
+                city_id=city_id,
+                latitude=latitude,
+                longitude=longitude,
+                # bulk_create skips save(), which is what normally fills geohash.
+                geohash=geohash_encode(float(latitude), float(longitude)),
+            )
+        )
+        return location_id
+
+    def _identity(self) -> str:
+        rng = self.rng
+        return f"{rng.randint(1, 402):03d}-{rng.randint(0, 9999999):07d}-{rng.randint(0, 9)}"
+
+    def _phone(self) -> str:
+        rng = self.rng
+        return rng.choice(PHONE_FORMATS).format(
+            a=rng.choice(PHONE_AREA_CODES),
+            b=f"{rng.randint(200, 999)}",
+            c=f"{rng.randint(0, 9999):04d}",
+        )
+
+    def _email(self, first_name: str, last_name_id: int) -> str:
+        rng = self.rng
+        local = f"{first_name}.{self.last_name_values[last_name_id]}{rng.randint(1, 999)}"
+        # Some addresses keep their capitals, as users type them.
+        if rng.random() >= 0.1:
+            local = local.lower()
+        return f"{local}@{rng.choice(EMAIL_DOMAINS)}"
+
+    def _allocate_id(self, model) -> int:
+        # Ids are assigned up front because bulk_create does not return them on MySQL.
+        if model not in self._next_ids:
+            max_id = model.objects.aggregate(max_id=Max("id"))["max_id"]
+            self._next_ids[model] = (max_id or 0) + 1
+        pk = self._next_ids[model]
+        self._next_ids[model] += 1
+        return pk
+
+    def _add(self, obj):
+        self._pending[type(obj)].append(obj)
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size * 10:
+            self._flush()
+
+    def _flush(self):
+        # bulk_create sends no post_save signals, which normally index people and
+        # invalidate the cached payloads. The postings come from the rows in memory.
+        postings = [posting for person in self._pending[Person] for posting in person_postings(person)]
+        with transaction.atomic():
+            for model in self.FLUSH_ORDER:
+                objs = self._pending[model]
+                if objs:
+                    model.objects.bulk_create(objs, batch_size=self.batch_size)
+                    self.created[model.__name__] += len(objs)
+                    objs.clear()
+            insert_postings(postings)
+        self._pending_count = 0
+        bump_data_version()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic population (persons, families, marriages, "
+        "relationships, attributes, locations and name catalogs) for benchmarks and load tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--persons", type=int, default=1000, help="Number of persons to create.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument(
+            "--first-names",
+            type=int,
+            default=2000,
+            help="Size of the first-name catalog, split between genders.",
+        )
+        parser.add_argument("--last-names", type=int, default=5000, help="Size of the last-name catalog.")
+        parser.add_argument(
+            "--zipf-exponent",
+            type=float,
+            default=1.1,
+            help="Skew of name and city popularity (higher means a few very common values).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT statement.")
+
+    def handle(self, *args, **options):
+        if options["persons"] < 2:
+            raise CommandError("--persons must be at least 2.")
+        if options["first_names"] < 2 or options["last_names"] < 1:
+            raise CommandError("The name catalogs cannot be empty.")
+
+        started = time.monotonic()
+        generator = DatasetGenerator(
+            seed=options["seed"],
+            first_names=options["first_names"],
+            last_names=options["last_names"],
+            zipf_exponent=options["zipf_exponent"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write if options["verbosity"] > 1 else None,
+        )
+        created = generator.generate(options["persons"])
+        if options["verbosity"] < 1:
+            return
+        summary = ", ".join(f"{model_name}: {count}" for model_name, count in created.items() if count)
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {summary} in {time.monotonic() - started:.1f}s.")
+        )
@@ -0,0 +1,383 @@
+import json
+import re
+from collections import defaultdict
+from contextlib import ExitStack
+from itertools import product
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from people.models import Family, Person
+from sevenawesome_app_services.instrumentation import PROJECT_ROOT, normalize_sql, originating_frame
+from sevenawesome_app_services.slow_queries import explain
+
+PERSON_HELPERS = (
+    "parents",
+    "siblings",
+    "children",
+    "current_marriage",
+    "current_spouse",
+    "spouse_history",
+    "get_attribute_assignments",
+    "attributes",
+    "current_dating_relationship",
+)
+
+# The cases below are driven from here; the origin of a query is the view or model code they call.
+_DRIVER_FILES = (__file__, f"{PROJECT_ROOT}/manage.py")
+
+_IDENTIFIER = r"[`\"]?(\w+)[`\"]?"
+_TABLE_REFERENCE = re.compile(rf"\b(?:FROM|JOIN)\s+{_IDENTIFIER}(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|INNER\b|LEFT\b|ORDER\b|GROUP\b|LIMIT\b)(\w+))?", re.I)
+_PREDICATE = re.compile(
+    rf"{_IDENTIFIER}\.{_IDENTIFIER}\s*(=|IN\s*\(|IS\s+NULL|<=|>=|<|>|(?=\s+AND\b|\s+OR\b|\s*\)|\s*$))",
+    re.I,
+)
+# An innermost parenthesized group of alternatives, as Django writes Q(a) | Q(b).
+_OR_GROUP = re.compile(r"\(([^()]*\bOR\b[^()]*)\)")
+_WHERE_CLAUSE = re.compile(r"\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)", re.I | re.S)
+
+
+def _table_aliases(sql: str) -> dict[str, str]:
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE.findall(sql):
+        aliases[alias or table] = table
+    return aliases
+
+
+def _columns_by_table(clause: str, aliases: dict[str, str]):
+    equality = defaultdict(list)
+    ranges = defaultdict(list)
+    for alias, column, operator in _PREDICATE.findall(clause):
+        table = aliases.get(alias)
+        if table is None:
+            continue
+        target = ranges if operator.strip() in ("<", ">", "<=", ">=") else equality
+        if column not in equality[table] and column not in target[table]:
+            target[table].append(column)
+    return equality, ranges
+
+
+def candidate_indexes(sql: str) -> set[tuple[str, tuple[str, ...]]]:
+    """
+    The (table, columns) indexes the WHERE clause of `sql` would use: equality,
+    IN and IS NULL columns first, then one range column. Each branch of an
+    `(a = %s OR b = %s)` group needs an index of its own.
+    """
+    match = _WHERE_CLAUSE.search(sql)
+    if not match:
+        return set()
+    aliases = _table_aliases(sql)
+    clause = match.group(1)
+    or_groups = [group.split(" OR ") for group in _OR_GROUP.findall(clause)]
+    base = _OR_GROUP.sub("", clause)
+
+    candidates = set()
+    for branches in product(*or_groups):
+        equality, ranges = _columns_by_table(" AND ".join((*branches, base)), aliases)
+        for table in set(equality) | set(ranges):
+            columns = tuple(equality[table] + ranges[table][:1])
+            if columns:
+                candidates.add((table, columns))
+    return candidates
+
+
+def plan_warnings(vendor: str, plan) -> list[str]:
+    if not isinstance(plan, list):
+        return [f"EXPLAIN failed: {plan['error']}"] if plan else []
+    warnings = []
+    for row in plan:
+        if vendor == "sqlite":
+            detail = row.get("detail", "")
+            if detail.startswith("SCAN ") and " INDEX " not in detail:
+                warnings.append(f"full scan: {detail}")
+            elif "TEMP B-TREE" in detail:
+                warnings.append(f"sort without an index: {detail}")
+        else:
+            table = row.get("table")
+            if row.get("type") == "ALL":
+                warnings.append(f"full scan of {table} (~{row.get('rows')} rows)")
+            extra = row.get("Extra") or ""
+            if "Using filesort" in extra or "Using temporary" in extra:
+                warnings.append(f"sort without an index on {table}: {extra}")
+    return warnings
+
+
+class IndexCatalog:
+    """Indexes that exist in the database, per table, as column tuples."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._indexes: dict[str, list[tuple[str, ...]]] = {}
+
+    def indexes(self, table: str) -> list[tuple[str, ...]]:
+        if table not in self._indexes:
+            with self.connection.cursor() as cursor:
+                constraints = self.connection.introspection.get_constraints(cursor, table)
+            self._indexes[table] = [
+                tuple(constraint["columns"])
+                for constraint in constraints.values()
+                if (constraint["index"] or constraint["unique"] or constraint["primary_key"])
+                and constraint["columns"]
+            ]
+        return self._indexes[table]
+
+    def covers(self, table: str, columns: tuple[str, ...]) -> bool:
+        """True when an existing index starts with `columns` (in any order)."""
+        wanted = set(columns)
+        return any(set(index[: len(columns)]) == wanted for index in self.indexes(table))
+
+
+def _selective_columns(table: str, columns: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    The columns worth an index: none for a primary key lookup (already
+    indexed), and without boolean flags, which match too many rows to narrow
+    a lookup down.
+    """
+    model = _model_for_table(table)
+    if model is None:
+        return columns
+    if model._meta.pk.column in columns:
+        return ()
+    by_column = {field.column: field for field in model._meta.concrete_fields}
+    return tuple(
+        column
+        for column in columns
+        if not isinstance(by_column.get(column), models.BooleanField)
+    )
+
+
+def _model_for_table(table: str):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def _model_index_suggestion(table: str, columns: tuple[str, ...]) -> str:
+    model = _model_for_table(table)
+    if model is None:
+        return f"CREATE INDEX ... ON {table} ({', '.join(columns)})"
+    by_column = {field.column: field.name for field in model._meta.concrete_fields}
+    fields = ", ".join(f'"{by_column.get(column, column)}"' for column in columns)
+    return f"{model.__name__}.Meta.indexes: models.Index(fields=({fields},), name=...)"
+
+
+class QueryCollector:
+    """Record the SQL run on every database while the block executes."""
+
+    def __init__(self):
+        self.queries = []
+        self._label = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.queries.append(
+                {
+                    "case": self._label,
+                    "database": context["connection"].alias,
+                    "sql": sql,
+                    "params": params,
+                    "frame": originating_frame(skip_files=_DRIVER_FILES),
+                }
+            )
+        return execute(sql, params, many, context)
+
+    def run(self, label: str, func):
+        self._label = label
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            func()
+
+
+def _sample_person():
+    """A married parent with parents and attributes of their own, so every helper has work to do."""
+    return (
+        Person.objects.filter(
+            family_memberships__role__code="father",
+            marriages_as_husband__ended_on__isnull=True,
+        )
+        .filter(family_memberships__role__code="child")
+        .filter(attribute_assignments__ended_on__isnull=True)
+        .order_by("pk")
+        .first()
+    ) or Person.objects.order_by("pk").first()
+
+
+def _endpoint(path: str, user):
+    from asgiref.sync import async_to_sync, iscoroutinefunction
+    from django.urls import resolve
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    match = resolve(path)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+
+    def run():
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=user)
+        response = view(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            # Cached payloads come back as plain, already rendered responses.
+            response.render()
+
+    return run
+
+
+def _representative_cases(person, family) -> dict:
+    user = get_user_model()(username="index-advisor", is_staff=True)
+    cases = {
+        "GET families": _endpoint(reverse("people_api:family-tree"), user),
+        "GET family tree": _endpoint(
+            reverse("people_api:family-full-tree", kwargs={"pk": family.pk}), user
+        ),
+        "GET people tables": _endpoint(reverse("people_api:people-full-attributes"), user),
+    }
+    for name in PERSON_HELPERS:
+        cases[f"Person.{name}"] = lambda name=name: _evaluate(getattr(person, name)())
+    if person.identity:
+        cases["Person by identity"] = lambda: Person.objects.filter(
+            identity_type_id=person.identity_type_id, identity=person.identity
+        ).first()
+    return cases
+
+
+def _evaluate(result):
+    if hasattr(result, "_fetch_all"):
+        list(result)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the queries behind the people API views and Person helpers, inspect their "
+        "EXPLAIN plans and report the indexes their WHERE clauses are missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+        parser.add_argument(
+            "--fail-on-missing",
+            action="store_true",
+            help="Exit with an error when an index is missing (for CI).",
+        )
+
+    def handle(self, *args, **options):
+        person = _sample_person()
+        family = Family.objects.order_by("pk").first()
+        if person is None or family is None:
+            raise CommandError("No people or families to query; seed data with `generate_people` first.")
+
+        collector = QueryCollector()
+        # A cached or shared payload runs no queries; build every response.
+        with override_settings(
+            PEOPLE_CACHE={**settings.PEOPLE_CACHE, "ENABLED": False},
+            SINGLE_FLIGHT={**settings.SINGLE_FLIGHT, "ENABLED": False},
+        ):
+            for label, run in _representative_cases(person, family).items():
+                collector.run(label, run)
+
+        shapes = {}
+        for query in collector.queries:
+            key = (query["database"], normalize_sql(query["sql"]))
+            if key in shapes:
+                shapes[key]["cases"].add(query["case"])
+                shapes[key]["count"] += 1
+            else:
+                shapes[key] = {**query, "cases": {query["case"]}, "count": 1}
+
+        catalogs = {}
+        report = {"queries": [], "missing_indexes": []}
+        missing = {}
+        for (alias, _), shape in shapes.items():
+            connection = connections[alias]
+            catalog = catalogs.setdefault(alias, IndexCatalog(connection))
+            plan = explain(connection, shape["sql"], shape["params"])
+            warnings = plan_warnings(connection.vendor, plan)
+            candidates = {
+                (table, _selective_columns(table, columns))
+                for table, columns in candidate_indexes(shape["sql"])
+            }
+            uncovered = sorted(
+                (table, columns)
+                for table, columns in candidates
+                if columns and not catalog.covers(table, columns)
+            )
+            for table, columns in uncovered:
+                entry = missing.setdefault(
+                    # Equality columns in another order need the same index.
+                    (alias, table, frozenset(columns)),
+                    {
+                        "database": alias,
+                        "table": table,
+                        "columns": list(columns),
+                        "suggestion": _model_index_suggestion(table, columns),
+                        "queries": 0,
+                        "cases": set(),
+                        "frames": set(),
+                    },
+                )
+                entry["queries"] += shape["count"]
+                entry["cases"] |= shape["cases"]
+                if shape["frame"]:
+                    entry["frames"].add(shape["frame"])
+            report["queries"].append(
+                {
+                    "database": alias,
+                    "cases": sorted(shape["cases"]),
+                    "executions": shape["count"],
+                    "frame": shape["frame"],
+                    "sql": normalize_sql(shape["sql"]),
+                    "plan_warnings": warnings,
+                    "missing_indexes": [
+                        {"table": table, "columns": list(columns)}
+                        for table, columns in uncovered
+                    ],
+                    "plan": plan,
+                }
+            )
+        report["missing_indexes"] = [
+            {**entry, "cases": sorted(entry["cases"]), "frames": sorted(entry["frames"])}
+            for entry in sorted(missing.values(), key=lambda entry: -entry["queries"])
+        ]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, default=str))
+        else:
+            self._print_report(report, options["verbosity"])
+
+        if options["fail_on_missing"] and report["missing_indexes"]:
+            raise CommandError(f"{len(report['missing_indexes'])} missing index(es).")
+
+    def _print_report(self, report, verbosity):
+        flagged = [query for query in report["queries"] if query["plan_warnings"] or query["missing_indexes"]]
+        self.stdout.write(
+            f"{len(report['queries'])} query shapes inspected, {len(flagged)} with plan warnings "
+            f"or missing indexes."
+        )
+        if verbosity > 1:
+            for query in flagged:
+                self.stdout.write("")
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{', '.join(query['cases'])} ({query['frame']})"))
+                self.stdout.write(f"  {query['sql'][:300]}")
+                for warning in query["plan_warnings"]:
+                    self.stdout.write(f"  plan: {warning}")
+                for index in query["missing_indexes"]:
+                    self.stdout.write(f"  missing: {index['table']}({', '.join(index['columns'])})")
+
+        self.stdout.write("")
+        if not report["missing_indexes"]:
+            self.stdout.write(self.style.SUCCESS("No missing indexes."))
+            return
+        self.stdout.write(self.style.WARNING("Missing indexes:"))
+        for entry in report["missing_indexes"]:
+            self.stdout.write(
+                f"  [{entry['database']}] {entry['table']}({', '.join(entry['columns'])}) "
+                f"- {entry['queries']} queries from {', '.join(entry['cases'])}"
+            )
+            self.stdout.write(f"      {entry['suggestion']}")
+            for frame in entry["frames"]:
+                self.stdout.write(f"      at {frame}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding tokens and their blacklist entries in small batches, "
+        "so the token tables are never locked for long. Run it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Tokens deleted per statement.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the expired tokens.")
+
+    def handle(self, *args, **options):
+        expired = OutstandingToken.objects.filter(expires_at__lte=aware_utcnow())
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} expired tokens would be deleted.")
+            return
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by("pk").values_list("pk", flat=True)[: options["batch_size"]])
+            if not ids:
+                break
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+        # Other processes drop the purged ids from their revocation filters on its next rebuild.
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tokens."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from people.models import Person
+from people.search import REINDEX_BATCH_SIZE, index_people
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the people search index from scratch, one batch of people at a time. "
+        "Signals keep it current afterwards; run it after bulk loads that bypass them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=REINDEX_BATCH_SIZE, help="People reindexed per transaction."
+        )
+
+    def handle(self, *args, **options):
+        person_ids = Person.objects.order_by("pk").values_list("pk", flat=True).iterator()
+        written = 0
+        batch = []
+        for person_id in person_ids:
+            batch.append(person_id)
+            if len(batch) == options["batch_size"]:
+                written += index_people(batch, options["batch_size"])
+                batch = []
+        written += index_people(batch, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} search postings."))
@@ -0,0 +1,130 @@
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sevenawesome_app_services.slow_queries import read_log
+
+ORDERINGS = {
+    "total": lambda group: group["total_ms"],
+    "count": lambda group: group["count"],
+    "max": lambda group: group["max_ms"],
+    "mean": lambda group: group["mean_ms"],
+}
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[max(0, int(round(fraction * len(ordered))) - 1)]
+
+
+def summarize(entries: list[dict]) -> list[dict]:
+    """Group log entries by database and query shape."""
+    grouped = defaultdict(list)
+    for entry in entries:
+        grouped[(entry["database"], entry["sql"])].append(entry)
+
+    groups = []
+    for (database, sql), items in grouped.items():
+        durations = sorted(item["duration_ms"] for item in items)
+        origins = Counter(item["stack"][0] if item["stack"] else None for item in items)
+        plans = [item["plan"] for item in items if item.get("plan")]
+        groups.append(
+            {
+                "database": database,
+                "sql": sql,
+                "count": len(items),
+                "total_ms": round(sum(durations), 2),
+                "mean_ms": round(sum(durations) / len(durations), 2),
+                "p95_ms": _percentile(durations, 0.95),
+                "max_ms": durations[-1],
+                "last_seen": max(item["time"] for item in items),
+                "origins": [
+                    {"frame": frame, "count": count} for frame, count in origins.most_common(3)
+                ],
+                "stack": next(
+                    (item["stack"] for item in reversed(items) if item["stack"]), []
+                ),
+                "plan": plans[-1] if plans else None,
+            }
+        )
+    return groups
+
+
+def _plan_lines(plan) -> list[str]:
+    if isinstance(plan, dict):
+        return [f"EXPLAIN failed: {plan['error']}"]
+    lines = []
+    for row in plan:
+        if "detail" in row:
+            # SQLite's EXPLAIN QUERY PLAN.
+            lines.append(row["detail"])
+        else:
+            lines.append(
+                ", ".join(f"{key}={value}" for key, value in row.items() if value not in (None, ""))
+            )
+    return lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the slow-query log: the query shapes that cost the most time, "
+        "where they come from and their latest EXPLAIN output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", default=None, help="Log to read (default: SLOW_QUERIES['LOG_FILE']).")
+        parser.add_argument("--limit", type=int, default=10, help="Number of query shapes to show.")
+        parser.add_argument(
+            "--order-by",
+            choices=sorted(ORDERINGS),
+            default="total",
+            help="Rank by total time, number of occurrences, worst or mean duration.",
+        )
+        parser.add_argument("--since", type=float, default=None, help="Only entries from the last N hours.")
+        parser.add_argument("--database", default=None, help="Only queries on this database alias.")
+        parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+
+    def handle(self, *args, **options):
+        path = options["file"] or settings.SLOW_QUERIES["LOG_FILE"]
+        try:
+            entries = read_log(path)
+        except FileNotFoundError:
+            raise CommandError(f"No slow-query log at {path}.")
+
+        if options["since"] is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=options["since"])
+            entries = [entry for entry in entries if datetime.fromisoformat(entry["time"]) >= cutoff]
+        if options["database"]:
+            entries = [entry for entry in entries if entry["database"] == options["database"]]
+
+        groups = sorted(summarize(entries), key=ORDERINGS[options["order_by"]], reverse=True)
+        groups = groups[: options["limit"]]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(groups, indent=2, default=str))
+            return
+        if not groups:
+            self.stdout.write("No slow queries logged.")
+            return
+
+        self.stdout.write(f"{len(entries)} slow queries in {path}, top {len(groups)} by {options['order_by']}:")
+        for rank, group in enumerate(groups, start=1):
+            self.stdout.write("")
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"#{rank} [{group['database']}] {group['count']}x  total={group['total_ms']}ms  "
+                    f"mean={group['mean_ms']}ms  p95={group['p95_ms']}ms  max={group['max_ms']}ms"
+                )
+            )
+            self.stdout.write(f"  {group['sql']}")
+            for origin in group["origins"]:
+                frame = origin["frame"] or "outside the project (framework or library code)"
+                self.stdout.write(f"  from {frame} ({origin['count']}x)")
+            if group["stack"][1:]:
+                self.stdout.write("  called via " + " <- ".join(group["stack"][1:]))
+            if group["plan"]:
+                self.stdout.write("  plan:")
+                for line in _plan_lines(group["plan"]):
+                    self.stdout.write(f"    {line}")
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-19 02:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0014_alter_location_latitude_alter_location_longitude'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='family',
+            index=models.Index(fields=['is_active', 'first_last_name'], name='family_active_last_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familymember',
+            index=models.Index(fields=['family', 'role'], name='familymember_family_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familymember',
+            index=models.Index(fields=['person', 'family'], name='familymember_person_family_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marriage',
+            index=models.Index(fields=['husband', 'ended_on'], name='marriage_husband_ended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marriage',
+            index=models.Index(fields=['wife', 'ended_on'], name='marriage_wife_ended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['identity_type', 'identity'], name='person_identity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personattributeassignment',
+            index=models.Index(fields=['person', 'ended_on'], name='attr_assign_person_ended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personrelationship',
+            index=models.Index(fields=['person', 'ended_on', 'relationship_type'], name='relationship_person_ended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personrelationship',
+            index=models.Index(fields=['partner', 'ended_on', 'relationship_type'], name='relationship_partner_ended_idx'),
+        ),
+    ]
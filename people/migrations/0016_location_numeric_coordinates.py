@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+import django.core.validators
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+# Frozen copies of people.geo's geohash settings and encoder as of this migration.
+GEOHASH_PRECISION = 9
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def _parse(value, limit):
+    try:
+        number = float(str(value).strip().replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    if not -limit <= number <= limit:
+        return None
+    return Decimal(f"{number:.6f}")
+
+
+def copy_coordinates(apps, schema_editor):
+    Location = apps.get_model("people", "Location")
+    batch = []
+    locations = Location.objects.exclude(latitude__isnull=True, longitude__isnull=True).order_by("pk")
+    for location in locations.iterator(chunk_size=BATCH_SIZE):
+        latitude = _parse(location.latitude, 90)
+        longitude = _parse(location.longitude, 180)
+        if latitude is None or longitude is None:
+            # Keep what could not be read where an editor will find it.
+            unparsed = f"Unparsed coordinates: {location.latitude}, {location.longitude}"
+            location.notes = f"{location.notes}\n{unparsed}" if location.notes else unparsed
+            latitude = longitude = None
+        location.latitude_numeric = latitude
+        location.longitude_numeric = longitude
+        location.geohash = (
+            geohash_encode(float(latitude), float(longitude)) if latitude is not None else None
+        )
+        batch.append(location)
+        if len(batch) >= BATCH_SIZE:
+            Location.objects.bulk_update(batch, ["latitude_numeric", "longitude_numeric", "geohash", "notes"])
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, ["latitude_numeric", "longitude_numeric", "geohash", "notes"])
+
+
+def restore_coordinates(apps, schema_editor):
+    Location = apps.get_model("people", "Location")
+    batch = []
+    locations = Location.objects.exclude(latitude_numeric__isnull=True).order_by("pk")
+    for location in locations.iterator(chunk_size=BATCH_SIZE):
+        location.latitude = str(location.latitude_numeric)
+        location.longitude = str(location.longitude_numeric)
+        batch.append(location)
+        if len(batch) >= BATCH_SIZE:
+            Location.objects.bulk_update(batch, ["latitude", "longitude"])
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, ["latitude", "longitude"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0015_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='latitude_numeric',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='longitude_numeric',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=9, null=True),
+        ),
+        migrations.RunPython(copy_coordinates, restore_coordinates),
+        migrations.RemoveField(
+            model_name='location',
+            name='latitude',
+        ),
+        migrations.RemoveField(
+            model_name='location',
+            name='longitude',
+        ),
+        migrations.RenameField(
+            model_name='location',
+            old_name='latitude_numeric',
+            new_name='latitude',
+        ),
+        migrations.RenameField(
+            model_name='location',
+            old_name='longitude_numeric',
+            new_name='longitude',
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-19 03:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from people.search import NAME_FIELDS, person_tokens
+
+BATCH_SIZE = 500
+
+
+def build_index(apps, schema_editor):
+    Person = apps.get_model("people", "Person")
+    PersonSearchToken = apps.get_model("people", "PersonSearchToken")
+    people = Person.objects.select_related(*(field for field, _ in NAME_FIELDS)).order_by("pk")
+    postings = []
+    for person in people.iterator(chunk_size=BATCH_SIZE):
+        postings.extend(
+            PersonSearchToken(token=token, person_id=person.pk, weight=weight)
+            for token, weight in person_tokens(person).items()
+        )
+        if len(postings) >= 10 * BATCH_SIZE:
+            PersonSearchToken.objects.bulk_create(postings, batch_size=1000)
+            postings = []
+    PersonSearchToken.objects.bulk_create(postings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0016_location_numeric_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=20)),
+                ('weight', models.PositiveSmallIntegerField()),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='people.person')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'person'), name='unique_search_token_per_person')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
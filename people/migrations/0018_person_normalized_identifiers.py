@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-19 03:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0017_person_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='cellphone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='email_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='housephone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='identity_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['identity_normalized', 'identity_type'], name='person_identity_normalized_idx'),
+        ),
+    ]
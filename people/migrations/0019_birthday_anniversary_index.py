@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-19 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def fill_month_days(apps, schema_editor):
+    # One UPDATE per table; the month-days are derived in the database.
+    Person = apps.get_model("people", "Person")
+    Marriage = apps.get_model("people", "Marriage")
+    Person.objects.filter(date_of_birth__isnull=False).update(
+        birth_month_day=ExtractMonth("date_of_birth") * 100 + ExtractDay("date_of_birth")
+    )
+    Marriage.objects.update(
+        married_month_day=ExtractMonth("married_on") * 100 + ExtractDay("married_on")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0018_person_normalized_identifiers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marriage',
+            name='married_month_day',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='birth_month_day',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='marriage',
+            index=models.Index(fields=['ended_on', 'married_month_day'], name='marriage_anniversary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['is_deceased', 'birth_month_day'], name='person_birthday_idx'),
+        ),
+        migrations.RunPython(fill_month_days, migrations.RunPython.noop),
+    ]
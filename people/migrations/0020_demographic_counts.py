@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-19 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0019_birthday_anniversary_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemographicCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.PositiveIntegerField(default=0)),
+                ('dimension', models.CharField(max_length=20)),
+                ('value', models.CharField(blank=True, max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('as_of', models.DateField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'dimension', 'value'), name='unique_demographic_count')],
+            },
+        ),
+    ]
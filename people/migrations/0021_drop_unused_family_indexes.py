@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0020_demographic_counts'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='family',
+            name='family_active_last_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='familymember',
+            name='familymember_person_family_idx',
+        ),
+    ]
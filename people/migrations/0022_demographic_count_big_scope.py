@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0021_drop_unused_family_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='demographiccount',
+            name='scope',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
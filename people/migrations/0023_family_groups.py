@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_family_counts(apps, schema_editor):
+    # Counts used to be scoped by family id; recompute_demographics rebuilds them by group.
+    DemographicCount = apps.get_model('people', 'DemographicCount')
+    DemographicCount.objects.exclude(scope=0).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0022_demographic_count_big_scope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FamilyGroup',
+            fields=[
+                ('family', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='connectivity_group', serialize=False, to='people.family')),
+                ('group', models.PositiveBigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(drop_family_counts, migrations.RunPython.noop),
+    ]
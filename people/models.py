@@ -1,8 +1,13 @@
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import F, Q
 from django.utils import timezone
 
+from .events import month_day
+from .geo import GEOHASH_PRECISION, geohash_encode
+from .identifiers import normalize_email, normalize_identity, normalize_phone
+
 DATING_RELATIONSHIP_CODE = "dating"
 
 # --------------------------
@@ -166,8 +171,29 @@ class Location(models.Model):
         null=True,
         related_name="locations",
     )
-    latitude = models.CharField(max_length=150, blank=True, null=True)
-    longitude = models.CharField(max_length=150, blank=True, null=True)
+    latitude = models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    # Geohash of the coordinates, written just before saving; prefix lookups on it
+    # find the locations in an area.
+    geohash = models.CharField(
+        max_length=GEOHASH_PRECISION,
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+    )
     google_maps_url = models.URLField(blank=True, null=True)
     waze_url = models.URLField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
@@ -181,6 +207,15 @@ class Location(models.Model):
             return f"{self.latitude}, {self.longitude}"
         return "Location"
 
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return geohash_encode(float(self.latitude), float(self.longitude))
+
+    def save(self, *args, **kwargs):
+        self.geohash = self.compute_geohash()
+        super().save(*args, **kwargs)
+
 class SocialNetworkPlatform(models.Model):
     code = models.CharField(max_length=30, unique=True)   # e.g., facebook, instagram
     name = models.CharField(max_length=100)
@@ -373,7 +408,14 @@ class Person(models.Model):
     email = models.EmailField(blank=True, null=True)
     cellphone = models.CharField(max_length=50, blank=True, null=True)
     housephone = models.CharField(max_length=50, blank=True, null=True)
+    # Lookup forms of the identifiers above, written just before saving (see people.identifiers).
+    email_normalized = models.CharField(max_length=254, blank=True, null=True, db_index=True, editable=False)
+    cellphone_normalized = models.CharField(max_length=20, blank=True, null=True, db_index=True, editable=False)
+    housephone_normalized = models.CharField(max_length=20, blank=True, null=True, db_index=True, editable=False)
+    identity_normalized = models.CharField(max_length=100, blank=True, null=True, editable=False)
     date_of_birth = models.DateField(blank=True, null=True)
+    # Month and day of date_of_birth (see people.events.month_day), for birthday windows.
+    birth_month_day = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
     is_deceased = models.BooleanField(default=False)
     date_of_death = models.DateField(blank=True, null=True)
     cause_of_death = models.ForeignKey(
@@ -444,12 +486,45 @@ class Person(models.Model):
     created_date = models.DateField(default=timezone.now, blank=True, null=True)
     last_updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("identity_type", "identity"), name="person_identity_idx"),
+            models.Index(
+                fields=("identity_normalized", "identity_type"), name="person_identity_normalized_idx"
+            ),
+            models.Index(fields=("is_deceased", "birth_month_day"), name="person_birthday_idx"),
+        ]
+
     def __str__(self):
         first = self.first_name.value if self.first_name_id else ""
         last = self.last_name.value if self.last_name_id else ""
         return f"{first} {last}".strip()
 
+    def normalize_identifiers(self) -> list[str]:
+        """Fill the *_normalized fields; returns the names of those that changed."""
+        normalized = {
+            "email_normalized": normalize_email(self.email),
+            "cellphone_normalized": normalize_phone(self.cellphone),
+            "housephone_normalized": normalize_phone(self.housephone),
+            "identity_normalized": normalize_identity(self.identity),
+        }
+        changed = [field for field, value in normalized.items() if getattr(self, field) != value]
+        for field in changed:
+            setattr(self, field, normalized[field])
+        return changed
+
+    def save(self, *args, **kwargs):
+        changed = self.normalize_identifiers()
+        birth_month_day = month_day(self.date_of_birth)
+        if self.birth_month_day != birth_month_day:
+            self.birth_month_day = birth_month_day
+            changed.append("birth_month_day")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and changed:
+            kwargs["update_fields"] = {*update_fields, *changed}
+        super().save(*args, **kwargs)
+
     def get_family_members(self, role_codes=None):
         """
         Return a queryset of the person's relatives within shared families.
@@ -885,6 +960,8 @@ class Marriage(models.Model):
     husband = models.ForeignKey(Person, on_delete=models.CASCADE,related_name="marriages_as_husband")
     wife = models.ForeignKey(Person,on_delete=models.CASCADE,related_name="marriages_as_wife")
     married_on = models.DateField()
+    # Month and day of married_on, for anniversary windows.
+    married_month_day = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
     ended_on = models.DateField(blank=True, null=True)
     end_reason = models.ForeignKey(MarriageEndReason,on_delete=models.SET_NULL,blank=True,null=True,related_name="marriages",)
     notes = models.TextField(blank=True, null=True)
@@ -905,6 +982,20 @@ class Marriage(models.Model):
                 name="unique_active_marriage_wife",
             ),
         ]
+        indexes = [
+            models.Index(fields=("husband", "ended_on"), name="marriage_husband_ended_idx"),
+            models.Index(fields=("wife", "ended_on"), name="marriage_wife_ended_idx"),
+            models.Index(fields=("ended_on", "married_month_day"), name="marriage_anniversary_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        married_month_day = month_day(self.married_on)
+        if self.married_month_day != married_month_day:
+            self.married_month_day = married_month_day
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "married_month_day"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.husband} & {self.wife} ({self.married_on:%Y-%m-%d})"
@@ -949,6 +1040,16 @@ class PersonRelationship(models.Model):
                 name="unique_active_relationship_pair",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=("person", "ended_on", "relationship_type"),
+                name="relationship_person_ended_idx",
+            ),
+            models.Index(
+                fields=("partner", "ended_on", "relationship_type"),
+                name="relationship_partner_ended_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if self.person_id and self.partner_id and self.person_id > self.partner_id:
@@ -992,6 +1093,9 @@ class PersonAttributeAssignment(models.Model):
                 name="unique_active_attribute_per_person",
             ),
         ]
+        indexes = [
+            models.Index(fields=("person", "ended_on"), name="attr_assign_person_ended_idx"),
+        ]
 
     def __str__(self):
         status = "ended" if self.ended_on else "current"
@@ -1077,9 +1181,89 @@ class FamilyMember(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=("family", "role"), name="familymember_family_role_idx"),
+        ]
+
     def __str__(self):
         return f"{self.person} - {self.role} of {self.family}"
     
 
 
 
+
+
+# --------------------------
+# Search index
+# --------------------------
+
+class PersonSearchToken(models.Model):
+    """
+    One posting of the people search index (see `people.search`): `person`
+    has a word starting with `token` (accent-folded, lowercase) in a name,
+    nickname, email, phone or identity number. `weight` ranks the match.
+    """
+
+    token = models.CharField(max_length=20)
+    person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name="search_tokens")
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("token", "person"), name="unique_search_token_per_person"),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.person_id}"
+
+
+# --------------------------
+# Demographic summaries
+# --------------------------
+
+class FamilyGroup(models.Model):
+    """
+    The connectivity group of an active family: the families linked to it
+    through shared members, as the full family tree walks them. `group` is
+    the smallest family id in it. Written by `people.demographics`; rows of
+    deleted families are left for it to clean up, so there is no constraint.
+    """
+
+    family = models.OneToOneField(
+        Family,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_constraint=False,
+        related_name="connectivity_group",
+    )
+    group = models.PositiveBigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.family_id} in {self.group}"
+
+
+class DemographicCount(models.Model):
+    """
+    How many active people of `scope` have `value` for `dimension` (see
+    `people.demographics`). Scope 0 counts everyone; any other scope is a
+    `FamilyGroup.group`, counting the people in its active families once.
+    Kept current by signals and rebuilt by the recompute_demographics
+    command; ages are as of `as_of`.
+    """
+
+    scope = models.PositiveBigIntegerField(default=0)
+    dimension = models.CharField(max_length=20)
+    value = models.CharField(max_length=20, blank=True)
+    count = models.IntegerField(default=0)
+    as_of = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("scope", "dimension", "value"), name="unique_demographic_count"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.dimension}={self.value} ({self.count})"
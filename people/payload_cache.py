@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from sevenawesome_app_services.db_routers import reading_from_replica
+from sevenawesome_app_services.metrics import record_cache_lookup
+
+VERSION_KEY = "people-data-version"
+PAYLOAD_KEY = "people:{name}:{version}:{params}"
+
+
+def _config() -> dict:
+    return settings.PEOPLE_CACHE
+
+
+def _cache():
+    return caches[_config()["CACHE_ALIAS"]]
+
+
+def bump_data_version():
+    """
+    Orphan every cached payload by moving to a new data version. Versions are
+    the current time in nanoseconds, so one evicted from the cache is never reused.
+    """
+    _cache().set(VERSION_KEY, time.time_ns(), None)
+
+
+def _bump_on_commit(sender, using=None, **kwargs):
+    # Bumping before the commit would let a concurrent build cache the old rows under the new version.
+    transaction.on_commit(bump_data_version, using=using)
+
+
+# Models no cached payload is built from.
+UNCACHED_MODELS = ("people.personsearchtoken", "people.demographiccount", "people.familygroup")
+
+
+def connect_invalidation_signals():
+    """Invalidate the cached payloads whenever a row of a people model is saved or deleted."""
+    for model in apps.get_app_config("people").get_models():
+        if model._meta.label_lower in UNCACHED_MODELS:
+            # Also keeps their bulk deletes free of per-row signals.
+            continue
+        uid = f"people-payload-cache:{model._meta.label_lower}"
+        post_save.connect(_bump_on_commit, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_on_commit, sender=model, dispatch_uid=uid)
+
+
+def _format_key(name: str, params: tuple, version: int) -> str:
+    return PAYLOAD_KEY.format(name=name, version=version, params=":".join(map(str, params)))
+
+
+def data_version() -> int:
+    """The current data version; it changes after every committed write to a people row."""
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def adata_version() -> int:
+    cache = _cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def payload_key(name: str, params: tuple) -> str | None:
+    """
+    The cache key of the `name` payload for `params` at the current data
+    version, or None when the cache is disabled. Read it before building the
+    payload, so a write committed during the build leaves the result orphaned.
+    """
+    if not _config()["ENABLED"]:
+        return None
+    return _format_key(name, params, data_version())
+
+
+async def apayload_key(name: str, params: tuple) -> str | None:
+    if not _config()["ENABLED"]:
+        return None
+    return _format_key(name, params, await adata_version())
+
+
+def get_payload(key: str | None) -> bytes | None:
+    if key is None:
+        return None
+    body = _cache().get(key)
+    record_cache_lookup("people_payloads", body is not None)
+    return body
+
+
+async def aget_payload(key: str | None) -> bytes | None:
+    if key is None:
+        return None
+    body = await _cache().aget(key)
+    record_cache_lookup("people_payloads", body is not None)
+    return body
+
+
+def store_payload(key: str | None, body: bytes):
+    """
+    Cache a rendered payload for `PEOPLE_CACHE["TIMEOUT"]` seconds. Payloads
+    read from a replica are not cached: the replica may not have caught up
+    with the write that set the current version.
+    """
+    if key is not None and not reading_from_replica():
+        _cache().set(key, body, _config()["TIMEOUT"])
+
+
+async def astore_payload(key: str | None, body: bytes):
+    if key is not None and not reading_from_replica():
+        await _cache().aset(key, body, _config()["TIMEOUT"])
+
+
+def is_cached(key: str) -> bool:
+    return _cache().has_key(key)
+
+
+class RequestTracker:
+    """
+    How often each payload was asked for in this process. `decay()` halves
+    the counts, so payloads hot right now outrank ones that used to be.
+    """
+
+    def __init__(self):
+        self._counts: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, params: tuple):
+        with self._lock:
+            self._counts.setdefault(name, Counter())[params] += 1
+
+    def hottest(self, name: str, limit: int) -> list[tuple]:
+        with self._lock:
+            return [params for params, _ in self._counts.get(name, Counter()).most_common(limit)]
+
+    def decay(self):
+        with self._lock:
+            for name, counts in self._counts.items():
+                self._counts[name] = Counter(
+                    {params: count // 2 for params, count in counts.items() if count > 1}
+                )
+
+
+tracker = RequestTracker()
+
+
+def record_request(name: str, params: tuple):
+    """Count a request for the warmer, and start it on first use when enabled."""
+    tracker.record(name, params)
+    if _config()["WARMER_ENABLED"]:
+        from .warmer import get_warmer
+
+        get_warmer().start()
@@ -0,0 +1,168 @@
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_save, pre_save
+
+from .models import LastName, Nickname, Person, PersonName, PersonSearchToken
+
+# Shortest prefix indexed and searched; one-letter prefixes would match most people.
+MIN_PREFIX = 2
+# Longest token stored (PersonSearchToken.token); longer words are matched on their start.
+MAX_TOKEN_LENGTH = 20
+# Query words beyond this many are ignored.
+MAX_QUERY_TERMS = 8
+REINDEX_BATCH_SIZE = 500
+
+# Person foreign keys to the name catalogs, and how much a match on them weighs.
+NAME_FIELDS = (
+    ("first_name", 10),
+    ("last_name", 10),
+    ("second_name", 8),
+    ("second_last_name", 8),
+    ("nickname", 6),
+)
+# Person text fields; their separators are optional when searching ("809-555" or "809555").
+CONTACT_FIELDS = (
+    ("identity", 9),
+    ("cellphone", 4),
+    ("housephone", 4),
+    ("email", 4),
+)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase `text` and strip its accents, so "Núñez" and "nunez" are the same word."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def words(text: str | None) -> list[str]:
+    return _WORD.findall(fold(text)) if text else []
+
+
+def _add_word(tokens: dict, word: str, weight: int):
+    word = word[:MAX_TOKEN_LENGTH]
+    for end in range(MIN_PREFIX, len(word) + 1):
+        # A whole word outranks a word that merely starts with the search term.
+        prefix_weight = weight * 2 if end == len(word) else weight
+        prefix = word[:end]
+        if tokens.get(prefix, 0) < prefix_weight:
+            tokens[prefix] = prefix_weight
+
+
+def person_tokens(person) -> dict[str, int]:
+    """The postings of `person`: every prefix n-gram of its words, with its best weight."""
+    tokens: dict[str, int] = {}
+    for field, weight in NAME_FIELDS:
+        name = getattr(person, field)
+        if name is not None:
+            for word in words(name.value):
+                _add_word(tokens, word, weight)
+    for field, weight in CONTACT_FIELDS:
+        value = getattr(person, field)
+        if field == "email" and value:
+            # Only the mailbox: domain words like "gmail" or "com" would match almost everyone.
+            value = value.partition("@")[0]
+        parts = words(value)
+        for word in parts:
+            _add_word(tokens, word, weight)
+        if len(parts) > 1 and field != "email":
+            _add_word(tokens, "".join(parts), weight)
+    return tokens
+
+
+def person_postings(person) -> list[tuple[str, int, int]]:
+    """(token, person id, weight) rows of `person`; reads its name rows unless they are cached on it."""
+    return [(token, person.pk, weight) for token, weight in person_tokens(person).items()]
+
+
+def insert_postings(postings: list[tuple[str, int, int]]):
+    """Insert posting rows with one executemany, skipping model instances for the large batches."""
+    if not postings:
+        return
+    quote = connection.ops.quote_name
+    table = quote(PersonSearchToken._meta.db_table)
+    columns = ", ".join(
+        quote(PersonSearchToken._meta.get_field(field).column) for field in ("token", "person", "weight")
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s)", postings)
+
+
+def index_people(person_ids, batch_size: int = REINDEX_BATCH_SIZE) -> int:
+    """Rebuild the postings of the given people; returns how many postings were written."""
+    person_ids = list(person_ids)
+    written = 0
+    for start in range(0, len(person_ids), batch_size):
+        batch = person_ids[start:start + batch_size]
+        people = Person.objects.filter(pk__in=batch).select_related(*(field for field, _ in NAME_FIELDS))
+        postings = [posting for person in people for posting in person_postings(person)]
+        with transaction.atomic():
+            PersonSearchToken.objects.filter(person__in=batch).delete()
+            insert_postings(postings)
+        written += len(postings)
+    return written
+
+
+def search_people(query: str):
+    """
+    Rank the active people having every word of `query` as a word prefix:
+    the posting lists of the query's tokens are intersected with a GROUP BY
+    on the person, and scored by the sum of the matched weights. Returns
+    `{"person": id, "score": n}` rows, best first.
+    """
+    # Emails are indexed by their mailbox only, so a typed address is matched on it.
+    query_words = [word for part in query.split() for word in words(part.partition("@")[0])]
+    terms = sorted(
+        {word[:MAX_TOKEN_LENGTH] for word in query_words if len(word) >= MIN_PREFIX}
+    )[:MAX_QUERY_TERMS]
+    if not terms:
+        return PersonSearchToken.objects.none().values("person")
+    return (
+        PersonSearchToken.objects.filter(token__in=terms, person__is_active=True)
+        .values("person")
+        .annotate(matched=Count("token"), score=Sum("weight"))
+        .filter(matched=len(terms))
+        .order_by("-score", "person")
+    )
+
+
+def _reindex_person(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None:
+        indexed = {field for field, _ in NAME_FIELDS + CONTACT_FIELDS}
+        if not indexed & {field.removesuffix("_id") for field in update_fields}:
+            return
+    index_people([instance.pk])
+
+
+def _note_catalog_change(sender, instance, raw=False, **kwargs):
+    instance._search_value_changed = (
+        not raw
+        and instance.pk is not None
+        and not sender.objects.filter(pk=instance.pk, value=instance.value).exists()
+    )
+
+
+def _reindex_catalog_people(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw or not getattr(instance, "_search_value_changed", False):
+        return
+    referencing = Q()
+    for field, _ in NAME_FIELDS:
+        if Person._meta.get_field(field).related_model is sender:
+            referencing |= Q(**{field: instance})
+    index_people(Person.objects.filter(referencing).values_list("pk", flat=True))
+
+
+def connect_search_index_signals():
+    """Keep the search index in step with people and with renamed catalog entries."""
+    post_save.connect(_reindex_person, sender=Person, dispatch_uid="people-search-index:person")
+    for catalog in (PersonName, LastName, Nickname):
+        uid = f"people-search-index:{catalog._meta.model_name}"
+        pre_save.connect(_note_catalog_change, sender=catalog, dispatch_uid=uid)
+        post_save.connect(_reindex_catalog_people, sender=catalog, dispatch_uid=uid)
@@ -6,6 +6,7 @@ from typing import Iterable
 from django.utils import timezone
 from rest_framework import serializers
 
+from .geo import coordinate_string
 from .models import Family, FamilyMember, Person, PersonRelationship
 
 
@@ -56,8 +57,8 @@ def _location_payload(location) -> dict | None:
         "city": location.city.name if location.city_id else None,
         "state": location.state.name if location.state_id else None,
         "country": location.country.name if location.country_id else None,
-        "latitude": location.latitude,
-        "longitude": location.longitude,
+        "latitude": coordinate_string(location.latitude),
+        "longitude": coordinate_string(location.longitude),
         "google_maps_url": location.google_maps_url,
         "waze_url": location.waze_url,
     }
@@ -105,7 +106,7 @@ class PersonRelationshipSerializer(serializers.ModelSerializer):
     relationship_type = serializers.SerializerMethodField()
     partner = serializers.SerializerMethodField()
     relationship_years = serializers.SerializerMethodField()
-    is_current = serializers.BooleanField(source="is_current", read_only=True)
+    is_current = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = PersonRelationship
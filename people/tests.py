@@ -1,3 +1,249 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import demographics
+from .events import month_day_filter
+from .geo import covering_cells, geohash_encode, haversine_km
+from .identifiers import normalize_email, normalize_identity, normalize_phone
+from .models import (
+    DemographicCount,
+    Family,
+    FamilyGroup,
+    FamilyMember,
+    FamilyRole,
+    Gender,
+    LastName,
+    Person,
+    PersonName,
+)
+from .search import fold, search_people
+
+
+def create_person(first_name, last_name, **fields):
+    gender = Gender.objects.get_or_create(code="M", defaults={"label": "Male"})[0]
+    return Person.objects.create(
+        first_name=PersonName.objects.get_or_create(value=first_name)[0],
+        last_name=LastName.objects.get_or_create(value=last_name)[0],
+        gender=gender,
+        **fields,
+    )
+
+
+class NormalizeIdentifiersTests(SimpleTestCase):
+    @override_settings(PHONE_DEFAULT_COUNTRY_CODE="1")
+    def test_phone_formats_share_one_form(self):
+        for value in ("809-555-1234", "(809) 555-1234", "+1 809 555 1234", "18095551234", "001 809 555 1234"):
+            with self.subTest(value=value):
+                self.assertEqual(normalize_phone(value), "+18095551234")
+
+    @override_settings(PHONE_DEFAULT_COUNTRY_CODE="1")
+    def test_phone_lengths_outside_the_plan_are_kept(self):
+        self.assertEqual(normalize_phone("555-1234"), "+5551234")
+        self.assertEqual(normalize_phone("+34 912 345 678"), "+34912345678")
+
+    @override_settings(PHONE_DEFAULT_COUNTRY_CODE="34")
+    def test_phone_gets_other_default_country_code(self):
+        self.assertEqual(normalize_phone("912 345 678"), "+34912345678")
+
+    def test_phone_too_short_or_empty(self):
+        self.assertIsNone(normalize_phone("555-12"))
+        self.assertIsNone(normalize_phone("  "))
+        self.assertIsNone(normalize_phone(None))
+
+    def test_email(self):
+        self.assertEqual(normalize_email("  Maria.Perez@Example.COM "), "maria.perez@example.com")
+        self.assertIsNone(normalize_email("   "))
+        self.assertIsNone(normalize_email(None))
+
+    def test_identity(self):
+        self.assertEqual(normalize_identity("001-1234567-8"), "00112345678")
+        self.assertEqual(normalize_identity("ab 12_34.c"), "AB1234C")
+        self.assertIsNone(normalize_identity("--"))
+        self.assertIsNone(normalize_identity(None))
+
+
+class MonthDayFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.born = {
+            day: create_person(f"Person {day}", "Birthday", date_of_birth=day).pk
+            for day in (
+                date(1990, 12, 30),
+                date(1985, 1, 2),
+                date(1970, 6, 15),
+                date(2000, 2, 28),
+                date(2000, 2, 29),
+                date(1999, 3, 1),
+            )
+        }
+
+    def matching(self, start, end):
+        people = Person.objects.filter(month_day_filter("birth_month_day", start, end))
+        return set(people.values_list("pk", flat=True))
+
+    def born_on(self, *days):
+        return {self.born[day] for day in days}
+
+    def test_window_within_a_year(self):
+        self.assertEqual(
+            self.matching(date(2025, 6, 1), date(2025, 6, 30)), self.born_on(date(1970, 6, 15))
+        )
+
+    def test_window_wrapping_into_next_year(self):
+        self.assertEqual(
+            self.matching(date(2025, 12, 25), date(2026, 1, 5)),
+            self.born_on(date(1990, 12, 30), date(1985, 1, 2)),
+        )
+
+    def test_leap_day_falls_on_february_28_in_common_years(self):
+        self.assertEqual(
+            self.matching(date(2025, 2, 28), date(2025, 2, 28)),
+            self.born_on(date(2000, 2, 28), date(2000, 2, 29)),
+        )
+
+    def test_leap_day_stays_on_february_29_in_leap_years(self):
+        self.assertEqual(
+            self.matching(date(2028, 2, 28), date(2028, 2, 28)), self.born_on(date(2000, 2, 28))
+        )
+        self.assertEqual(
+            self.matching(date(2028, 2, 29), date(2028, 3, 1)),
+            self.born_on(date(2000, 2, 29), date(1999, 3, 1)),
+        )
+
+
+class GeoTests(SimpleTestCase):
+    def test_haversine_km(self):
+        santo_domingo, santiago = (18.4861, -69.9312), (19.4517, -70.6970)
+        distances = haversine_km(*santo_domingo, [santo_domingo, santiago, (-18.4861, 110.0688)])
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], 134, delta=2)
+        # The antipode is half the earth's circumference away.
+        self.assertAlmostEqual(distances[2], 20015, delta=1)
+
+    def test_covering_cells_contain_points_in_the_circle(self):
+        cells = covering_cells(18.4861, -69.9312, 5)
+        self.assertLessEqual(len(cells), 16)
+        for point in ((18.4861, -69.9312), (18.52, -69.95), (18.45, -69.90)):
+            self.assertTrue(any(geohash_encode(*point).startswith(cell) for cell in cells), point)
+
+    def test_covering_cells_wrap_around_the_antimeridian(self):
+        cells = covering_cells(0.0, 179.99, 20)
+        for point in ((0.0, 179.99), (0.05, 179.9), (0.0, -179.9), (-0.1, -179.95)):
+            self.assertTrue(any(geohash_encode(*point).startswith(cell) for cell in cells), point)
+        self.assertFalse(any(geohash_encode(0.0, 0.0).startswith(cell) for cell in cells))
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.jose = create_person("José", "Núñez").pk
+        cls.josefina = create_person("Josefina", "Pérez").pk
+        cls.pedro = create_person("Pedro", "Nuñez", is_active=False).pk
+
+    def ranked(self, query):
+        return [row["person"] for row in search_people(query)]
+
+    def test_fold(self):
+        self.assertEqual(fold("Núñez Pérez"), "nunez perez")
+
+    def test_whole_word_outranks_prefix(self):
+        self.assertEqual(self.ranked("jose"), [self.jose, self.josefina])
+        self.assertEqual(self.ranked("jos"), [self.jose, self.josefina])
+
+    def test_accents_are_optional(self):
+        self.assertEqual(self.ranked("nunez"), [self.jose])
+        self.assertEqual(self.ranked("JOSÉ NÚÑ"), [self.jose])
+        self.assertEqual(self.ranked("perez jo"), [self.josefina])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.ranked("josefina nunez"), [])
+
+    def test_short_words_are_ignored(self):
+        self.assertEqual(self.ranked("j"), [])
+
+    def test_renamed_catalog_entry_is_reindexed(self):
+        name = PersonName.objects.get(value="Josefina")
+        name.value = "Josefa"
+        name.save()
+        self.assertEqual(self.ranked("josefina"), [])
+        self.assertEqual(self.ranked("josefa"), [self.josefina])
+
+
+class DemographicsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("generate_people", persons=80, seed=7, first_names=30, last_names=30, verbosity=0)
+
+    def counts(self):
+        return {
+            (row.scope, row.dimension, row.value): row.count
+            for row in DemographicCount.objects.filter(count__gt=0)
+        }
+
+    def groups(self):
+        return dict(FamilyGroup.objects.values_list("family", "group"))
+
+    def assert_matches_recompute(self):
+        incremental, incremental_groups = self.counts(), self.groups()
+        demographics.recompute(demographics.current_as_of())
+        self.assertEqual(incremental_groups, self.groups())
+        self.assertEqual(incremental, self.counts())
+
+    def test_group_is_smallest_family_id(self):
+        for family_id, group in self.groups().items():
+            self.assertLessEqual(group, family_id)
+            self.assertEqual(self.groups()[group], group)
+
+    def test_changes_match_recompute(self):
+        role = FamilyRole.objects.first()
+        groups = self.groups()
+        person = Person.objects.filter(family_memberships__isnull=False).first()
+        own_groups = {groups[family] for family in person.family_memberships.values_list("family", flat=True)}
+        other = next(family for family, group in groups.items() if group not in own_groups)
+        with self.captureOnCommitCallbacks(execute=True):
+            # Joins two groups, then changes a counted field of someone in both.
+            FamilyMember.objects.create(person=person, family_id=other, role=role)
+        with self.captureOnCommitCallbacks(execute=True):
+            person.is_deceased = not person.is_deceased
+            person.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            membership = FamilyMember.objects.exclude(family_id=other).last()
+            membership.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            family = Family.objects.filter(is_active=True).last()
+            family.is_active = False
+            family.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Person.objects.exclude(pk=person.pk).first().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            Family.objects.create()
+        self.assert_matches_recompute()
+
+
+class GeneratePeopleTests(TestCase):
+    def generated(self, seed):
+        """The people a seeded run creates, without ids; the run is rolled back."""
+        with transaction.atomic():
+            call_command("generate_people", persons=40, seed=seed, first_names=20, last_names=20, verbosity=0)
+            people = list(
+                Person.objects.order_by("pk").values_list(
+                    "first_name__value", "last_name__value", "date_of_birth", "cellphone_normalized"
+                )
+            )
+            families = Family.objects.count()
+            searchable = search_people(people[0][0]).count()
+            totals = DemographicCount.objects.filter(scope=demographics.OVERALL, dimension="total")
+            self.assertEqual(totals.get().count, Person.objects.filter(is_active=True).count())
+            transaction.set_rollback(True)
+        return people, families, searchable
+
+    def test_seeded_run(self):
+        people, families, searchable = self.generated(seed=3)
+        self.assertGreaterEqual(len(people), 40)
+        self.assertGreater(families, 0)
+        self.assertGreater(searchable, 0)
+        self.assertEqual(self.generated(seed=3), (people, families, searchable))
+        self.assertNotEqual(self.generated(seed=4)[0], people)
@@ -0,0 +1,110 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.http import Http404
+from rest_framework.renderers import JSONRenderer
+
+from sevenawesome_app_services.throttling import slots_in_use
+
+from .api import FamilyFullTreeAPIView, PeopleTablesDataAPIView
+from .payload_cache import is_cached, payload_key, store_payload, tracker
+
+logger = logging.getLogger("sevenawesome.warmer")
+
+
+def build_family_tree(pk, include_inactive: bool) -> bytes:
+    """The body `FamilyFullTreeAPIView` returns for application/json."""
+    return JSONRenderer().render(FamilyFullTreeAPIView()._build_tree(pk, include_inactive))
+
+
+def build_tables(include_inactive: bool) -> bytes:
+    """The body `PeopleTablesDataAPIView` returns for application/json, one export at a time."""
+    exports = PeopleTablesDataAPIView()._table_exports(not include_inactive)
+    return JSONRenderer().render({key: export() for key, export in exports})
+
+
+BUILDERS = {
+    "tables": build_tables,
+    "family-tree": build_family_tree,
+}
+
+
+class CacheWarmer:
+    """
+    Keep the catalog export and the `top_families` most requested family trees
+    of this process in the payload cache. Every `interval` seconds a background
+    thread rebuilds whichever of them are missing, which after an invalidation
+    is all of them. It builds one payload at a time on its own connection,
+    waits `pause` seconds between builds, gives up the round as soon as a live
+    request is building a tree, and closes its connection after every round.
+    """
+
+    def __init__(self, interval: float, top_families: int, pause: float):
+        self.interval = interval
+        self.top_families = top_families
+        self.pause = pause
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                # Started on first use, so preforking servers start it in each worker.
+                self._thread = threading.Thread(target=self._run, name="people-cache-warmer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def targets(self) -> list[tuple[str, tuple]]:
+        targets = [("tables", (False,))]
+        targets += [("tables", params) for params in tracker.hottest("tables", 2) if params != (False,)]
+        targets += [("family-tree", params) for params in tracker.hottest("family-tree", self.top_families)]
+        return targets
+
+    def warm(self) -> int:
+        """Build the missing payloads; returns how many were stored."""
+        warmed = 0
+        for name, params in self.targets():
+            if self._stopped.is_set() or slots_in_use("tree"):
+                break
+            key = payload_key(name, params)
+            if key is None or is_cached(key):
+                continue
+            try:
+                body = BUILDERS[name](*params)
+            except Http404:
+                continue
+            store_payload(key, body)
+            warmed += 1
+            if self._stopped.wait(self.pause):
+                break
+        return warmed
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.warm()
+            except Exception:
+                logger.exception("Cache warming round failed")
+            finally:
+                connection.close()
+            tracker.decay()
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def get_warmer() -> CacheWarmer:
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            config = settings.PEOPLE_CACHE
+            _warmer = CacheWarmer(config["WARM_INTERVAL"], config["TOP_FAMILIES"], config["PAUSE"])
+    return _warmer
@@ -1,4 +1,9 @@
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.serializers import (
     TokenObtainPairSerializer,
     TokenRefreshSerializer,
@@ -8,6 +13,13 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import Token
+
+from .authentication import add_user_claims
+from .instrumentation import timed
+from .last_login import record_login
+from .revocation import RevocableRefreshToken, revoke
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
 
 
 def _duration_breakdown(duration):
@@ -55,13 +67,24 @@ class TokenResponseFormatter:
 
 
 class CustomTokenObtainPairSerializer(TokenResponseFormatter, TokenObtainPairSerializer):
+    token_class = RevocableRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        add_user_claims(token, user)
+        return token
+
     def validate(self, attrs):
-        data = super().validate(attrs)
+        with timed("auth"):
+            data = super().validate(attrs)
+        record_login(self.user)
         data.setdefault("token_type", "Bearer")
         return self._format_response(data)
 
 
 class CustomTokenRefreshSerializer(TokenResponseFormatter, TokenRefreshSerializer):
+    token_class = RevocableRefreshToken
     refresh_token = serializers.CharField(
         write_only=True,
         required=False,
@@ -72,14 +95,40 @@ class CustomTokenRefreshSerializer(TokenResponseFormatter, TokenRefreshSerialize
         refresh_token = attrs.pop("refresh_token", None)
         if refresh_token and not attrs.get("refresh"):
             attrs["refresh"] = refresh_token
-        data = super().validate(attrs)
+        with timed("auth"):
+            data = super().validate(attrs)
         data.setdefault("token_type", "Bearer")
         return self._format_response(data)
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    # Each attempt costs a full password hash; refuse bursts before hashing.
+    throttle_classes = (LoginIPThrottle, LoginUsernameThrottle)
 
 
 class CustomTokenRefreshView(TokenRefreshView):
     serializer_class = CustomTokenRefreshSerializer
+
+
+class TokenRevokeView(APIView):
+    """
+    Log out: revoke the access token the request is authenticated with and,
+    when given, the caller's refresh token (`refresh` or `refresh_token`).
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        raw_refresh = request.data.get("refresh") or request.data.get("refresh_token")
+        if raw_refresh:
+            try:
+                refresh = RevocableRefreshToken(raw_refresh)
+            except TokenError as exc:
+                raise ValidationError({"refresh": [str(exc)]})
+            if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                raise PermissionDenied("The refresh token belongs to another user.")
+            revoke(refresh)
+        if isinstance(request.auth, Token):
+            revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,328 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .metrics import record_cache_lookup
+from .revocation import ais_revoked, is_revoked
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication usable from async views: token validation is pure CPU
+    work, and the user row is loaded through the async ORM.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+USER_CACHE_KEY = "jwt-user:{user_id}"
+USER_VERSION_KEY = "jwt-user-version:{user_id}"
+# Bumped when a change can affect every user (group permissions).
+GLOBAL_VERSION_KEY = "jwt-user-version"
+# Reverse one-to-one from the user model to its `people.Person`.
+PROFILE_RELATION = "person_profile"
+
+
+def _user_cache():
+    return caches[settings.JWT_USER["CACHE_ALIAS"]]
+
+
+def bump_user_version(user_id=None):
+    """
+    Invalidate the cached user `user_id` (every cached user when None) by
+    giving it a new version stamp.
+    """
+    key = GLOBAL_VERSION_KEY if user_id is None else USER_VERSION_KEY.format(user_id=user_id)
+    _user_cache().set(key, uuid.uuid4().hex, timeout=None)
+
+
+def _current_stamp(cache, found: dict, user_id) -> tuple[str, str]:
+    stamp = []
+    for key in (USER_VERSION_KEY.format(user_id=user_id), GLOBAL_VERSION_KEY):
+        value = found.get(key)
+        if value is None:
+            value = uuid.uuid4().hex
+            if not cache.add(key, value, timeout=None):
+                value = cache.get(key)
+        stamp.append(value)
+    return tuple(stamp)
+
+
+def _lookup_keys(user_id) -> list[str]:
+    return [
+        USER_CACHE_KEY.format(user_id=user_id),
+        USER_VERSION_KEY.format(user_id=user_id),
+        GLOBAL_VERSION_KEY,
+    ]
+
+
+def _fresh_entry(found: dict, user_id) -> dict | None:
+    entry = found.get(USER_CACHE_KEY.format(user_id=user_id))
+    stamp = (found.get(USER_VERSION_KEY.format(user_id=user_id)), found.get(GLOBAL_VERSION_KEY))
+    hit = entry is not None and None not in stamp and entry["version"] == stamp
+    record_cache_lookup("jwt_user", hit)
+    return entry if hit else None
+
+
+class ClaimsUser(TokenUser):
+    """A `TokenUser` that also exposes the `person_profile_id` claim."""
+
+    @property
+    def person_profile_id(self):
+        return self.token.get("person_profile_id")
+
+
+def add_user_claims(token, user):
+    """Claims the stateless mode builds its user from; added when tokens are issued."""
+    token["username"] = user.get_username()
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    related = user._meta.get_field(PROFILE_RELATION)
+    token["person_profile_id"] = (
+        related.related_model._default_manager.filter(**{related.field.name: user})
+        .values_list("pk", flat=True)
+        .first()
+    )
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """
+    JWT authentication that does not load the user row on every request.
+
+    With `JWT_USER["MODE"] = "cache"` the user's columns (without the password)
+    and the id of its person profile are kept in the cache, together with the
+    user's version stamp; `bump_user_version` (connected to user, group and
+    profile changes) makes the entry stale. The password is only kept as the
+    hash the revoke-token check compares against. Users rebuilt from the cache
+    have `password` deferred, so saving them does not overwrite it.
+
+    With "stateless" the user is a `ClaimsUser` built from the token alone:
+    no database or cache access, but a deactivated user keeps access until
+    their token expires. "database" behaves like `JWTAuthentication`.
+    Either way, `request.user.person_profile_id` is available, and tokens
+    revoked through `revocation.revoke` are refused.
+    """
+
+    def get_user(self, validated_token):
+        if is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken(_("Token is revoked"))
+        mode = settings.JWT_USER["MODE"]
+        if mode == "stateless":
+            return self._claims_user(validated_token)
+        if mode != "cache":
+            return self._database_user(validated_token)
+
+        user_id = self._user_id(validated_token)
+        found = _user_cache().get_many(_lookup_keys(user_id))
+        entry = _fresh_entry(found, user_id)
+        if entry is None:
+            entry = self._refresh_entry(found, user_id)
+        return self._checked(self._from_entry(entry), validated_token, entry["password_hash"])
+
+    async def aget_user(self, validated_token):
+        if await ais_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken(_("Token is revoked"))
+        mode = settings.JWT_USER["MODE"]
+        if mode == "stateless":
+            return self._claims_user(validated_token)
+        if mode != "cache":
+            return await sync_to_async(self._database_user)(validated_token)
+
+        user_id = self._user_id(validated_token)
+        found = await _user_cache().aget_many(_lookup_keys(user_id))
+        entry = _fresh_entry(found, user_id)
+        if entry is None:
+            entry = await sync_to_async(self._refresh_entry)(found, user_id)
+        return self._checked(self._from_entry(entry), validated_token, entry["password_hash"])
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _claims_user(self, validated_token):
+        self._user_id(validated_token)
+        return ClaimsUser(validated_token)
+
+    def _database_user(self, validated_token):
+        user, _ = self._load(self._user_id(validated_token))
+        return self._checked(user, validated_token)
+
+    def _load(self, user_id):
+        queryset = self.user_model.objects.annotate(person_profile_id=F(f"{PROFILE_RELATION}__pk"))
+        try:
+            user = queryset.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return user, get_md5_hash_password(user.password)
+
+    def _refresh_entry(self, found: dict, user_id) -> dict:
+        cache = _user_cache()
+        # Read the stamp before the row: a change committed in between bumps it
+        # and the entry stored below is never used.
+        stamp = _current_stamp(cache, found, user_id)
+        user, password_hash = self._load(user_id)
+        entry = {
+            "version": stamp,
+            "fields": {
+                field.attname: getattr(user, field.attname)
+                for field in user._meta.concrete_fields
+                if field.attname != "password"
+            },
+            "person_profile_id": user.person_profile_id,
+            "password_hash": password_hash,
+        }
+        cache.set(USER_CACHE_KEY.format(user_id=user_id), entry, settings.JWT_USER["TIMEOUT"])
+        return entry
+
+    def _from_entry(self, entry: dict):
+        fields = entry["fields"]
+        user = self.user_model.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+        user.person_profile_id = entry["person_profile_id"]
+        return user
+
+    def _checked(self, user, validated_token, password_hash=None):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if password_hash is None:
+                password_hash = get_md5_hash_password(user.password)
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+def _user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login; a stale value of it is harmless.
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    bump_user_version(instance.pk)
+
+
+def _user_deleted(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
+
+
+def _user_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        bump_user_version(instance.pk)
+    elif pk_set:
+        # A group or permission gained or lost users.
+        for user_id in pk_set:
+            bump_user_version(user_id)
+    else:
+        bump_user_version()
+
+
+def _every_user_changed(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        bump_user_version()
+
+
+def _profile_link():
+    """The field of the profile model that points to its user."""
+    return get_user_model()._meta.get_field(PROFILE_RELATION).field
+
+
+def _profile_saving(sender, instance, update_fields=None, **kwargs):
+    field = _profile_link()
+    if instance._state.adding or (update_fields and field.name not in update_fields):
+        return
+    instance._previous_user_id = (
+        sender._default_manager.filter(pk=instance.pk).values_list(field.attname, flat=True).first()
+    )
+
+
+def _profile_saved(sender, instance, **kwargs):
+    user_ids = {
+        getattr(instance, _profile_link().attname),
+        instance.__dict__.pop("_previous_user_id", None),
+    }
+    for user_id in user_ids - {None}:
+        bump_user_version(user_id)
+
+
+def _profile_deleted(sender, instance, **kwargs):
+    user_id = getattr(instance, _profile_link().attname)
+    if user_id is not None:
+        bump_user_version(user_id)
+
+
+def connect_user_cache_signals():
+    """
+    Keep `CachedJWTAuthentication`'s entries fresh. Bulk `update()`s skip
+    these signals; their changes show up once the entry times out.
+    """
+    user_model = get_user_model()
+    profile_model = _profile_link().model
+
+    post_save.connect(_user_saved, sender=user_model, dispatch_uid="jwt_user_saved")
+    post_delete.connect(_user_deleted, sender=user_model, dispatch_uid="jwt_user_deleted")
+    for relation in ("groups", "user_permissions"):
+        m2m_changed.connect(
+            _user_relations_changed,
+            sender=getattr(user_model, relation).through,
+            dispatch_uid=f"jwt_user_{relation}_changed",
+        )
+    m2m_changed.connect(_every_user_changed, sender=Group.permissions.through, dispatch_uid="jwt_group_permissions")
+    post_delete.connect(_every_user_changed, sender=Group, dispatch_uid="jwt_group_deleted")
+    post_delete.connect(_every_user_changed, sender=Permission, dispatch_uid="jwt_permission_deleted")
+
+    pre_save.connect(_profile_saving, sender=profile_model, dispatch_uid="jwt_profile_saving")
+    post_save.connect(_profile_saved, sender=profile_model, dispatch_uid="jwt_profile_saved")
+    post_delete.connect(_profile_deleted, sender=profile_model, dispatch_uid="jwt_profile_deleted")
@@ -0,0 +1,6 @@
+"""
+MySQL backend that keeps a bounded, per-process pool of client connections.
+
+Select it with `DB_ENGINE=sevenawesome_app_services.db_backends.mysql_pool`;
+the pool is configured through the `POOL` entry of the database settings.
+"""
@@ -0,0 +1,74 @@
+from django.db.backends.mysql.base import Database
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from .pool import ConnectionPool, PoolTimeout, get_pool
+
+DEFAULT_POOL_OPTIONS = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 10.0,
+    "MAX_LIFETIME": 1800.0,
+    "HEALTH_CHECK_AFTER": 30.0,
+}
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+    """
+    MySQL backend whose connections come from a per-process pool.
+
+    Closing the Django connection (end of request with CONN_MAX_AGE=0, or
+    `close_old_connections`) hands the client connection back to the pool
+    instead of tearing it down, so requests skip the TCP and auth handshake.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._pool_entry = None
+
+    def get_new_connection(self, conn_params):
+        self._pool = self._connection_pool(conn_params)
+        try:
+            self._pool_entry = self._pool.acquire()
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+        return self._pool_entry.raw
+
+    def init_connection_state(self):
+        # Session settings survive on a pooled connection; apply them once per connection.
+        entry = self._pool_entry
+        if entry is not None and entry.initialized:
+            return
+        super().init_connection_state()
+        if entry is not None:
+            entry.initialized = True
+
+    def _close(self):
+        entry = self._pool_entry
+        if entry is None or self.connection is not entry.raw:
+            return super()._close()
+        self._pool_entry = None
+        discard = self.errors_occurred
+        if not discard and (self.in_atomic_block or not self.autocommit):
+            # Never hand a connection with an open transaction to the next request.
+            try:
+                self.connection.rollback()
+            except Database.Error:
+                discard = True
+        self._pool.release(entry, discard=discard)
+
+    def _connection_pool(self, conn_params) -> ConnectionPool:
+        options = {**DEFAULT_POOL_OPTIONS, **self.settings_dict.get("POOL", {})}
+        key = (self.alias, tuple(sorted((k, repr(v)) for k, v in conn_params.items())))
+        return get_pool(
+            key,
+            lambda: ConnectionPool(
+                name=self.alias,
+                connect=lambda: MySQLDatabaseWrapper.get_new_connection(self, conn_params),
+                ping=lambda raw: raw.ping(),
+                close=lambda raw: raw.close(),
+                max_size=options["MAX_SIZE"],
+                timeout=options["TIMEOUT"],
+                max_lifetime=options["MAX_LIFETIME"],
+                health_check_after=options["HEALTH_CHECK_AFTER"],
+            ),
+        )
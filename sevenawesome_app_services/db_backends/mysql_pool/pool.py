@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import deque
+
+# Upper bounds (seconds) of the checkout latency histogram kept by each pool.
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_pools: dict = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """A raw DB-API connection plus the bookkeeping the pool needs for it."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        # Set by the backend once session state (SQL_AUTO_IS_NULL, isolation level) is applied.
+        self.initialized = False
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of raw connections.
+
+    `connect()` opens a new raw connection, `ping(raw)` raises when a connection
+    is no longer usable and `close(raw)` closes one. Idle connections are handed
+    out most-recently-used first, pinged when they sat idle for longer than
+    `health_check_after` seconds, and recycled once they are older than
+    `max_lifetime` seconds.
+    """
+
+    def __init__(
+        self,
+        name,
+        connect,
+        ping,
+        close,
+        max_size=10,
+        timeout=10.0,
+        max_lifetime=1800.0,
+        health_check_after=30.0,
+    ):
+        self.name = name
+        self._connect = connect
+        self._ping = ping
+        self._close = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle: deque[PooledConnection] = deque()
+        self._size = 0
+        self._in_use = 0
+
+        self._created = 0
+        self._recycled = 0
+        self._health_check_failures = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+        self._checkouts = 0
+        self._checkout_seconds = 0.0
+        self._checkout_max_seconds = 0.0
+        self._checkout_buckets = [0] * (len(CHECKOUT_BUCKETS) + 1)
+
+    def acquire(self) -> PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            entry, waited_for = self._reserve(deadline)
+            if entry is None:
+                try:
+                    entry = PooledConnection(self._connect())
+                except BaseException:
+                    self._forget()
+                    raise
+                with self._cond:
+                    self._created += 1
+                break
+            if self._is_healthy(entry):
+                break
+            self._discard(entry)
+            with self._cond:
+                self._health_check_failures += 1
+
+        elapsed = time.monotonic() - started
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+            self._checkout_seconds += elapsed
+            self._checkout_max_seconds = max(self._checkout_max_seconds, elapsed)
+            self._checkout_buckets[self._bucket_index(elapsed)] += 1
+            if waited_for:
+                self._waits += 1
+                self._wait_seconds += waited_for
+        return entry
+
+    def release(self, entry: PooledConnection, discard=False):
+        with self._cond:
+            self._in_use -= 1
+        if discard or self._is_expired(entry):
+            self._discard(entry)
+            return
+        entry.last_used_at = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close_idle(self):
+        """Close every idle connection (e.g. before forking or at shutdown)."""
+        with self._cond:
+            entries = list(self._idle)
+            self._idle.clear()
+        for entry in entries:
+            self._discard(entry)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "name": self.name,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "created": self._created,
+                "recycled": self._recycled,
+                "health_check_failures": self._health_check_failures,
+                "waits": self._waits,
+                "wait_seconds": self._wait_seconds,
+                "timeouts": self._timeouts,
+                "checkouts": self._checkouts,
+                "checkout_seconds": self._checkout_seconds,
+                "checkout_max_seconds": self._checkout_max_seconds,
+                "checkout_buckets": dict(
+                    zip((*CHECKOUT_BUCKETS, float("inf")), self._checkout_buckets)
+                ),
+            }
+
+    def _reserve(self, deadline):
+        """
+        Return (idle entry or None, seconds waited). None means the caller owns
+        a free slot and must open a new connection.
+        """
+        waited_since = None
+        with self._cond:
+            while True:
+                while self._idle:
+                    entry = self._idle.pop()
+                    if not self._is_expired(entry):
+                        return entry, self._waited(waited_since)
+                    self._idle_expired(entry)
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, self._waited(waited_since)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"Timed out after {self.timeout}s waiting for a connection "
+                        f"from pool {self.name!r} (max_size={self.max_size})."
+                    )
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                self._cond.wait(remaining)
+
+    def _idle_expired(self, entry):
+        # Called with the lock held; closing happens right away since the entry is unreachable.
+        self._size -= 1
+        self._recycled += 1
+        self._safe_close(entry)
+
+    def _waited(self, waited_since):
+        return 0.0 if waited_since is None else time.monotonic() - waited_since
+
+    def _is_expired(self, entry) -> bool:
+        return bool(self.max_lifetime) and time.monotonic() - entry.created_at > self.max_lifetime
+
+    def _is_healthy(self, entry) -> bool:
+        if time.monotonic() - entry.last_used_at < self.health_check_after:
+            return True
+        try:
+            self._ping(entry.raw)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, entry):
+        self._safe_close(entry)
+        with self._cond:
+            self._size -= 1
+            self._recycled += 1
+            self._cond.notify()
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _safe_close(self, entry):
+        try:
+            self._close(entry.raw)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _bucket_index(elapsed) -> int:
+        for index, bound in enumerate(CHECKOUT_BUCKETS):
+            if elapsed <= bound:
+                return index
+        return len(CHECKOUT_BUCKETS)
+
+
+def get_pool(key, factory) -> ConnectionPool:
+    """Return the process-wide pool for `key`, creating it with `factory()` once."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def all_pools() -> list[ConnectionPool]:
+    with _pools_lock:
+        return list(_pools.values())
+
+
+def pool_stats() -> list[dict]:
+    """Metrics snapshot of every pool in this process."""
+    return [pool.stats() for pool in all_pools()]
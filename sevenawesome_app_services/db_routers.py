@@ -0,0 +1,150 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import record_cache_lookup
+
+STICKY_CACHE_KEY = "db-replica-sticky:{user_id}"
+
+# Alias of the replica serving reads in the current request, if any.
+_read_alias: ContextVar[str | None] = ContextVar("replica_read_alias", default=None)
+# Per-request bookkeeping shared with the router; a dict so nested contexts can flag writes.
+_request_state: ContextVar[dict | None] = ContextVar("replica_request_state", default=None)
+
+
+def replica_aliases() -> list[str]:
+    return list(getattr(settings, "REPLICA_DATABASES", []))
+
+
+def is_pinned_to_primary(user) -> bool:
+    """Return True while `user` is inside the read-your-writes window."""
+    if user is None or not user.is_authenticated:
+        return False
+    pinned = cache.get(STICKY_CACHE_KEY.format(user_id=user.pk)) is not None
+    record_cache_lookup("replica_sticky", pinned)
+    return pinned
+
+
+def pin_to_primary(user):
+    if user is None or not user.is_authenticated:
+        return
+    cache.set(
+        STICKY_CACHE_KEY.format(user_id=user.pk),
+        True,
+        settings.REPLICA_STICKY_SECONDS,
+    )
+
+
+def start_replica_reads(user):
+    """
+    Send the reads that follow to a randomly chosen replica, unless none are
+    configured or `user` wrote recently. Returns a token for `stop_replica_reads`.
+    """
+    aliases = replica_aliases()
+    alias = None
+    if aliases and not is_pinned_to_primary(user):
+        alias = random.choice(aliases)
+    return _read_alias.set(alias)
+
+
+def stop_replica_reads(token):
+    _read_alias.reset(token)
+
+
+def reading_from_replica() -> bool:
+    return _read_alias.get() is not None
+
+
+def current_read_alias() -> str:
+    """The database the current request reads from."""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+class PrimaryReplicaRouter:
+    """
+    Route writes to `default` and, inside a replica read scope, reads to the
+    replica chosen for the request. Everything else keeps Django's default routing.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == "default":
+            # Keep related lookups of primary-loaded objects on the primary.
+            return "default"
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadsMixin:
+    """
+    DRF view mixin that serves the view's reads from a replica once the request
+    has been authenticated (so the user's stickiness window can be honoured).
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_reads_token = start_replica_reads(request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_reads_token", None)
+        if token is not None:
+            stop_replica_reads(token)
+            self._replica_reads_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+@sync_and_async_middleware
+def replica_stickiness_middleware(get_response):
+    """
+    Pin a user's reads to the primary for `REPLICA_STICKY_SECONDS` after any
+    request of theirs wrote to the database.
+    """
+
+    def _finish(request, state):
+        if state["wrote"]:
+            pin_to_primary(getattr(request, "user", None))
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            state = {"wrote": False}
+            token = _request_state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                _request_state.reset(token)
+            _finish(request, state)
+            return response
+
+    else:
+
+        def middleware(request):
+            state = {"wrote": False}
+            token = _request_state.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                _request_state.reset(token)
+            _finish(request, state)
+            return response
+
+    return middleware
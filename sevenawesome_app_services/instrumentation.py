@@ -0,0 +1,270 @@
+import json
+import logging
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("sevenawesome.requests")
+
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+# Project files that never count as the origin of a query (this module and other execute wrappers).
+_skipped_files = {__file__}
+
+_STRING_LITERALS = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERALS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")
+_SELECTED_COLUMNS = re.compile(r"^SELECT (?:DISTINCT )?.*? FROM ", re.IGNORECASE)
+# Longest query shape or SQL sample written to the request log.
+LOGGED_SQL_LENGTH = 300
+
+_current: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse literals and placeholder lists so repeated query shapes compare equal."""
+    sql = _STRING_LITERALS.sub("?", sql)
+    sql = _NUMBER_LITERALS.sub("?", sql)
+    sql = _PLACEHOLDER_LISTS.sub("(...)", sql)
+    return " ".join(sql.split())
+
+
+def _clipped(sql: str) -> str:
+    # Keep both ends: the table queried comes first, its conditions last.
+    if len(sql) <= LOGGED_SQL_LENGTH:
+        return sql
+    half = (LOGGED_SQL_LENGTH - 5) // 2
+    return f"{sql[:half]} ... {sql[-half:]}"
+
+
+def query_shape(normalized_sql: str) -> str:
+    """A normalized query without its column list, clipped to a loggable length."""
+    return _clipped(_SELECTED_COLUMNS.sub("SELECT ... FROM ", normalized_sql, count=1))
+
+
+def skip_frames_from(filename: str):
+    """Exclude a module (e.g. another execute wrapper) from query origin lookups."""
+    _skipped_files.add(filename)
+
+
+def _project_frames(frame, skip_files):
+    skipped = _skipped_files.union(skip_files)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(PROJECT_ROOT)
+            and "site-packages" not in filename
+            and filename not in skipped
+        ):
+            relative = filename[len(PROJECT_ROOT) + 1:]
+            yield f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+
+
+def originating_frame(skip_files=()) -> str | None:
+    """
+    Return "path:line in function" for the innermost caller that lives in this
+    project (not in site-packages and not in `skip_files`).
+    """
+    return next(_project_frames(sys._getframe(1), skip_files), None)
+
+
+def project_stack(limit: int, skip_files=()) -> list[str]:
+    """Like `originating_frame`, but up to `limit` project frames, innermost first."""
+    return list(islice(_project_frames(sys._getframe(1), skip_files), limit))
+
+
+class RequestTimings:
+    """Timing spans and query log collected for one sampled request."""
+
+    def __init__(self, capture_stacks: bool = True):
+        self.capture_stacks = capture_stacks
+        self.spans: dict[str, float] = defaultdict(float)
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.query_shapes: Counter = Counter()
+        # The first SQL seen for each entry of `query_shapes`.
+        self.query_samples: dict[tuple, str] = {}
+
+    def record_query(self, sql: str, duration: float):
+        self.query_count += 1
+        self.query_seconds += duration
+        frame = originating_frame() if self.capture_stacks else None
+        key = (normalize_sql(sql), frame)
+        self.query_shapes[key] += 1
+        self.query_samples.setdefault(key, sql)
+
+    def add(self, name: str, duration: float):
+        self.spans[name] += max(duration, 0.0)
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a block, excluding the database time spent inside it."""
+        started = time.perf_counter()
+        db_before = self.query_seconds
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.add(name, elapsed - (self.query_seconds - db_before))
+
+    def duplicate_queries(self, threshold: int) -> list[dict]:
+        """
+        Query shapes repeated at least `threshold` times from the same place
+        (likely N+1), each with one of its queries as a sample.
+        """
+        return [
+            {
+                "shape": query_shape(sql),
+                "frame": frame,
+                "count": count,
+                "sample": _clipped(self.query_samples[(sql, frame)]),
+            }
+            for (sql, frame), count in self.query_shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def timed(name: str):
+    """Record a named span on the current sampled request; no-op otherwise."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    with timings.span(name):
+        yield
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.record_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    """Attach the query recorder to a connection (idempotent; runs on `connection_created`)."""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_recorder, dispatch_uid="server_timing_query_recorder")
+
+
+class ServerTimingMixin:
+    """DRF view mixin that reports request authentication as the `auth` span."""
+
+    def perform_authentication(self, request):
+        with timed("auth"):
+            super().perform_authentication(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Measure a sample of requests and report where their time went: database
+    queries, authentication, serialization and rendering. The result is added
+    as a `Server-Timing` header and logged as one JSON line on
+    `sevenawesome.requests`, together with repeated query shapes (likely N+1).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = self._start()
+        if timings is None:
+            return self.get_response(request)
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = self._start()
+        if timings is None:
+            return await self.get_response(request)
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    def process_template_response(self, request, response):
+        timings = _current.get()
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add("render", time.perf_counter() - started)
+            )
+        return response
+
+    def _start(self) -> RequestTimings | None:
+        config = settings.SERVER_TIMING
+        if not config["ENABLED"] or random.random() >= config["SAMPLE_RATE"]:
+            return None
+        # Connections opened before this module was loaded missed `connection_created`.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+        return RequestTimings(capture_stacks=config["CAPTURE_STACKS"])
+
+    def _finish(self, request, response, timings: RequestTimings, total: float):
+        metrics = [
+            f'db;dur={timings.query_seconds * 1000:.1f};desc="{timings.query_count} queries"'
+        ]
+        metrics += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.spans.items()]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        response["Server-Timing"] = ", ".join(metrics)
+
+        duplicates = timings.duplicate_queries(settings.SERVER_TIMING["DUPLICATE_QUERY_THRESHOLD"])
+        match = getattr(request, "resolver_match", None)
+        logger.info(
+            json.dumps(
+                {
+                    "event": "request_timing",
+                    "method": request.method,
+                    "path": request.path,
+                    "view": match.view_name if match else None,
+                    "status": response.status_code,
+                    "total_ms": round(total * 1000, 2),
+                    "db_ms": round(timings.query_seconds * 1000, 2),
+                    "db_queries": timings.query_count,
+                    "spans_ms": {
+                        name: round(seconds * 1000, 2) for name, seconds in timings.spans.items()
+                    },
+                    "duplicate_queries": duplicates,
+                }
+            )
+        )
+        return response
@@ -0,0 +1,123 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger("sevenawesome.last_login")
+
+
+class LastLoginBuffer:
+    """
+    Collect last-login times in memory and write them in batches: one
+    `UPDATE ... SET last_login = CASE id WHEN ... END` per `batch_size` users,
+    every `flush_interval` seconds from a background thread, and once more
+    when the process exits. A user logging in several times in an interval
+    costs a single row update. Only a killed process loses its pending times.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, user_id, when):
+        with self._lock:
+            if self._thread is None:
+                # Started on first use, so preforking servers start it in each worker.
+                self._thread = threading.Thread(
+                    target=self._run, name="last-login-flush", daemon=True
+                )
+                self._thread.start()
+            self._merge(user_id, when)
+
+    def _merge(self, user_id, when):
+        # Callers hold `_lock`.
+        previous = self._pending.get(user_id)
+        if previous is None or when > previous:
+            self._pending[user_id] = when
+
+    def flush(self) -> int:
+        """Write the buffered times; returns the number of users written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                for start in range(0, len(batch), self.batch_size):
+                    _write(dict(list(batch.items())[start:start + self.batch_size]))
+            except DatabaseError:
+                logger.exception(
+                    "Could not write %d last-login times; keeping them for the next flush", len(batch)
+                )
+                with self._lock:
+                    for user_id, when in batch.items():
+                        self._merge(user_id, when)
+                return 0
+            return len(batch)
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            finally:
+                # The thread's own connection; don't keep it open between flushes.
+                connection.close()
+
+
+def _write(batch: dict):
+    """One UPDATE for the batch, never moving a user's last_login backwards."""
+    user_model = get_user_model()
+    newest = Case(
+        *(
+            When(
+                Q(pk=user_id) & (Q(last_login__isnull=True) | Q(last_login__lt=when)),
+                then=Value(when),
+            )
+            for user_id, when in batch.items()
+        ),
+        default=F("last_login"),
+        output_field=DateTimeField(),
+    )
+    user_model._default_manager.filter(pk__in=batch).update(last_login=newest)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> LastLoginBuffer | None:
+    global _buffer
+    config = settings.LAST_LOGIN_BUFFER
+    if not config["ENABLED"]:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = LastLoginBuffer(config["FLUSH_INTERVAL"], config["BATCH_SIZE"])
+            atexit.register(_buffer.close)
+    return _buffer
+
+
+def record_login(user):
+    """
+    Note that `user` just logged in; written with the next flush. A no-op when
+    the buffer is disabled, as Simple JWT then updates last_login itself.
+    """
+    buffer = get_buffer()
+    if buffer is not None:
+        buffer.record(user.pk, timezone.now())
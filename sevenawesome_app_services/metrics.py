@@ -0,0 +1,400 @@
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from .db_backends.mysql_pool.pool import CHECKOUT_BUCKETS, pool_stats
+from .instrumentation import skip_frames_from
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Label used for requests that did not resolve to a named URL, to keep cardinality bounded.
+UNMATCHED_VIEW = "unmatched"
+
+# Queries executed by the current request; a list so worker threads can add to it.
+_query_count: ContextVar[list | None] = ContextVar("metrics_query_count", default=None)
+
+
+class MetricFamily:
+    def __init__(self, name: str, kind: str, documentation: str, buckets=()):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+
+
+FAMILIES = {
+    family.name: family
+    for family in (
+        MetricFamily("http_requests_total", "counter", "HTTP requests by view, method and status."),
+        MetricFamily(
+            "http_request_errors_total", "counter", "HTTP responses with a 4xx or 5xx status."
+        ),
+        MetricFamily(
+            "http_request_duration_seconds",
+            "histogram",
+            "Time spent producing the response.",
+            LATENCY_BUCKETS,
+        ),
+        MetricFamily(
+            "http_response_size_bytes", "histogram", "Response body size.", SIZE_BUCKETS
+        ),
+        MetricFamily(
+            "http_request_db_queries",
+            "histogram",
+            "Database queries executed per request.",
+            QUERY_COUNT_BUCKETS,
+        ),
+        MetricFamily("cache_lookups_total", "counter", "Cache lookups by cache and result."),
+        MetricFamily("cache_hit_ratio", "gauge", "Share of cache lookups that were hits."),
+        MetricFamily("db_pool_connections", "gauge", "Pooled connections by state."),
+        MetricFamily("db_pool_max_size", "gauge", "Configured pool size."),
+        MetricFamily("db_pool_checkouts_total", "counter", "Connections handed out by the pool."),
+        MetricFamily("db_pool_waits_total", "counter", "Checkouts that had to wait."),
+        MetricFamily("db_pool_timeouts_total", "counter", "Checkouts that timed out."),
+        MetricFamily(
+            "db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection."
+        ),
+        MetricFamily(
+            "db_pool_checkout_seconds",
+            "histogram",
+            "Time taken to hand out a pooled connection.",
+            CHECKOUT_BUCKETS,
+        ),
+    )
+}
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """
+    Metric samples of this process. Histograms are stored as their cumulative
+    `_bucket`, `_sum` and `_count` samples, so processes are merged by adding
+    samples with the same name and labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: dict[tuple[str, tuple], float] = defaultdict(float)
+
+    def inc(self, name: str, labels: dict, amount: float = 1.0):
+        with self._lock:
+            self._samples[(name, _label_key(labels))] += amount
+
+    def observe(self, name: str, labels: dict, value: float):
+        family = FAMILIES[name]
+        key = _label_key(labels)
+        with self._lock:
+            for bound in family.buckets:
+                # Every bucket is written, even at zero, so each label set exposes all of them.
+                self._samples[(f"{name}_bucket", key + (("le", _format_value(bound)),))] += (
+                    1 if value <= bound else 0
+                )
+            self._samples[(f"{name}_bucket", key + (("le", "+Inf"),))] += 1
+            self._samples[(f"{name}_sum", key)] += value
+            self._samples[(f"{name}_count", key)] += 1
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[name, list(labels), value] for (name, labels), value in self._samples.items()]
+
+
+registry = Registry()
+
+
+def record_cache_lookup(cache_name: str, hit: bool):
+    """Count a lookup in one of the application caches (feeds `cache_hit_ratio`)."""
+    registry.inc("cache_lookups_total", {"cache": cache_name, "result": "hit" if hit else "miss"})
+
+
+def _live_samples() -> list:
+    """Point-in-time values of this process, only meaningful while it is running."""
+    samples = []
+    for stats in pool_stats():
+        labels = [("pool", stats["name"])]
+        for state in ("in_use", "idle"):
+            samples.append(["db_pool_connections", labels + [("state", state)], stats[state]])
+        samples += [
+            ["db_pool_max_size", labels, stats["max_size"]],
+            ["db_pool_checkouts_total", labels, stats["checkouts"]],
+            ["db_pool_waits_total", labels, stats["waits"]],
+            ["db_pool_timeouts_total", labels, stats["timeouts"]],
+            ["db_pool_wait_seconds_total", labels, stats["wait_seconds"]],
+            ["db_pool_checkout_seconds_sum", labels, stats["checkout_seconds"]],
+            ["db_pool_checkout_seconds_count", labels, stats["checkouts"]],
+        ]
+        # The pool counts each checkout in one bucket; Prometheus buckets are cumulative.
+        cumulative = 0
+        for bound, count in stats["checkout_buckets"].items():
+            cumulative += count
+            samples.append(
+                ["db_pool_checkout_seconds_bucket", labels + [("le", _format_value(bound))], cumulative]
+            )
+    return samples
+
+
+class FileStore:
+    """
+    Share samples between worker processes through a directory: each process
+    periodically writes its samples to `metrics-<pid>.json`, and a scrape adds
+    up every file. Counters of exited processes are kept (like Prometheus'
+    multiprocess mode); their live values are dropped. Clear the directory when
+    the server is restarted.
+    """
+
+    def __init__(self, directory: str, flush_interval: float):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            payload = {"samples": registry.samples(), "live": _live_samples()}
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".metrics-")
+            try:
+                with os.fdopen(fd, "w") as handle:
+                    json.dump(payload, handle)
+                os.replace(tmp_path, self.directory / f"metrics-{os.getpid()}.json")
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def collect(self) -> list:
+        self.flush()
+        samples = []
+        for path in self.directory.glob("metrics-*.json"):
+            try:
+                payload = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Removed or replaced while reading; the next scrape picks it up.
+                continue
+            samples += payload["samples"]
+            if _process_alive(int(path.stem.split("-", 1)[1])):
+                samples += payload["live"]
+        return samples
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> FileStore | None:
+    global _store
+    directory = settings.METRICS["DIRECTORY"]
+    if not directory:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = FileStore(directory, settings.METRICS["FLUSH_INTERVAL"])
+            atexit.register(_store.flush)
+    return _store
+
+
+def collect_samples() -> list:
+    store = get_store()
+    if store is None:
+        return registry.samples() + _live_samples()
+    return store.collect()
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _family_of(sample_name: str) -> str:
+    if sample_name in FAMILIES:
+        return sample_name
+    for suffix in ("_bucket", "_sum", "_count"):
+        if sample_name.endswith(suffix) and sample_name[: -len(suffix)] in FAMILIES:
+            return sample_name[: -len(suffix)]
+    return sample_name
+
+
+def _sort_key(sample):
+    name, labels = sample
+    bound = dict(labels).get("le")
+    return (
+        [item for item in labels if item[0] != "le"],
+        name,
+        float("inf") if bound == "+Inf" else float(bound or 0),
+    )
+
+
+def render(samples: list) -> str:
+    """Merge samples by name and labels and render them in the Prometheus text format."""
+    merged: dict[tuple[str, tuple], float] = defaultdict(float)
+    for name, labels, value in samples:
+        merged[(name, tuple(tuple(item) for item in labels))] += value
+
+    lookups: dict[str, dict[str, float]] = defaultdict(lambda: {"hit": 0.0, "miss": 0.0})
+    for (name, labels), value in merged.items():
+        if name == "cache_lookups_total":
+            label_map = dict(labels)
+            lookups[label_map["cache"]][label_map["result"]] += value
+    for cache_name, counts in lookups.items():
+        total = counts["hit"] + counts["miss"]
+        if total:
+            merged[("cache_hit_ratio", (("cache", cache_name),))] = counts["hit"] / total
+
+    by_family: dict[str, list] = defaultdict(list)
+    for name, labels in merged:
+        by_family[_family_of(name)].append((name, labels))
+
+    lines = []
+    for family_name in sorted(by_family):
+        family = FAMILIES.get(family_name)
+        if family is not None:
+            lines.append(f"# HELP {family_name} {family.documentation}")
+            lines.append(f"# TYPE {family_name} {family.kind}")
+        for name, labels in sorted(by_family[family_name], key=_sort_key):
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            label_text = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{name}{label_text} {_format_value(merged[(name, labels)])}")
+    return "\n".join(lines) + "\n"
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender=None, connection=None, **kwargs):
+    """Attach the per-request query counter to a connection (idempotent)."""
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+connection_created.connect(install_query_counter, dispatch_uid="metrics_query_counter")
+skip_frames_from(__file__)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, response size, query count and status of every request,
+    labelled with the URL name it resolved to.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = self._start()
+        token = _query_count.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        self._finish(request, response, counter[0], time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        counter = self._start()
+        token = _query_count.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        self._finish(request, response, counter[0], time.perf_counter() - started)
+        return response
+
+    def _start(self) -> list:
+        # Connections opened before this module was loaded missed `connection_created`.
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection=connection)
+        return [0]
+
+    def _finish(self, request, response, query_count: int, duration: float):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name if match else None) or UNMATCHED_VIEW
+        status = response.status_code
+        registry.inc(
+            "http_requests_total",
+            {"view": view, "method": request.method, "status": str(status)},
+        )
+        if status >= 400:
+            registry.inc("http_request_errors_total", {"view": view, "status": str(status)})
+        registry.observe("http_request_duration_seconds", {"view": view}, duration)
+        registry.observe("http_request_db_queries", {"view": view}, query_count)
+        if not response.streaming:
+            registry.observe("http_response_size_bytes", {"view": view}, len(response.content))
+
+        store = get_store()
+        if store is not None:
+            store.maybe_flush()
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Expose the merged metrics of all worker processes in the Prometheus text
+    format, to scrapers sending `METRICS["TOKEN"]` or, without a token, to
+    clients connecting from `METRICS["ALLOWED_IPS"]`.
+    """
+    token = settings.METRICS["TOKEN"]
+    if token:
+        expected = f"Bearer {token}"
+        if not constant_time_compare(request.headers.get("Authorization", ""), expected):
+            return HttpResponseForbidden()
+    elif request.META.get("REMOTE_ADDR") not in settings.METRICS["ALLOWED_IPS"]:
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect_samples()), content_type=CONTENT_TYPE)
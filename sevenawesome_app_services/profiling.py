@@ -0,0 +1,365 @@
+import cProfile
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import FileResponse, Http404
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .instrumentation import PROJECT_ROOT, originating_frame, skip_frames_from
+
+logger = logging.getLogger("sevenawesome.profiling")
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+
+# Queries executed by the profiled request; a list so worker threads can add to it.
+_captured_queries: ContextVar[list | None] = ContextVar("profiled_queries", default=None)
+
+# Only one request is profiled at a time per process; others run normally.
+_profiling_lock = threading.Lock()
+
+skip_frames_from(__file__)
+
+
+def _capture_query(execute, sql, params, many, context):
+    queries = _captured_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.append(
+            {
+                "database": context["connection"].alias,
+                "sql": sql,
+                "many": many,
+                "ms": round((time.perf_counter() - started) * 1000, 3),
+                "frame": originating_frame(),
+            }
+        )
+
+
+def install_query_capture(sender=None, connection=None, **kwargs):
+    """Attach the SQL capture to a connection (idempotent; runs on `connection_created`)."""
+    if _capture_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_capture_query)
+
+
+connection_created.connect(install_query_capture, dispatch_uid="profiling_query_capture")
+
+
+def _directory() -> Path:
+    return Path(settings.PROFILING["DIRECTORY"])
+
+
+def _write_atomic(path: Path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".profile-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            write(handle)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_profile(run: "ProfileRun", meta: dict):
+    """
+    Store a profile as `<id>.json` (metadata and SQL), `<id>.prof` (pstats format)
+    and `<id>.collapsed` (sampled stacks).
+    """
+    directory = _directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = meta["id"]
+    stats = pstats.Stats(run.profiler).stats
+    _write_atomic(directory / f"{profile_id}.prof", lambda handle: marshal.dump(stats, handle))
+    _write_atomic(
+        directory / f"{profile_id}.collapsed",
+        lambda handle: handle.write(run.sampler.collapsed().encode()),
+    )
+    # The metadata goes last: a profile is listed once its .json exists.
+    _write_atomic(
+        directory / f"{profile_id}.json",
+        lambda handle: handle.write(json.dumps(meta, indent=2).encode()),
+    )
+    _prune(directory, settings.PROFILING["MAX_PROFILES"])
+
+
+def _prune(directory: Path, keep: int):
+    # Ids start with a UTC timestamp, so name order is age order.
+    for path in sorted(directory.glob("*.json"))[:-keep]:
+        for suffix in (".json", ".prof", ".collapsed"):
+            path.with_suffix(suffix).unlink(missing_ok=True)
+
+
+def _profile_path(profile_id: str, suffix: str) -> Path:
+    if not _PROFILE_ID.match(profile_id):
+        raise Http404
+    path = _directory() / f"{profile_id}{suffix}"
+    if not path.exists():
+        raise Http404
+    return path
+
+
+def list_profiles() -> list[dict]:
+    summaries = []
+    for path in sorted(_directory().glob("*.json"), reverse=True):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            # Pruned by another process while listing.
+            continue
+        meta.pop("queries")
+        summaries.append(meta)
+    return summaries
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(PROJECT_ROOT):
+        filename = filename[len(PROJECT_ROOT) + 1:]
+    elif "site-packages/" in filename:
+        filename = filename.split("site-packages/", 1)[1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler(threading.Thread):
+    """
+    Record the stack of one thread every `interval` seconds as collapsed stacks
+    (`frame;frame;frame` -> samples), starting below the frame running `root_code`.
+    """
+
+    def __init__(self, thread_id: int, root_code, interval: float):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.root_code = root_code
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+def _profiling_requested(request) -> bool:
+    flag = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_QUERY_PARAM, "")
+    return flag.strip().lower() in {"true", "1", "yes"}
+
+
+def _profiling_user(request):
+    """
+    The staff user asking for the profile, authenticated the way the API does
+    (JWT or session), or None.
+    """
+    session_user = request.user
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        user = Request(request, authenticators=authenticators).user
+    except APIException:
+        return None
+    finally:
+        # DRF copies the authenticated user onto the Django request; let the view authenticate on its own.
+        request.user = session_user
+    return user if user.is_staff else None
+
+
+class ProfileRun:
+    """cProfile, a stack sampler and the SQL capture for one request."""
+
+    def __init__(self, root_code):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(
+            threading.get_ident(), root_code, settings.PROFILING["SAMPLE_INTERVAL"]
+        )
+        self.queries = []
+        self.duration = 0.0
+
+    def start(self):
+        # Connections opened before this module was loaded missed `connection_created`.
+        for connection in connections.all(initialized_only=True):
+            install_query_capture(connection=connection)
+        self._token = _captured_queries.set(self.queries)
+        self._started = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self._started
+        _captured_queries.reset(self._token)
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests on demand. A staff user adds an `X-Profile: 1`
+    header (or `?profile=1`) and the request runs under cProfile while its
+    stack is sampled for flamegraphs. The profile and the SQL it executed are
+    stored in `PROFILING["DIRECTORY"]`, and the response carries an
+    `X-Profile-Id` header to fetch them from `/api/profiles/<id>/`. Must come
+    after `AuthenticationMiddleware`.
+
+    cProfile only records caller/callee pairs, which cannot be put back
+    together into stacks through Django's recursive middleware chain; hence
+    the sampler. Both slow the request down somewhat. Under ASGI only the event
+    loop thread is profiled, so code run through `sync_to_async` shows up as
+    time spent waiting.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._wanted(request):
+            return self.get_response(request)
+        user = _profiling_user(request)
+        if user is None or not _profiling_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            run = ProfileRun(root_code=sys._getframe().f_code)
+            run.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                run.stop()
+            return self._finish(request, response, user, run)
+        finally:
+            _profiling_lock.release()
+
+    async def __acall__(self, request):
+        if not self._wanted(request):
+            return await self.get_response(request)
+        user = await sync_to_async(_profiling_user)(request)
+        if user is None or not _profiling_lock.acquire(blocking=False):
+            return await self.get_response(request)
+        try:
+            run = ProfileRun(root_code=sys._getframe().f_code)
+            run.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                run.stop()
+            return await sync_to_async(self._finish)(request, response, user, run)
+        finally:
+            _profiling_lock.release()
+
+    def _wanted(self, request) -> bool:
+        return settings.PROFILING["ENABLED"] and _profiling_requested(request)
+
+    def _finish(self, request, response, user, run: ProfileRun):
+        now = datetime.now(timezone.utc)
+        profile_id = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        match = getattr(request, "resolver_match", None)
+        meta = {
+            "id": profile_id,
+            "created_at": now.isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "user": user.get_username(),
+            "status": response.status_code,
+            "duration_ms": round(run.duration * 1000, 2),
+            "samples": sum(run.sampler.stacks.values()),
+            "sample_interval_ms": run.sampler.interval * 1000,
+            "db_queries": len(run.queries),
+            "db_ms": round(sum(query["ms"] for query in run.queries), 2),
+            "queries": run.queries,
+        }
+        try:
+            save_profile(run, meta)
+        except OSError:
+            logger.exception("Could not store profile %s", profile_id)
+            return response
+        response[PROFILE_ID_HEADER] = profile_id
+        return response
+
+
+class ProfileListView(APIView):
+    """Stored profiles, newest first (without their SQL)."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(APIView):
+    """Metadata and captured SQL of one profile."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, profile_id):
+        return Response(json.loads(_profile_path(profile_id, ".json").read_text()))
+
+
+class ProfileCollapsedStacksView(APIView):
+    """The profile as collapsed stacks, for flamegraph.pl, speedscope or inferno."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, profile_id):
+        path = _profile_path(profile_id, ".collapsed")
+        return FileResponse(
+            path.open("rb"),
+            as_attachment=True,
+            filename=f"{profile_id}.collapsed.txt",
+            content_type="text/plain; charset=utf-8",
+        )
+
+
+class ProfileStatsView(APIView):
+    """The raw cProfile output, for `pstats`, snakeviz or gprof2dot."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, profile_id):
+        path = _profile_path(profile_id, ".prof")
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
@@ -0,0 +1,205 @@
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .metrics import record_cache_lookup
+
+
+class BloomFilter:
+    """
+    A set of strings that answers "maybe" or "no": no false negatives, and
+    false positives at about `error_rate` once `capacity` items were added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """
+    The blacklisted `jti`s as a Bloom filter, so checking a token only queries
+    the database when the filter reports a probable hit. New blacklist rows are
+    loaded every `refresh_interval` seconds; the filter is rebuilt from scratch
+    every `rebuild_interval` seconds, which drops purged tokens, or sooner when
+    it outgrows its capacity. Revocations made in this process are seen at
+    once, others within `refresh_interval`.
+
+    Ids are handed out before commit, so a row can become visible after one
+    with a higher id was loaded. Each load therefore reads every row above the
+    last id seen `rescan_window` seconds ago, not just above the last one.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        refresh_interval: float,
+        rebuild_interval: float,
+        rescan_window: float,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.rescan_window = rescan_window
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        # (monotonic time, last id seen before the load at that time), oldest first.
+        self._checkpoints: deque[tuple[float, int]] = deque()
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+
+    def add(self, jti: str):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def needs_refresh(self) -> bool:
+        return time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    def refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._refreshed_at < self.refresh_interval:
+                return
+            if self._bloom is None or now - self._built_at >= self.rebuild_interval:
+                self._rebuild(self.capacity)
+            else:
+                self._load()
+                if self._bloom.count > self._bloom.capacity:
+                    self._rebuild(self._bloom.count * 2)
+            self._refreshed_at = now
+
+    def _rebuild(self, capacity: int):
+        self._bloom = BloomFilter(capacity, self.error_rate)
+        self._last_id = 0
+        self._checkpoints.clear()
+        self._built_at = time.monotonic()
+        self._load()
+        if self._bloom.count > capacity:
+            # More revoked tokens than expected; size the filter for them.
+            self._rebuild(self._bloom.count * 2)
+
+    def _load(self):
+        now = time.monotonic()
+        while self._checkpoints and self._checkpoints[0][0] < now - self.rescan_window:
+            self._checkpoints.popleft()
+        since = self._checkpoints[0][1] if self._checkpoints else self._last_id
+        self._checkpoints.append((now, self._last_id))
+        rows = (
+            BlacklistedToken.objects.filter(id__gt=since)
+            .order_by("id")
+            .values_list("id", "token__jti")
+        )
+        last_id = self._last_id
+        for row_id, jti in rows.iterator(chunk_size=2000):
+            if row_id > last_id or jti not in self._bloom:
+                # Re-read rows are already in the filter, unless they committed late.
+                self._bloom.add(jti)
+            self._last_id = max(self._last_id, row_id)
+
+    def might_be_revoked(self, jti: str) -> bool:
+        """False means the token is not revoked; True needs a database check."""
+        return self._bloom is None or jti in self._bloom
+
+    def is_revoked(self, jti: str) -> bool:
+        if self.needs_refresh():
+            self.refresh()
+        if not self.might_be_revoked(jti):
+            record_cache_lookup("revoked_tokens", True)
+            return False
+        record_cache_lookup("revoked_tokens", False)
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+
+def get_filter() -> RevocationFilter:
+    global _filter
+    with _filter_lock:
+        if _filter is None:
+            config = settings.TOKEN_REVOCATION
+            _filter = RevocationFilter(
+                config["CAPACITY"],
+                config["ERROR_RATE"],
+                config["REFRESH_INTERVAL"],
+                config["REBUILD_INTERVAL"],
+                config["RESCAN_WINDOW"],
+            )
+    return _filter
+
+
+def is_revoked(jti: str) -> bool:
+    return get_filter().is_revoked(jti)
+
+
+async def ais_revoked(jti: str) -> bool:
+    """`is_revoked` that only leaves the event loop when the database is needed."""
+    revocations = get_filter()
+    if not revocations.needs_refresh() and not revocations.might_be_revoked(jti):
+        record_cache_lookup("revoked_tokens", True)
+        return False
+    return await sync_to_async(revocations.is_revoked)(jti)
+
+
+def revoke(token) -> BlacklistedToken:
+    """
+    Blacklist any token (access or refresh), recording it as outstanding first
+    if it was not issued through the blacklist app.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            "user_id": token.get(api_settings.USER_ID_CLAIM),
+            "created_at": token.current_time,
+            "token": str(token),
+            "expires_at": datetime_from_epoch(token["exp"]),
+        },
+    )
+    blacklisted, _ = BlacklistedToken.objects.get_or_create(token=outstanding)
+    get_filter().add(jti)
+    return blacklisted
+
+
+class RevocableRefreshToken(RefreshToken):
+    """A refresh token checked against the revocation filter instead of a query per use."""
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        return revoke(self)
@@ -49,19 +49,24 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
+    'rest_framework_simplejwt.token_blacklist',
     'albums_of_musics',
     'the_churches',
     'people'
 ]
 
 MIDDLEWARE = [
+    'sevenawesome_app_services.metrics.MetricsMiddleware',
+    'sevenawesome_app_services.instrumentation.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'sevenawesome_app_services.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'sevenawesome_app_services.db_routers.replica_stickiness_middleware',
 ]
 
 ROOT_URLCONF = 'sevenawesome_app_services.urls'
@@ -95,16 +100,62 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST', default='127.0.0.1'),
         'PORT': env('DB_PORT', default='3306'),
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=False),
     }
 }
 
-if DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+MYSQL_POOL_ENGINE = 'sevenawesome_app_services.db_backends.mysql_pool'
+
+if DATABASES['default']['ENGINE'] in {'django.db.backends.mysql', MYSQL_POOL_ENGINE}:
     DATABASES['default'].setdefault('OPTIONS', {})
     DATABASES['default']['OPTIONS'].setdefault(
         'init_command',
         "SET sql_mode='STRICT_TRANS_TABLES'",
     )
 
+# Per-process connection pool of the pooled MySQL backend. Keep CONN_MAX_AGE at 0 with it:
+# closing the Django connection at the end of each request returns it to the pool.
+if DATABASES['default']['ENGINE'] == MYSQL_POOL_ENGINE:
+    DATABASES['default']['POOL'] = {
+        'MAX_SIZE': env.int('DB_POOL_MAX_SIZE', default=10),
+        'TIMEOUT': env.float('DB_POOL_TIMEOUT', default=10.0),
+        'MAX_LIFETIME': env.float('DB_POOL_MAX_LIFETIME', default=1800.0),
+        'HEALTH_CHECK_AFTER': env.float('DB_POOL_HEALTH_CHECK_AFTER', default=30.0),
+    }
+
+# Optional read replicas, one alias per host in DB_REPLICA_HOSTS (replica_1, replica_2, ...).
+# Unset values fall back to the primary's. For a local setup with two SQLite files set
+# DB_REPLICA_NAME to the second file and leave DB_REPLICA_HOSTS empty.
+REPLICA_DATABASES = []
+replica_hosts = env.list('DB_REPLICA_HOSTS', default=[])
+replica_name = env('DB_REPLICA_NAME', default=None)
+if replica_hosts or replica_name:
+    for index, host in enumerate(replica_hosts or [DATABASES['default']['HOST']], start=1):
+        alias = f'replica_{index}'
+        DATABASES[alias] = {
+            **DATABASES['default'],
+            'NAME': replica_name or DATABASES['default']['NAME'],
+            'USER': env('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+            'PASSWORD': env('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+            'HOST': host,
+            'PORT': env('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+            'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+            'TEST': {'MIRROR': 'default'},
+        }
+        REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['sevenawesome_app_services.db_routers.PrimaryReplicaRouter']
+
+# Seconds a user's reads stay on the primary after one of their requests wrote.
+REPLICA_STICKY_SECONDS = env.int('DB_REPLICA_STICKY_SECONDS', default=10)
+
+# Holds the replica stickiness windows and cached JWT users. The default cache lives in
+# each process; with several workers use a shared one, e.g. CACHE_URL=redis://host:6379/1.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -149,12 +200,75 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'sevenawesome_app_services.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'sevenawesome_app_services.throttling.EndpointThrottle',
+    ),
+    # Token buckets: "N/period" holds N tokens and refills N per period.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': env('THROTTLE_LOGIN_IP_RATE', default='20/min'),
+        'login_username': env('THROTTLE_LOGIN_USERNAME_RATE', default='10/min'),
+        'api': env('THROTTLE_API_RATE', default='600/min'),
+        'tree': env('THROTTLE_TREE_RATE', default='60/min'),
+    },
+}
+
+# Identical full-tree requests running at the same time share one build: the first one
+# computes, the others wait up to WAIT_TIMEOUT seconds for its rendered bytes (in the same
+# worker directly, across workers through a lock in the CACHE_ALIAS cache, polled every
+# POLL_INTERVAL seconds), then build on their own. A lock whose holder died expires after
+# LOCK_TIMEOUT seconds. A finished build is only handed to the requests that were already
+# waiting for it; RESULT_TTL is how long they have to pick it up.
+SINGLE_FLIGHT = {
+    'ENABLED': env.bool('SINGLE_FLIGHT_ENABLED', default=True),
+    'CACHE_ALIAS': env('SINGLE_FLIGHT_CACHE_ALIAS', default='default'),
+    'WAIT_TIMEOUT': env.float('SINGLE_FLIGHT_WAIT_TIMEOUT', default=15.0),
+    'LOCK_TIMEOUT': env.int('SINGLE_FLIGHT_LOCK_TIMEOUT', default=60),
+    'RESULT_TTL': env.int('SINGLE_FLIGHT_RESULT_TTL', default=2),
+    'POLL_INTERVAL': env.float('SINGLE_FLIGHT_POLL_INTERVAL', default=0.05),
+}
+
+# Rendered full trees and catalog exports (plain JSON only) are kept in the CACHE_ALIAS
+# cache for TIMEOUT seconds, under a data version that any save or delete of a people row
+# replaces. With the default per-process cache other workers only see a new version once
+# their copy expires, so point CACHE_URL to a shared cache when running several workers.
+# The warmer thread (one per worker, started by the first request) rebuilds the catalog
+# and the TOP_FAMILIES most requested trees every WARM_INTERVAL seconds when missing,
+# one at a time, PAUSE seconds apart, and only while no request is building a tree.
+PEOPLE_CACHE = {
+    'ENABLED': env.bool('PEOPLE_CACHE_ENABLED', default=True),
+    'CACHE_ALIAS': env('PEOPLE_CACHE_ALIAS', default='default'),
+    'TIMEOUT': env.int('PEOPLE_CACHE_TIMEOUT', default=60),
+    'WARMER_ENABLED': env.bool('PEOPLE_CACHE_WARMER_ENABLED', default=False),
+    'WARM_INTERVAL': env.float('PEOPLE_CACHE_WARM_INTERVAL', default=30.0),
+    'TOP_FAMILIES': env.int('PEOPLE_CACHE_TOP_FAMILIES', default=20),
+    'PAUSE': env.float('PEOPLE_CACHE_WARM_PAUSE', default=0.5),
+}
+
+# Throttle buckets are kept in the CACHE_ALIAS cache (per process unless CACHE_URL points
+# to a shared one). MAX_CONCURRENT caps the requests of a kind running at once in each
+# worker; the ones over it get a 503 with Retry-After: BUSY_RETRY_AFTER seconds.
+THROTTLING = {
+    'ENABLED': env.bool('THROTTLING_ENABLED', default=True),
+    'CACHE_ALIAS': env('THROTTLING_CACHE_ALIAS', default='default'),
+    'MAX_CONCURRENT': {
+        'tree': env.int('MAX_CONCURRENT_TREE_BUILDS', default=4),
+    },
+    'BUSY_RETRY_AFTER': env.int('THROTTLING_BUSY_RETRY_AFTER', default=2),
+}
+
+# Token logins buffer the users' last_login in memory; a background thread writes them
+# every FLUSH_INTERVAL seconds with one UPDATE per BATCH_SIZE users, and once more when
+# the process exits. When disabled, Simple JWT updates last_login on every login.
+LAST_LOGIN_BUFFER = {
+    'ENABLED': env.bool('LAST_LOGIN_BUFFER_ENABLED', default=True),
+    'FLUSH_INTERVAL': env.float('LAST_LOGIN_FLUSH_INTERVAL', default=10.0),
+    'BATCH_SIZE': env.int('LAST_LOGIN_BATCH_SIZE', default=500),
 }
 
 SIMPLE_JWT = {
@@ -166,5 +280,106 @@ SIMPLE_JWT = {
     ),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': not LAST_LOGIN_BUFFER['ENABLED'],
+}
+
+# Revoked (blacklisted) tokens are checked against an in-process Bloom filter sized for
+# CAPACITY entries at ERROR_RATE false positives; only probable hits query the database.
+# New revocations from other processes are loaded every REFRESH_INTERVAL seconds, and the
+# filter is rebuilt every REBUILD_INTERVAL seconds. Purge with `manage.py purge_expired_tokens`.
+# A revocation committed up to RESCAN_WINDOW seconds after one with a higher id was loaded
+# is still picked up; keep it above the longest transaction that blacklists tokens.
+TOKEN_REVOCATION = {
+    'CAPACITY': env.int('TOKEN_REVOCATION_CAPACITY', default=100_000),
+    'ERROR_RATE': env.float('TOKEN_REVOCATION_ERROR_RATE', default=0.001),
+    'REFRESH_INTERVAL': env.float('TOKEN_REVOCATION_REFRESH_INTERVAL', default=5.0),
+    'REBUILD_INTERVAL': env.float('TOKEN_REVOCATION_REBUILD_INTERVAL', default=3600.0),
+    'RESCAN_WINDOW': env.float('TOKEN_REVOCATION_RESCAN_WINDOW', default=60.0),
+}
+
+# How API requests resolve the user behind their JWT. 'cache' keeps the user row and its
+# person profile id in the CACHE_ALIAS cache for TIMEOUT seconds, dropped when the user,
+# its groups or permissions change; 'stateless' builds the user from the token claims
+# without any lookup (deactivations apply when the token expires); 'database' loads the
+# row on every request. With several processes, point CACHE_URL at a shared cache.
+JWT_USER = {
+    'MODE': env('JWT_USER_MODE', default='cache'),
+    'CACHE_ALIAS': env('JWT_USER_CACHE_ALIAS', default='default'),
+    'TIMEOUT': env.int('JWT_USER_CACHE_TIMEOUT', default=300),
+}
+
+# Serve the people API with async-native views (intended for ASGI servers such as uvicorn).
+# Only the families list, the tables export and the full tree have async variants; the
+# other people endpoints stay sync. The async variants subclass the sync views and go
+# through the same replica routing, "tree" concurrency slots, payload cache and
+# single-flight, so switching this changes how requests are scheduled, not what they hit.
+PEOPLE_API_ASYNC_VIEWS = env.bool('PEOPLE_API_ASYNC_VIEWS', default=False)
+
+# Country calling code given to phone numbers stored without one, when they are
+# normalized for lookups ("1" covers the Dominican Republic and the rest of the NANP).
+PHONE_DEFAULT_COUNTRY_CODE = env('PHONE_DEFAULT_COUNTRY_CODE', default='1')
+
+# Catalog exports of PeopleTablesDataAPIView. With PARALLEL enabled the independent
+# table exports run on a bounded thread pool, each worker on its own DB connection.
+PEOPLE_TABLES_EXPORT = {
+    'PARALLEL': env.bool('PEOPLE_TABLES_EXPORT_PARALLEL', default=False),
+    'MAX_WORKERS': env.int('PEOPLE_TABLES_EXPORT_MAX_WORKERS', default=4),
+}
+
+# Per-request instrumentation: Server-Timing header plus one JSON log line per sampled
+# request, flagging query shapes repeated DUPLICATE_QUERY_THRESHOLD times (likely N+1).
+SERVER_TIMING = {
+    'ENABLED': env.bool('SERVER_TIMING_ENABLED', default=True),
+    'SAMPLE_RATE': env.float('SERVER_TIMING_SAMPLE_RATE', default=0.1),
+    'DUPLICATE_QUERY_THRESHOLD': env.int('SERVER_TIMING_DUPLICATE_QUERY_THRESHOLD', default=3),
+    'CAPTURE_STACKS': env.bool('SERVER_TIMING_CAPTURE_STACKS', default=True),
+}
+
+# Prometheus metrics served at /metrics. Set METRICS_DIR to a directory shared by the
+# worker processes (cleared on restart) to aggregate them; otherwise each process
+# reports only its own. When METRICS_TOKEN is set, scrapes must send it as a Bearer token;
+# otherwise only clients connecting from ALLOWED_IPS are served. Behind a reverse proxy
+# on the same host every request comes from loopback, so set a token there.
+METRICS = {
+    'DIRECTORY': env('METRICS_DIR', default=''),
+    'FLUSH_INTERVAL': env.float('METRICS_FLUSH_INTERVAL', default=5.0),
+    'TOKEN': env('METRICS_TOKEN', default=''),
+    'ALLOWED_IPS': env.list('METRICS_ALLOWED_IPS', default=['127.0.0.1', '::1']),
+}
+
+# On-demand profiling: staff users send `X-Profile: 1` (or `?profile=1`) to run a request
+# under cProfile and a stack sampler (every SAMPLE_INTERVAL seconds). The newest
+# MAX_PROFILES profiles are kept in DIRECTORY and served under /api/profiles/. Off by default
+# outside DEBUG; set PROFILING_ENABLED to allow it in production.
+PROFILING = {
+    'ENABLED': env.bool('PROFILING_ENABLED', default=DEBUG),
+    'DIRECTORY': env('PROFILING_DIR', default=str(BASE_DIR / 'profiles')),
+    'MAX_PROFILES': env.int('PROFILING_MAX_PROFILES', default=50),
+    'SAMPLE_INTERVAL': env.float('PROFILING_SAMPLE_INTERVAL', default=0.001),
+}
+
+# Queries slower than THRESHOLD_MS are appended to LOG_FILE (JSON lines) with redacted
+# parameters, the project frames that ran them and, at most once per EXPLAIN_INTERVAL
+# seconds per query shape, their EXPLAIN output. Summarize with `manage.py slow_queries`.
+SLOW_QUERIES = {
+    'ENABLED': env.bool('SLOW_QUERY_LOG_ENABLED', default=True),
+    'THRESHOLD_MS': env.float('SLOW_QUERY_THRESHOLD_MS', default=100.0),
+    'LOG_FILE': env('SLOW_QUERY_LOG_FILE', default=str(BASE_DIR / 'logs' / 'slow_queries.jsonl')),
+    'EXPLAIN': env.bool('SLOW_QUERY_EXPLAIN', default=True),
+    'EXPLAIN_INTERVAL': env.float('SLOW_QUERY_EXPLAIN_INTERVAL', default=300.0),
+    'STACK_DEPTH': env.int('SLOW_QUERY_STACK_DEPTH', default=5),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sevenawesome': {
+            'handlers': ['console'],
+            'level': env('LOG_LEVEL', default='INFO'),
+        },
+    },
 }
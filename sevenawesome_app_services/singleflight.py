@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import record_cache_lookup
+
+LOCK_KEY = "single-flight:{key}"
+RESULT_KEY = "single-flight:{key}:{flight_id}"
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+# key -> flight in progress in this process.
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+# key -> future of the flight in progress on this process' event loop.
+_async_flights: dict[str, asyncio.Future] = {}
+
+
+def _config() -> dict:
+    return settings.SINGLE_FLIGHT
+
+
+def coalesce(key: str, compute) -> bytes:
+    """
+    Return `compute()`, sharing one call between concurrent callers with the
+    same `key`. In this process the first caller computes and the others wait
+    for its bytes; across processes the first caller takes a lock in the
+    cache, and the others poll for the result stored under it. A waiter that
+    times out (`SINGLE_FLIGHT["WAIT_TIMEOUT"]`) or sees the computation fail
+    calls `compute()` itself. Only callers that arrive while a computation is
+    in flight share it; once it finishes, the next caller computes afresh.
+    A caller joining a flight gets whatever it read, so `key` must include
+    everything the result depends on, such as the data version and the
+    database read from.
+    """
+    config = _config()
+    if not config["ENABLED"]:
+        return compute()
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        shared = flight.done.wait(config["WAIT_TIMEOUT"]) and flight.result is not None
+        record_cache_lookup("single_flight", shared)
+        return flight.result if shared else compute()
+
+    try:
+        flight.result = _across_processes(key, compute, config)
+        return flight.result
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def _across_processes(key: str, compute, config: dict) -> bytes:
+    cache = caches[config["CACHE_ALIAS"]]
+    lock_key = LOCK_KEY.format(key=key)
+    deadline = time.monotonic() + config["WAIT_TIMEOUT"]
+    # The flight found in progress; its result is looked up even after its lock is gone.
+    awaited = None
+    while True:
+        if awaited is not None:
+            result = cache.get(RESULT_KEY.format(key=key, flight_id=awaited))
+            if result is not None:
+                record_cache_lookup("single_flight", True)
+                return result
+        flight_id = uuid.uuid4().hex
+        if cache.add(lock_key, flight_id, config["LOCK_TIMEOUT"]):
+            if awaited is not None:
+                record_cache_lookup("single_flight", False)
+            return _lead(cache, key, lock_key, flight_id, compute, config)
+        awaited = cache.get(lock_key) or awaited
+        if time.monotonic() >= deadline:
+            record_cache_lookup("single_flight", False)
+            return compute()
+        time.sleep(config["POLL_INTERVAL"])
+
+
+def _lead(cache, key: str, lock_key: str, flight_id: str, compute, config: dict) -> bytes:
+    try:
+        result = compute()
+    except BaseException:
+        # Let a waiting process take over.
+        cache.delete(lock_key)
+        raise
+    # Left for the processes already waiting; releasing the lock keeps newcomers from reusing it.
+    cache.set(RESULT_KEY.format(key=key, flight_id=flight_id), result, config["RESULT_TTL"])
+    cache.delete(lock_key)
+    return result
+
+
+async def acoalesce(key: str, acompute) -> bytes:
+    """`coalesce` for async callers; `acompute` is a coroutine function."""
+    config = _config()
+    if not config["ENABLED"]:
+        return await acompute()
+
+    loop = asyncio.get_running_loop()
+    future = _async_flights.get(key)
+    if future is not None and future.get_loop() is loop:
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), config["WAIT_TIMEOUT"])
+        except asyncio.TimeoutError:
+            result = None
+        record_cache_lookup("single_flight", result is not None)
+        return result if result is not None else await acompute()
+
+    future = _async_flights[key] = loop.create_future()
+    result = None
+    try:
+        result = await _aacross_processes(key, acompute, config)
+        return result
+    finally:
+        del _async_flights[key]
+        # None tells the waiters to compute on their own.
+        future.set_result(result)
+
+
+async def _aacross_processes(key: str, acompute, config: dict) -> bytes:
+    cache = caches[config["CACHE_ALIAS"]]
+    lock_key = LOCK_KEY.format(key=key)
+    deadline = time.monotonic() + config["WAIT_TIMEOUT"]
+    awaited = None
+    while True:
+        if awaited is not None:
+            result = await cache.aget(RESULT_KEY.format(key=key, flight_id=awaited))
+            if result is not None:
+                record_cache_lookup("single_flight", True)
+                return result
+        flight_id = uuid.uuid4().hex
+        if await cache.aadd(lock_key, flight_id, config["LOCK_TIMEOUT"]):
+            if awaited is not None:
+                record_cache_lookup("single_flight", False)
+            try:
+                result = await acompute()
+            except BaseException:
+                await cache.adelete(lock_key)
+                raise
+            await cache.aset(RESULT_KEY.format(key=key, flight_id=flight_id), result, config["RESULT_TTL"])
+            await cache.adelete(lock_key)
+            return result
+        awaited = await cache.aget(lock_key) or awaited
+        if time.monotonic() >= deadline:
+            record_cache_lookup("single_flight", False)
+            return await acompute()
+        await asyncio.sleep(config["POLL_INTERVAL"])
@@ -0,0 +1,140 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.backends.signals import connection_created
+
+from .instrumentation import normalize_sql, project_stack, skip_frames_from
+
+logger = logging.getLogger("sevenawesome.slow_queries")
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+}
+
+_write_lock = threading.Lock()
+# (database alias, normalized SQL) -> when its plan was last recorded.
+_explained_at: dict[tuple[str, str], float] = {}
+
+skip_frames_from(__file__)
+
+
+def redact_params(params) -> list | None:
+    """
+    Keep the parameters that help reproducing a plan (numbers, booleans, NULL)
+    and replace the ones that may hold personal data by their type and length.
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        params = list(params.values())
+    redacted = []
+    for value in params:
+        if value is None or isinstance(value, (bool, int, float, Decimal)):
+            redacted.append(value)
+        elif isinstance(value, (str, bytes)):
+            redacted.append(f"<{type(value).__name__}:{len(value)}>")
+        else:
+            redacted.append(f"<{type(value).__name__}>")
+    return redacted
+
+
+def explain(connection, sql: str, params) -> list[dict] | dict | None:
+    """
+    The plan of a SELECT, one dict per row of `EXPLAIN` output. Runs on a
+    backend cursor, outside the execute wrappers, so it is neither counted nor
+    logged itself.
+    """
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor, "EXPLAIN ")
+    try:
+        with connection.wrap_database_errors:
+            cursor = connection.create_cursor()
+            try:
+                cursor.execute(prefix + sql, params)
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+    except DatabaseError as exc:
+        return {"error": str(exc)}
+
+
+def _should_explain(alias: str, normalized: str) -> bool:
+    config = settings.SLOW_QUERIES
+    if not config["EXPLAIN"]:
+        return False
+    now = time.monotonic()
+    key = (alias, normalized)
+    last = _explained_at.get(key)
+    if last is not None and now - last < config["EXPLAIN_INTERVAL"]:
+        return False
+    _explained_at[key] = now
+    return True
+
+
+def _record(connection, sql: str, params, many: bool, duration: float):
+    config = settings.SLOW_QUERIES
+    normalized = normalize_sql(sql)
+    entry = {
+        "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "database": connection.alias,
+        "vendor": connection.vendor,
+        "duration_ms": round(duration * 1000, 2),
+        "sql": normalized,
+        "params": "<executemany>" if many else redact_params(params),
+        "stack": project_stack(config["STACK_DEPTH"]),
+        "plan": None,
+    }
+    if not many and _should_explain(connection.alias, normalized):
+        entry["plan"] = explain(connection, sql, params)
+
+    path = Path(config["LOG_FILE"])
+    line = json.dumps(entry, default=str) + "\n"
+    try:
+        with _write_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a") as handle:
+                handle.write(line)
+    except OSError:
+        logger.exception("Could not write to the slow-query log %s", path)
+
+
+def _log_slow_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        config = settings.SLOW_QUERIES
+        if config["ENABLED"] and duration * 1000 >= config["THRESHOLD_MS"]:
+            _record(context["connection"], sql, params, many, duration)
+
+
+def install_slow_query_log(sender=None, connection=None, **kwargs):
+    """Attach the slow-query log to a connection (idempotent; runs on `connection_created`)."""
+    if _log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_log_slow_query)
+
+
+connection_created.connect(install_slow_query_log, dispatch_uid="slow_query_log")
+
+
+def read_log(path) -> list[dict]:
+    entries = []
+    with open(path) as handle:
+        for line in handle:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A line cut short by a crash or a concurrent write.
+                continue
+    return entries
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .revocation import BloomFilter, RevocationFilter
+from .throttling import TokenBucketThrottle
+
+
+class ClockThrottle(TokenBucketThrottle):
+    scope = "test"
+    rate = "3/min"
+    now = 1000.0
+
+    def timer(self):
+        return ClockThrottle.now
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+@override_settings(THROTTLING={"ENABLED": True, "CACHE_ALIAS": "default"})
+class TokenBucketThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        ClockThrottle.now = 1000.0
+        self.request = APIRequestFactory().get("/", REMOTE_ADDR="10.0.0.1")
+
+    def attempt(self, request=None):
+        throttle = ClockThrottle()
+        return throttle.allow_request(request or self.request, None), throttle.wait()
+
+    def test_burst_then_refill(self):
+        self.assertEqual([self.attempt()[0] for _ in range(3)], [True, True, True])
+        allowed, wait = self.attempt()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 20)
+        # One token comes back every 20 seconds.
+        ClockThrottle.now += 20
+        self.assertTrue(self.attempt()[0])
+        self.assertFalse(self.attempt()[0])
+
+    def test_bucket_never_exceeds_capacity(self):
+        ClockThrottle.now += 3600
+        self.assertEqual([self.attempt()[0] for _ in range(4)], [True, True, True, False])
+
+    def test_buckets_are_per_key(self):
+        for _ in range(3):
+            self.attempt()
+        self.assertFalse(self.attempt()[0])
+        other = APIRequestFactory().get("/", REMOTE_ADDR="10.0.0.2")
+        self.assertTrue(self.attempt(other)[0])
+
+    @override_settings(THROTTLING={"ENABLED": False, "CACHE_ALIAS": "default"})
+    def test_disabled(self):
+        self.assertEqual([self.attempt()[0] for _ in range(5)], [True] * 5)
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        added = [f"jti-{number}" for number in range(1000)]
+        for item in added:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in added))
+        self.assertEqual(bloom.count, 1000)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for number in range(1000):
+            bloom.add(f"jti-{number}")
+        false_positives = sum(f"other-{number}" in bloom for number in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RevocationFilterTests(TestCase):
+    def blacklist(self, jti, **fields):
+        now = timezone.now()
+        outstanding = OutstandingToken.objects.create(
+            jti=jti, token=jti, created_at=now, expires_at=now + timedelta(days=1)
+        )
+        return BlacklistedToken.objects.create(token=outstanding, **fields)
+
+    def revocations(self, rescan_window=60.0):
+        return RevocationFilter(1000, 0.001, 0, 3600, rescan_window)
+
+    def test_revoked_and_unknown_tokens(self):
+        self.blacklist("revoked")
+        revocations = self.revocations()
+        self.assertTrue(revocations.is_revoked("revoked"))
+        self.assertFalse(revocations.is_revoked("valid"))
+        self.assertFalse(revocations.might_be_revoked("valid"))
+
+    def test_later_rows_are_loaded(self):
+        revocations = self.revocations()
+        self.assertFalse(revocations.is_revoked("later"))
+        self.blacklist("later")
+        self.assertTrue(revocations.is_revoked("later"))
+
+    def test_added_tokens_are_seen_at_once(self):
+        revocations = self.revocations()
+        revocations.refresh()
+        revocations.refresh_interval = 3600
+        revocations.add("local")
+        self.assertTrue(revocations.might_be_revoked("local"))
+
+    def test_late_committed_row_within_rescan_window(self):
+        self.blacklist("first", id=10)
+        revocations = self.revocations()
+        revocations.refresh()
+        # A row with a lower id, committed after the higher one was loaded.
+        self.blacklist("late", id=5)
+        self.assertTrue(revocations.is_revoked("late"))
+
+    def test_late_committed_row_after_rescan_window(self):
+        self.blacklist("first", id=10)
+        revocations = self.revocations(rescan_window=0)
+        revocations.refresh()
+        revocations.refresh()
+        self.blacklist("late", id=5)
+        revocations.refresh()
+        self.assertFalse(revocations.might_be_revoked("late"))
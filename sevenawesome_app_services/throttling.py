@@ -0,0 +1,169 @@
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    A token bucket per cache key: it holds up to N tokens for a rate of "N/period",
+    refills continuously at N per period, and each request takes one token. Bursts
+    up to N pass at once; after that requests are spaced out instead of being
+    refused until a whole window has passed. Buckets live in
+    `THROTTLING["CACHE_ALIAS"]`. Reading and writing a bucket is not atomic, so
+    concurrent requests for the same key may occasionally both get through.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLING["CACHE_ALIAS"]]
+        self._wait = None
+        if getattr(self, "scope", None) is not None:
+            super().__init__()
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLING["ENABLED"] or self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        refill_per_second = self.num_requests / self.duration
+        now = self.timer()
+        tokens, updated_at = self.cache.get(self.key, (float(self.num_requests), now))
+        tokens = min(float(self.num_requests), tokens + (now - updated_at) * refill_per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            self._wait = (1 - tokens) / refill_per_second
+        self.cache.set(self.key, (tokens, now), self.duration)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Login attempts per client IP."""
+
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """Login attempts per targeted account, whichever IPs they come from."""
+
+    scope = "login_username"
+
+    def get_cache_key(self, request, view):
+        username = request.data.get(get_user_model().USERNAME_FIELD)
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": username.lower()}
+
+
+class EndpointThrottle(TokenBucketThrottle):
+    """
+    Requests per user (per IP when anonymous) and endpoint, at the rate of the
+    view's `throttle_scope` ("api" when it sets none).
+    """
+
+    default_scope = "api"
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None) or self.default_scope
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user-{request.user.pk}"
+        else:
+            ident = f"ip-{self.get_ident(request)}"
+        match = request.resolver_match
+        endpoint = match.view_name if match else type(view).__name__
+        return self.cache_format % {"scope": self.scope, "ident": f"{endpoint}:{ident}"}
+
+
+class ServiceBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many requests of this kind are in progress; retry shortly."
+    default_code = "service_busy"
+
+    def __init__(self, wait: float):
+        super().__init__()
+        # DRF's exception handler turns `wait` into a Retry-After header.
+        self.wait = wait
+
+
+_limiters: dict[str, threading.BoundedSemaphore] = {}
+_limiters_lock = threading.Lock()
+# name -> slots held right now, counted even while throttling is disabled.
+_in_use: Counter = Counter()
+
+
+def _limiter(name: str) -> threading.BoundedSemaphore:
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = threading.BoundedSemaphore(settings.THROTTLING["MAX_CONCURRENT"][name])
+        return _limiters[name]
+
+
+@contextmanager
+def concurrency_slot(name: str):
+    """
+    Hold one of the `THROTTLING["MAX_CONCURRENT"][name]` slots of this worker
+    process, or raise `ServiceBusy` (503 with Retry-After) when none is free.
+    """
+    limiter = _limiter(name) if settings.THROTTLING["ENABLED"] else None
+    if limiter is not None and not limiter.acquire(blocking=False):
+        raise ServiceBusy(settings.THROTTLING["BUSY_RETRY_AFTER"])
+    with _limiters_lock:
+        _in_use[name] += 1
+    try:
+        yield
+    finally:
+        with _limiters_lock:
+            _in_use[name] -= 1
+        if limiter is not None:
+            limiter.release()
+
+
+def slots_in_use(name: str) -> int:
+    """How many `concurrency_slot(name)` blocks are running in this worker process."""
+    return _in_use[name]
+
+
+class ConcurrencyLimitMixin:
+    """
+    DRF view mixin holding a `concurrency_slot(concurrency_limit)` for the
+    whole request: requests over the cap are answered right away with 503
+    and Retry-After, instead of queueing behind the ones in progress.
+    """
+
+    concurrency_limit = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.concurrency_limit is not None:
+            slot = ExitStack()
+            slot.enter_context(concurrency_slot(self.concurrency_limit))
+            self._concurrency_slot = slot
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        slot = getattr(self, "_concurrency_slot", None)
+        if slot is not None:
+            self._concurrency_slot = None
+            slot.close()
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -21,6 +21,14 @@ from rest_framework_simplejwt.views import TokenVerifyView
 from .auth_views import (
     CustomTokenObtainPairView,
     CustomTokenRefreshView,
+    TokenRevokeView,
+)
+from .metrics import metrics_view
+from .profiling import (
+    ProfileCollapsedStacksView,
+    ProfileDetailView,
+    ProfileListView,
+    ProfileStatsView,
 )
 
 urlpatterns = [
@@ -28,5 +36,15 @@ urlpatterns = [
     path('api/auth/jwt/create/', CustomTokenObtainPairView.as_view(), name='jwt-create'),
     path('api/auth/jwt/refresh/', CustomTokenRefreshView.as_view(), name='jwt-refresh'),
     path('api/auth/jwt/verify/', TokenVerifyView.as_view(), name='jwt-verify'),
+    path('api/auth/jwt/revoke/', TokenRevokeView.as_view(), name='jwt-revoke'),
     path('api/', include('people.api_urls')),
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
+    path(
+        'api/profiles/<str:profile_id>/collapsed/',
+        ProfileCollapsedStacksView.as_view(),
+        name='profile-collapsed',
+    ),
+    path('api/profiles/<str:profile_id>/pstats/', ProfileStatsView.as_view(), name='profile-pstats'),
+    path('metrics', metrics_view, name='metrics'),
 ]